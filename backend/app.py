@@ -16,12 +16,24 @@ primary database.
 """
 
   # Import Flask core components for web application functionality
-from flask import Flask, jsonify, request  # Flask: main app class, jsonify: JSON responses, request: HTTP request data
+from flask import Flask, g, jsonify, request  # Flask: main app class, jsonify: JSON responses, request: HTTP request data
 from flask_jwt_extended import JWTManager, jwt_required  # JWT token management for user authentication
 from flask_cors import CORS  # Cross-Origin Resource Sharing - allows frontend to connect to backend
 from config import Config  # Application configuration settings (database, JWT, etc.)
-from flask_migrate import Migrate  # Database migration management for schema changes
 from db import db, ma  # Database instance (SQLAlchemy) and Marshmallow for JSON serialization
+from write_buffer import progress_buffer  # Write-behind buffer for progress updates
+import instrumentation  # Per-request Server-Timing and SQL query counting
+from json_provider import FastJSONProvider  # orjson-backed app.json, byte-compatible with Flask's
+import metrics  # Prometheus /metrics endpoint
+from slow_queries import slow_query_log  # Slow statement ring buffer with EXPLAIN capture
+from replicas import replica_router  # Read-replica routing for @replica_reads views
+from sharding import shard_router  # Per-user tables on owner_id shards
+from log_queue import LogSampler, configure_logging  # Logging off the request thread
+from memory_diagnostics import memory_diagnostics  # tracemalloc snapshots and memory report per worker
+from profiling import request_profiler  # Profiles of requests with a signed X-Profile header
+from isbn_cache import isbn_membership  # Per-user ISBN sets for "is it in my library?"
+from circuit_breaker import (db_breaker, is_database_unavailable, unavailable_instead_of_500,  # Fast 503s during database outages
+                             unavailable_response)
 
   # Import all API route blueprints (groups of related endpoints)
 from routes.books import books_endpoint  # Book management endpoints (add, edit, delete books)
@@ -30,9 +42,10 @@ from routes.notes import notes_endpoint  # Book notes and annotations endpoints
 from routes.tasks import tasks_endpoint  # Background task management endpoints
 from routes.files import files_endpoint  # File upload/download endpoints
 from routes.settings import settings_endpoint  # User settings management endpoints
+from routes.admin import admin_endpoint  # Admin-only diagnostics endpoints
+from routes.bootstrap import bootstrap_endpoint  # Initial app state in one request
 
-  # Import API documentation and authentication
-from flasgger import Swagger  # Automatic API documentation generation
+  # Import authentication blueprints
 from auth.auth_route import auth_endpoint  # Authentication endpoints (login, register, logout)
 from auth.user_route import user_endpoint  # User management endpoints
 
@@ -40,14 +53,21 @@ from auth.user_route import user_endpoint  # User management endpoints
 from commands.tasks import tasks_command  # CLI commands for task management
 from commands.user import user_command  # CLI commands for user management
 from commands.db_check import db_check_command  # CLI commands for database health checks
+from commands.slow_queries import slow_queries_command  # `flask db slow-queries` report
+from commands.seed import seed_command  # `flask seed` synthetic data generator
+from commands.shards import shards_command  # `flask shards` placement and resharding
+from commands.memory import memory_command  # `flask memory` diagnostics of a running worker
+
+  # flasgger (Swagger UI) and flask_migrate (alembic) are imported inside
+  # create_app() only when they are actually needed; see _init_extensions()
 
   # Import standard Python libraries
+from functools import lru_cache  # Cache the API version after the first read
 from pathlib import Path  # Modern path handling for file operations
 import os  # Operating system interface for environment variables
 import logging  # Application logging for debugging and monitoring
 from datetime import datetime  # Date and time handling
 from typing import Dict, Any, Tuple, Union  # Type hints for better code documentation
-
   # Try to import TOML parser for configuration files (handles different Python versions)
 try:  # Exception handling block
     import tomllib  # Python 3.11+ built-in TOML parser
@@ -57,15 +77,6 @@ except ImportError:  # Exception handler
     except ImportError:  # Exception handler
         tomllib = None  # No TOML support available
 
-  # Create the main Flask application instance
-  # __name__ tells Flask where to find resources like templates and static files
-app = Flask(__name__)  # Flask application instance
-
-
-# ✅ Lightweight health check — no DB calls, no auth
-@app.route("/health", methods=["GET"])
-def health():
-    return jsonify({"status": "ok"}), 200
 
   # Configure CORS (Cross-Origin Resource Sharing) to allow frontend to connect to backend
 def get_cors_origins():  # Getter method for cors_origins
@@ -89,275 +100,474 @@ def get_cors_origins():  # Getter method for cors_origins
     
     return origins
 
-  # Configure CORS with specific settings - use list of origins instead of function
-cors_origins = get_cors_origins()
-app.logger.info(f"CORS origins configured: {cors_origins}")
-
-CORS(app, 
-     origins=cors_origins,  # List of allowed origins
-     supports_credentials=True,  # Allow cookies and authentication headers
-     allow_headers=['Content-Type', 'Authorization', 'X-Requested-With'],  # Allowed HTTP headers
-     methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'])  # Allowed HTTP methods
-
-  # Configure application logging based on environment
-if os.getenv("FLASK_ENV") == "production" or os.getenv("RENDER") == "true":  # Production environment
-    logging.basicConfig(
-        level=logging.INFO,  # Only log INFO level and above (less verbose)
-        format='%(asctime)s %(levelname)s %(name)s %(message)s'  # Structured log format with timestamp
-    )
-    app.logger.setLevel(logging.INFO)  # Set Flask app logger to INFO level
-else:  # Development environment
-    logging.basicConfig(level=logging.DEBUG)  # Log DEBUG level and above (more verbose)
-    app.logger.setLevel(logging.DEBUG)  # Set Flask app logger to DEBUG level
+
+@lru_cache(maxsize=None)
+def api_version() -> str:  # Function: api_version
+    """API version from pyproject.toml (read once per process)"""
+    version = "1.4.0"
+    try:
+        file = Path(__file__).resolve().parent.parent / "pyproject.toml"
+        if tomllib and file.exists():
+            with open(file, "rb") as f:
+                version = tomllib.load(f)["tool"]["poetry"]["version"]
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Could not read version: {e}")
+    return version
+
+
+def create_app(config=None) -> Flask:  # Function: create_app
+    """
+    Application factory.
+
+    Builds a fully configured Flask app. `config` is any object accepted by
+    app.config.from_object(); it defaults to Config(), which reads the
+    environment.
+    """
+  # __name__ tells Flask where to find resources like templates and static files
+    app = Flask(__name__)  # Flask application instance
+
+    _configure_logging(app)
 
   # Load application configuration from Config class
-app.config.from_object(Config())  # Loads database settings, JWT config, file upload limits, etc.
+    app.config.from_object(config or Config())  # Loads database settings, JWT config, file upload limits, etc.
 
-  # Initialize Flask extensions with the app instance
-swagger = Swagger(app)  # Initialize Swagger for automatic API documentation
-db.init_app(app)  # Initialize SQLAlchemy database connection
-ma.init_app(app)  # Initialize Marshmallow for JSON serialization/deserialization
-migrate = Migrate(app, db)  # Initialize Flask-Migrate for database schema migrations
-jwt = JWTManager(app)  # Initialize JWT token management for authentication
+    _init_extensions(app)
+    _register_request_hooks(app)
+
+    if not os.path.exists(os.getenv("EXPORT_FOLDER", "export_data")):
+        os.makedirs(os.getenv("EXPORT_FOLDER", "export_data"))
+
+    _register_cli_commands(app)
+    _register_blueprints(app)
+    _register_error_handlers(app)
+    _register_core_routes(app)
+    return app
+
+
+def __getattr__(name):  # Function: __getattr__
+    """
+    Build the module-level `app` on first access, so `gunicorn app:app`,
+    `flask --app app` and `from app import app` keep working while plain
+    `import app` (e.g. to call create_app()) stays cheap.
+    """
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _configure_logging(app):  # Function: _configure_logging
+  # Configure application logging based on environment; records go through a
+  # queue to a background writer (JSON lines in production, see log_queue.py)
+    if os.getenv("FLASK_ENV") == "production" or os.getenv("RENDER") == "true":  # Production environment
+        configure_logging(logging.INFO)  # Only log INFO level and above (less verbose)
+        app.logger.setLevel(logging.INFO)  # Set Flask app logger to INFO level
+    else:  # Development environment
+        configure_logging(logging.DEBUG)  # Log DEBUG level and above (more verbose)
+        app.logger.setLevel(logging.DEBUG)  # Set Flask app logger to DEBUG level
+
+
+def _init_extensions(app):  # Function: _init_extensions
+  # Configure CORS with specific settings - use list of origins instead of function
+    cors_origins = get_cors_origins()
+    app.logger.info(f"CORS origins configured: {cors_origins}")
 
+    CORS(app, 
+         origins=cors_origins,  # List of allowed origins
+         supports_credentials=True,  # Allow cookies and authentication headers
+         allow_headers=['Content-Type', 'Authorization', 'X-Requested-With',
+                        'X-Last-Write'],  # Allowed HTTP headers (X-Last-Write: replicas.py)
+         expose_headers=['X-Last-Write'],  # Readable by the web client
+         methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'])  # Allowed HTTP methods
+
+  # Initialize Flask extensions with the app instance
+    if app.config.get("SWAGGER_ENABLED", True):
+        from flasgger import Swagger  # Automatic API documentation generation (heavy import)
+        Swagger(app)  # Initialize Swagger for automatic API documentation
+    db.init_app(app)  # Initialize SQLAlchemy database connection
+    ma.init_app(app)  # Initialize Marshmallow for JSON serialization/deserialization
+    if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+  # Flask-Migrate (and alembic) only matter for `flask db ...` commands
+        from flask_migrate import Migrate
+        Migrate(app, db)  # Initialize Flask-Migrate for database schema migrations
+    jwt = JWTManager(app)  # Initialize JWT token management for authentication
+    progress_buffer.init_app(app)  # Optional write-behind buffer for reading progress
+    app.json = FastJSONProvider(app)  # orjson encoding (instrumentation wraps it when timing is on)
+    instrumentation.init_app(app)  # Request timing hooks (registered first so they run outermost)
+    metrics.init_app(app)  # Prometheus request/pool/task metrics and /metrics
+    slow_query_log.init_app(app)  # Record statements above SLOW_QUERY_THRESHOLD_MS on every engine
+    replica_router.init_app(app)  # Pin writers to the primary, health-check replicas
+    shard_router.init_app(app)  # Shard placement, id blocks, write pause during moves
+    db_breaker.init_app(app)  # Stop opening connections while the database is down
+    request_profiler.init_app(app)  # WSGI middleware; inert without an X-Profile header
+    memory_diagnostics.init_app(app)  # Backs /v1/admin/memory and `flask memory`
+    isbn_membership.init_app(app)  # Checked against each user's books version before use
 
   # JWT token blacklist checker - prevents use of revoked tokens after logout
-@jwt.token_in_blocklist_loader
-def check_if_token_revoked(jwt_header, jwt_payload):
-    """Check if a JWT token has been revoked (blacklisted) after logout"""
-    from auth.models import RevokedTokenModel  # Import token blacklist model
-    return RevokedTokenModel.is_jti_blacklisted(jwt_payload["jti"])  # Check if token ID is blacklisted
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        """Check if a JWT token has been revoked (blacklisted) after logout"""
+        from auth.models import RevokedTokenModel  # Import token blacklist model
+        return RevokedTokenModel.is_jti_blacklisted(jwt_payload["jti"])  # Check if token ID is blacklisted
+
+
+def _register_request_hooks(app):  # Function: _register_request_hooks
+  # Repeated 4xx responses per endpoint are logged one in LOG_4XX_SAMPLE_EVERY
+    client_error_sampler = LogSampler(app.config.get("LOG_4XX_SAMPLE_EVERY", 1))
 
   # Request logging middleware
-@app.before_request
-def log_request_info():
-    """Log request information for debugging"""
-    if app.debug or os.getenv("FLASK_ENV") == "development":
-        app.logger.debug(f"Request: {request.method} {request.path}")
-        app.logger.debug(f"Headers: {dict(request.headers)}")
-        if request.method in ['POST', 'PUT', 'PATCH'] and request.is_json:
-            app.logger.debug(f"JSON data: {request.get_json()}")
+    @app.before_request
+    def log_request_info():
+        """Log request information for debugging"""
+        if (app.debug or os.getenv("FLASK_ENV") == "development") and \
+                app.logger.isEnabledFor(logging.DEBUG):
+            fields = {
+                "method": request.method,
+                "path": request.path,
+                "headers": {
+                    name: ("<redacted>" if name.lower() in ("authorization", "cookie") else value)
+                    for name, value in request.headers.items()
+                },
+            }
+            if request.method in ['POST', 'PUT', 'PATCH'] and request.is_json:
+                fields["json"] = request.get_json(silent=True)
+            app.logger.debug("request", extra={"fields": fields})
 
   # Add security headers to every response (CORS is now handled by Flask-CORS extension)
-@app.after_request  # Flask application decorator
-def after_request(response):  # Function: after_request
-    """Add security headers to all responses"""
-    # Log response status for debugging
-    if response.status_code >= 500:
-        app.logger.error(f"Response: {request.method} {request.path} -> {response.status_code}")
-    elif response.status_code >= 400:
-        # Don't log 503 from health endpoint as warning since it's expected
-        if response.status_code == 503 and request.path == "/health":
-            app.logger.info(f"Response: {request.method} {request.path} -> {response.status_code} (service unhealthy)")
-        else:
-            app.logger.warning(f"Response: {request.method} {request.path} -> {response.status_code}")
-    elif app.debug or os.getenv("FLASK_ENV") == "development":
-        app.logger.debug(f"Response: {request.method} {request.path} -> {response.status_code}")
-    
+    @app.after_request  # Flask application decorator
+    def after_request(response):  # Function: after_request
+        """Add security headers to all responses"""
+        # Database outage caught by a view's own except: 503, not 500
+        response = unavailable_instead_of_500(response)
+
+        # Log response status for debugging
+        if response.status_code >= 500:
+            # Exceptions already produced an error record (_log_exception)
+            if not g.get("_error_logged"):
+                app.logger.error(f"Response: {request.method} {request.path} -> {response.status_code}")
+        elif response.status_code >= 400:
+            # Don't log 503 from health endpoint as warning since it's expected
+            if response.status_code == 503 and request.path == "/health":
+                app.logger.info(f"Response: {request.method} {request.path} -> {response.status_code} (service unhealthy)")
+            else:
+                # Sampled per endpoint and status; "count" is how many
+                # responses this record stands for
+                count = client_error_sampler.should_log(
+                    (request.endpoint, response.status_code)
+                )
+                if count:
+                    app.logger.warning(
+                        f"Response: {request.method} {request.path} -> {response.status_code}",
+                        extra={"fields": {"endpoint": request.endpoint,
+                                          "status": response.status_code,
+                                          "count": count}}
+                    )
+        elif app.debug or os.getenv("FLASK_ENV") == "development":
+            app.logger.debug(f"Response: {request.method} {request.path} -> {response.status_code}")
+
   # Determine if running in production environment
-    is_production = (os.getenv("RENDER") == "true" or  # Render.com deployment
-                     os.getenv("FLASK_ENV") == "production")  # Production environment flag
-    
+        is_production = (os.getenv("RENDER") == "true" or  # Render.com deployment
+                         os.getenv("FLASK_ENV") == "production")  # Production environment flag
+
   # Add caching headers for different types of API responses
-    if request.endpoint and request.method == 'GET':  # Only for GET requests with defined endpoints
-        if request.endpoint in ['health_check', 'index']:  # Health check and index endpoints
-            response.headers['Cache-Control'] = 'public, max-age=300'  # Cache publicly for 5 minutes
-        elif '/v1/books/stats' in request.path:  # Book statistics endpoint
-            response.headers['Cache-Control'] = 'private, max-age=60'  # Cache privately for 1 minute
-        else:  # All other endpoints
-            response.headers['Cache-Control'] = 'private, no-cache, no-store, must-revalidate'  # No caching
-    
+        if request.endpoint and request.method == 'GET':  # Only for GET requests with defined endpoints
+            if request.endpoint in ['health_check', 'index']:  # Health check and index endpoints
+                response.headers['Cache-Control'] = 'public, max-age=300'  # Cache publicly for 5 minutes
+            elif '/v1/books/stats' in request.path:  # Book statistics endpoint
+                response.headers['Cache-Control'] = 'private, max-age=60'  # Cache privately for 1 minute
+            elif request.endpoint == 'bootstrap.get_bootstrap':  # Carries an ETag
+                response.headers['Cache-Control'] = 'private, no-cache'  # Keep, but revalidate (304 when unchanged)
+            else:  # All other endpoints
+                response.headers['Cache-Control'] = 'private, no-cache, no-store, must-revalidate'  # No caching
+
   # Add security headers in production or when debug is disabled
-    if is_production or not app.debug:
-        response.headers['X-Content-Type-Options'] = 'nosniff'  # Prevent MIME type sniffing attacks
-        response.headers['X-Frame-Options'] = 'DENY'  # Prevent clickjacking by denying iframe embedding
-        response.headers['X-XSS-Protection'] = '1; mode=block'  # Enable XSS filtering in browsers
-        response.headers['Strict-Transport-Security'] = (  # Force HTTPS connections
-            'max-age=31536000; includeSubDomains'  # 1 year duration, include subdomains
-        )
-        response.headers['Referrer-Policy'] = (  # Control referrer information sent
-            'strict-origin-when-cross-origin'  # Only send origin when crossing origins
-        )
-        
+        if is_production or not app.debug:
+            response.headers['X-Content-Type-Options'] = 'nosniff'  # Prevent MIME type sniffing attacks
+            response.headers['X-Frame-Options'] = 'DENY'  # Prevent clickjacking by denying iframe embedding
+            response.headers['X-XSS-Protection'] = '1; mode=block'  # Enable XSS filtering in browsers
+            response.headers['Strict-Transport-Security'] = (  # Force HTTPS connections
+                'max-age=31536000; includeSubDomains'  # 1 year duration, include subdomains
+            )
+            response.headers['Referrer-Policy'] = (  # Control referrer information sent
+                'strict-origin-when-cross-origin'  # Only send origin when crossing origins
+            )
+
   # Additional production headers
-        response.headers['X-Permitted-Cross-Domain-Policies'] = 'none'
-        response.headers['Content-Security-Policy'] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline'; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data: https:; "
-            "connect-src 'self' https:; "
-            "font-src 'self' data:; "
-            "object-src 'none'; "
-            "base-uri 'self'; "
-            "form-action 'self'"
-        )
-    
-    return response
+            response.headers['X-Permitted-Cross-Domain-Policies'] = 'none'
+            response.headers['Content-Security-Policy'] = (
+                "default-src 'self'; "
+                "script-src 'self' 'unsafe-inline'; "
+                "style-src 'self' 'unsafe-inline'; "
+                "img-src 'self' data: https:; "
+                "connect-src 'self' https:; "
+                "font-src 'self' data:; "
+                "object-src 'none'; "
+                "base-uri 'self'; "
+                "form-action 'self'"
+            )
 
+        return response
 
-if not os.path.exists(os.getenv("EXPORT_FOLDER", "export_data")):
-    os.makedirs(os.getenv("EXPORT_FOLDER", "export_data"))
 
+def _register_cli_commands(app):  # Function: _register_cli_commands
   # Register CLI commands
-app.cli.add_command(tasks_command)
-app.cli.add_command(user_command)
-app.cli.add_command(db_check_command)
-
+    app.cli.add_command(tasks_command)
+    app.cli.add_command(user_command)
+    app.cli.add_command(db_check_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(shards_command)
+    app.cli.add_command(memory_command)
+    if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+        from flask_migrate.cli import db as db_cli_group  # Flask-Migrate's `flask db` command group
+        db_cli_group.add_command(slow_queries_command)
+
+
+def _register_blueprints(app):  # Function: _register_blueprints
   # Register API routes
-app.register_blueprint(books_endpoint)
-app.register_blueprint(profiles_endpoint)
-app.register_blueprint(notes_endpoint)
-app.register_blueprint(tasks_endpoint)
-app.register_blueprint(files_endpoint)
-app.register_blueprint(settings_endpoint)
-app.register_blueprint(auth_endpoint)
-app.register_blueprint(user_endpoint)
+    app.register_blueprint(books_endpoint)
+    app.register_blueprint(profiles_endpoint)
+    app.register_blueprint(notes_endpoint)
+    app.register_blueprint(tasks_endpoint)
+    app.register_blueprint(files_endpoint)
+    app.register_blueprint(settings_endpoint)
+    app.register_blueprint(auth_endpoint)
+    app.register_blueprint(user_endpoint)
+    app.register_blueprint(admin_endpoint)
+    app.register_blueprint(bootstrap_endpoint)
 
 
 # Removed manual preflight handling - Flask-CORS extension handles this automatically
 
 
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({
-        'error': 'Not Found',
-        'message': 'The requested resource was not found.'
-    }), 404
-
+def _register_error_handlers(app):  # Function: _register_error_handlers
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({
+            'error': 'Not Found',
+            'message': 'The requested resource was not found.'
+        }), 404
 
+    @app.errorhandler(400)
+    def bad_request(error):
+        return jsonify({
+            'error': 'Bad Request',
+            'message': 'The request could not be understood by the server.'
+        }), 400
 
+    @app.errorhandler(401)
+    def unauthorized(error):
+        return jsonify({
+            'error': 'Unauthorized',
+            'message': 'Authentication required.'
+        }), 401
 
+    @app.errorhandler(403)
+    def forbidden(error):
+        return jsonify({
+            'error': 'Forbidden',
+            'message': 'You do not have permission to access this resource.'
+        }), 403
 
-@app.errorhandler(400)
-def bad_request(error):
-    return jsonify({
-        'error': 'Bad Request',
-        'message': 'The request could not be understood by the server.'
-    }), 400
+    @app.errorhandler(422)
+    def unprocessable_entity(error):
+        return jsonify({
+            'error': 'Unprocessable Entity',
+            'message': ('The request was well-formed but was unable to be '
+                        'followed due to semantic errors.')
+        }), 422
 
+    @app.errorhandler(429)
+    def too_many_requests(error):
+        return jsonify({
+            'error': 'Too Many Requests',
+            'message': 'Rate limit exceeded. Please try again later.'
+        }), 429
 
-@app.errorhandler(401)
-def unauthorized(error):
-    return jsonify({
-        'error': 'Unauthorized',
-        'message': 'Authentication required.'
-    }), 401
+    @app.errorhandler(405)
+    def method_not_allowed(error):
+        return jsonify({
+            'error': 'Method Not Allowed',
+            'message': 'The method is not allowed for the requested URL'
+        }), 405
 
+    @app.errorhandler(500)
+    def internal_server_error(error):
+        import traceback
 
-@app.errorhandler(403)
-def forbidden(error):
-    return jsonify({
-        'error': 'Forbidden',
-        'message': 'You do not have permission to access this resource.'
-    }), 403
+        # Log the full error details as one record
+        _log_exception(app, "Internal server error", error)
 
+        # Try to rollback any pending database transactions
+        try:
+            db.session.rollback()
+        except Exception as db_error:
+            app.logger.error(f'Failed to rollback database session: {db_error}')
+
+        # Return appropriate response based on environment
+        is_debug = os.getenv("FLASK_ENV") == "development" or app.debug
+
+        response_data = {
+            'error': 'Internal Server Error',
+            'message': 'An unexpected error occurred. Please try again later.',
+            'path': request.path,
+            'method': request.method
+        }
 
-@app.errorhandler(422)
-def unprocessable_entity(error):
-    return jsonify({
-        'error': 'Unprocessable Entity',
-        'message': ('The request was well-formed but was unable to be '
-                    'followed due to semantic errors.')
-    }), 422
+        # Add debug information in development
+        if is_debug:
+            response_data['debug'] = {
+                'error_type': type(error).__name__,
+                'error_message': str(error),
+                'traceback': traceback.format_exc().split('\n')
+            }
 
+        return jsonify(response_data), 500
 
-@app.errorhandler(429)
-def too_many_requests(error):
-    return jsonify({
-        'error': 'Too Many Requests',
-        'message': 'Rate limit exceeded. Please try again later.'
-    }), 429
+    @app.errorhandler(503)
+    def service_unavailable(error):
+        return jsonify({
+            'error': 'Service Unavailable',
+            'message': 'The service is temporarily unavailable. Please try again later.'
+        }), 503
+
+    @app.errorhandler(Exception)
+    def handle_exception(error):
+        """Handle any unhandled exceptions"""
+        from werkzeug.exceptions import HTTPException
+
+        # If it's an HTTP exception (like 503), let it pass through
+        if isinstance(error, HTTPException):
+            return error
+
+        # Database unreachable: structured 503 instead of a 500
+        if is_database_unavailable(error):
+            app.logger.warning(f'Database unavailable on {request.method} {request.path}: {error}')
+            try:
+                db.session.rollback()
+            except Exception:
+                pass
+            return unavailable_response(error)
 
+        # Log the exception as one record
+        _log_exception(app, "Unhandled exception", error)
 
+        # Try to rollback any pending database transactions
+        try:
+            db.session.rollback()
+        except Exception as db_error:
+            app.logger.error(f'Failed to rollback database session: {db_error}')
 
+        # Return 500 error
+        return jsonify({
+            'error': 'Internal Server Error',
+            'message': 'An unexpected error occurred. Please try again later.',
+            'path': request.path,
+            'method': request.method
+        }), 500
+
+
+def _log_exception(app, message, error):  # Function: _log_exception
+    """One error record with the request context and the traceback"""
+    original = getattr(error, "original_exception", None) or error
+    g._error_logged = True
+    app.logger.error(
+        f"{message}: {original}",
+        exc_info=(type(original), original, original.__traceback__),
+        extra={"fields": {
+            "error_type": type(original).__name__,
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "args": request.args.to_dict(flat=False),
+        }}
+    )
 
-@app.route("/favicon.ico")
-def favicon():
-    """Handle favicon requests to prevent 404 errors"""
-    from flask import abort
-    # Return 204 No Content for favicon requests
-    return '', 204
 
+def _register_core_routes(app):  # Function: _register_core_routes
+    # ✅ Lightweight health check — no DB calls, no auth
+    # Stays 200 while the database breaker is open: every instance shares the
+    # database, so taking them out of the load balancer would not help
+    @app.route("/health", methods=["GET"])
+    def health():
+        database = db_breaker.status()
+        return jsonify({
+            "status": "ok" if database["state"] == "closed" else "degraded",
+            "database": database
+        }), 200
+
+    @app.route("/favicon.ico")
+    def favicon():
+        """Handle favicon requests to prevent 404 errors"""
+        from flask import abort
+        # Return 204 No Content for favicon requests
+        return '', 204
+
+    @app.route("/")
+    def index() -> Dict[str, Any]:
+        return {
+            "name": "BookVault API",
+            "version": api_version(),
+            "status": "healthy",
+            "description": "A personal book tracking web application API",
+            "endpoints": {
+                "authentication": "/v1/register, /v1/login, /v1/verify",
+                "books": "/v1/books",
+                "notes": "/v1/notes",
+                "profiles": "/v1/profiles",
+                "settings": "/v1/settings",
+                "tasks": "/v1/tasks",
+                "files": "/v1/files",
+                "documentation": "/docs"
+            },
+            "features": [
+                "User authentication with JWT",
+                "Book management with ISBN validation",
+                "Reading progress tracking",
+                "Notes and reviews",
+                "Data import/export",
+                "Social media integration",
+                "Background task processing"
+            ]
+        }
 
-@app.route("/")
-def index() -> Dict[str, Any]:
-    version = "1.4.0"
-    try:
-        file = Path(__file__).resolve().parent.parent / "pyproject.toml"
-        if tomllib and file.exists():
-            with open(file, "rb") as f:
-                version = tomllib.load(f)["tool"]["poetry"]["version"]
-    except Exception as e:
-        app.logger.warning(f"Could not read version: {e}")
-
-    return {
-        "name": "BookVault API",
-        "version": version,
-        "status": "healthy",
-        "description": "A personal book tracking web application API",
-        "endpoints": {
-            "authentication": "/v1/register, /v1/login, /v1/verify",
-            "books": "/v1/books",
-            "notes": "/v1/notes",
-            "profiles": "/v1/profiles",
-            "settings": "/v1/settings",
-            "tasks": "/v1/tasks",
-            "files": "/v1/files",
-            "documentation": "/docs"
-        },
-        "features": [
-            "User authentication with JWT",
-            "Book management with ISBN validation",
-            "Reading progress tracking",
-            "Notes and reviews",
-            "Data import/export",
-            "Social media integration",
-            "Background task processing"
-        ]
-    }
-
-
-@app.route("/v1/csrf-token", methods=["GET"])
-@jwt_required()
-def get_csrf_token():
-    """
-    Generate CSRF token for authenticated users
-    """
-    import secrets
-    token = secrets.token_urlsafe(32)
-    return jsonify({"csrf_token": token}), 200
-
-
-@app.route("/debug/routes")
-def debug_routes():
-    """Debug endpoint to show all registered routes"""
-    if os.getenv("FLASK_ENV") != "production":
-        routes = []
-        for rule in app.url_map.iter_rules():
-            routes.append({
-                "rule": str(rule),
-                "methods": list(rule.methods),
-                "endpoint": rule.endpoint
+    @app.route("/v1/csrf-token", methods=["GET"])
+    @jwt_required()
+    def get_csrf_token():
+        """
+        Generate CSRF token for authenticated users
+        """
+        import secrets
+        token = secrets.token_urlsafe(32)
+        return jsonify({"csrf_token": token}), 200
+
+    @app.route("/debug/routes")
+    def debug_routes():
+        """Debug endpoint to show all registered routes"""
+        if os.getenv("FLASK_ENV") != "production":
+            routes = []
+            for rule in app.url_map.iter_rules():
+                routes.append({
+                    "rule": str(rule),
+                    "methods": list(rule.methods),
+                    "endpoint": rule.endpoint
+                })
+            return jsonify({
+                "total_routes": len(routes),
+                "routes": routes,
+                "app_name": app.name,
+                "debug": app.debug
             })
+        else:
+            return jsonify({"error": "Debug endpoint disabled in production"}), 404
+
+    @app.route("/ping")
+    def ping():
+        """Simple ping endpoint for basic health check"""
         return jsonify({
-            "total_routes": len(routes),
-            "routes": routes,
-            "app_name": app.name,
-            "debug": app.debug
+            "status": "ok",
+            "message": "BookVault API is running",
+            "timestamp": datetime.now().isoformat()
         })
-    else:
-        return jsonify({"error": "Debug endpoint disabled in production"}), 404
-
-
-@app.route("/ping")
-def ping():
-    """Simple ping endpoint for basic health check"""
-    return jsonify({
-        "status": "ok",
-        "message": "BookVault API is running",
-        "timestamp": datetime.now().isoformat()
-    })
 
 # @app.route("/health")
 # def health_check() -> Union[Dict[str, Any], Tuple[Dict[str, Any], int]]:
@@ -531,94 +741,7 @@ def ping():
 #     }), 200
 
 
-
-@app.errorhandler(405)
-def method_not_allowed(error):
-    return jsonify({
-        'error': 'Method Not Allowed',
-        'message': 'The method is not allowed for the requested URL'
-    }), 405
-
-
-@app.errorhandler(500)
-def internal_server_error(error):
-    import traceback
-    
-    # Log the full error details
-    app.logger.error(f'Internal server error: {error}')
-    app.logger.error(f'Request path: {request.path}')
-    app.logger.error(f'Request method: {request.method}')
-    app.logger.error(f'Request args: {request.args}')
-    app.logger.error(f'Traceback: {traceback.format_exc()}')
-    
-    # Try to rollback any pending database transactions
-    try:
-        db.session.rollback()
-    except Exception as db_error:
-        app.logger.error(f'Failed to rollback database session: {db_error}')
-    
-    # Return appropriate response based on environment
-    is_debug = os.getenv("FLASK_ENV") == "development" or app.debug
-    
-    response_data = {
-        'error': 'Internal Server Error',
-        'message': 'An unexpected error occurred. Please try again later.',
-        'path': request.path,
-        'method': request.method
-    }
-    
-    # Add debug information in development
-    if is_debug:
-        response_data['debug'] = {
-            'error_type': type(error).__name__,
-            'error_message': str(error),
-            'traceback': traceback.format_exc().split('\n')
-        }
-    
-    return jsonify(response_data), 500
-
-
-@app.errorhandler(503)
-def service_unavailable(error):
-    return jsonify({
-        'error': 'Service Unavailable',
-        'message': 'The service is temporarily unavailable. Please try again later.'
-    }), 503
-
-
-@app.errorhandler(Exception)
-def handle_exception(error):
-    """Handle any unhandled exceptions"""
-    import traceback
-    from werkzeug.exceptions import HTTPException
-    
-    # If it's an HTTP exception (like 503), let it pass through
-    if isinstance(error, HTTPException):
-        return error
-    
-    # Log the exception
-    app.logger.error(f'Unhandled exception: {error}')
-    app.logger.error(f'Exception type: {type(error).__name__}')
-    app.logger.error(f'Request path: {request.path}')
-    app.logger.error(f'Request method: {request.method}')
-    app.logger.error(f'Full traceback: {traceback.format_exc()}')
-    
-    # Try to rollback any pending database transactions
-    try:
-        db.session.rollback()
-    except Exception as db_error:
-        app.logger.error(f'Failed to rollback database session: {db_error}')
-    
-    # Return 500 error
-    return jsonify({
-        'error': 'Internal Server Error',
-        'message': 'An unexpected error occurred. Please try again later.',
-        'path': request.path,
-        'method': request.method
-    }), 500
-
-
-def initialize_database() -> None:
+def initialize_database(app) -> None:
     try:
         db_url = os.getenv("DATABASE_URL", "")
         if db_url.startswith("postgres://"):
@@ -677,7 +800,7 @@ def initialize_database() -> None:
 
   # Skip database initialization during import to avoid Gunicorn worker issues
   # Database will be initialized by Flask-Migrate during deployment
-def init_database_if_needed():
+def init_database_if_needed(app):
     """Initialize database only when explicitly called"""
     if os.getenv("DATABASE_URL") and not os.getenv("SKIP_DB_INIT"):
         prod = (os.getenv("RENDER") == "true" or
@@ -687,7 +810,7 @@ def init_database_if_needed():
         while attempts < max_retries:
             try:
                 with app.app_context():
-                    initialize_database()
+                    initialize_database(app)
                     app.logger.info(
                         "Database initialization completed successfully"
                     )
@@ -719,7 +842,7 @@ def init_database_if_needed():
     return True
 
 # Startup health check
-def startup_health_check():
+def startup_health_check(app):
     """Perform startup health checks"""
     try:
         with app.app_context():
@@ -751,8 +874,9 @@ def startup_health_check():
 
 # Only run database initialization when script is run directly, not during import
 if __name__ == "__main__":
-    init_database_if_needed()
-    startup_health_check()
+    app = create_app()
+    init_database_if_needed(app)
+    startup_health_check(app)
 
 
 if __name__ == '__main__':
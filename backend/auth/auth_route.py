@@ -3,7 +3,7 @@ from flask_jwt_extended import (create_access_token, create_refresh_token,  # Fl
                                 jwt_required, get_jwt_identity, get_jwt)
 from auth.models import RevokedTokenModel
 from models import User, UserSchema, Verification
-from db import db
+from db import db, transactional
 from typing import Dict, Any, Union
 import random
 import string
@@ -11,6 +11,7 @@ from datetime import datetime, timedelta  # Date and time handling
 import os  # Operating system interface
 from auth.decorators import disable_route
 from rate_limiter import rate_limit
+from circuit_breaker import is_database_unavailable, unavailable_response
 import logging  # Application logging
 import re
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -54,6 +55,7 @@ def validate_password_strength(password):  # Function: validate_password_strengt
     os.environ.get("AUTH_ALLOW_REGISTRATION", True)
 ))
 @rate_limit(max_requests=3, window_minutes=5)
+@transactional
 def register():  # Function: register
     """
     Register a new user account
@@ -124,11 +126,9 @@ def register():  # Function: register
             string.ascii_uppercase + string.digits, k=8
         ))
 
+  # Flushed only: the id is assigned now, the commit happens once at the end
         new_user.save_to_db()
-        user_obj = User.find_by_email(email)
-        
-        if not user_obj:  # Conditional statement
-            raise Exception("Failed to retrieve created user")
+        user_obj = new_user
 
   # Create verification record
         require_verification = str_to_bool(
@@ -171,9 +171,7 @@ def register():  # Function: register
         return jsonify(json_output), 201
 
     except Exception as error:  # Exception handler
-        import traceback
-        logger.error(f"Registration error: {error}")
-        logger.error(f"Registration traceback: {traceback.format_exc()}")
+        logger.exception(f"Registration error: {error}")
         
         # Rollback any partial database changes
         try:
@@ -182,15 +180,8 @@ def register():  # Function: register
             logger.error(f"Failed to rollback session: {rollback_error}")
         
         # Check if it's a database connection error
-        error_str = str(error).lower()
-        if any(db_error in error_str for db_error in [
-            'connection refused', 'connection to server', 'database', 
-            'psycopg2', 'sqlalchemy', 'operational error'
-        ]):
-            return jsonify({
-                'message': 'Database service is currently unavailable. Please try again later.',
-                'error_type': 'database_connection_error'
-            }), 503
+        if is_database_unavailable(error):
+            return unavailable_response(error)
         
         # For other errors, return generic 500
         return jsonify({
@@ -200,6 +191,7 @@ def register():  # Function: register
 
 
 @auth_endpoint.route("/v1/verify", methods=["POST"])
+@transactional
 def verify():  # Function: verify
     """
     Verify user account with verification code
@@ -262,9 +254,7 @@ def verify():  # Function: verify
         return jsonify({'message': 'Account verified successfully'}), 200
 
     except Exception as e:  # Exception handler
-        import traceback
-        logger.error(f"Verification error: {e}")
-        logger.error(f"Verification traceback: {traceback.format_exc()}")
+        logger.exception(f"Verification error: {e}")
         
         # Rollback any partial database changes
         try:
@@ -273,15 +263,8 @@ def verify():  # Function: verify
             logger.error(f"Failed to rollback session: {rollback_error}")
         
         # Check if it's a database connection error
-        error_str = str(e).lower()
-        if any(db_error in error_str for db_error in [
-            'connection refused', 'connection to server', 'database', 
-            'psycopg2', 'sqlalchemy', 'operational error'
-        ]):
-            return jsonify({
-                'message': 'Database service is currently unavailable. Please try again later.',
-                'error_type': 'database_connection_error'
-            }), 503
+        if is_database_unavailable(e):
+            return unavailable_response(e)
         
         # For other errors, return generic 500
         return jsonify({
@@ -380,20 +363,11 @@ def login():  # Function: login
         return jsonify(json_output), 200
 
     except Exception as e:  # Exception handler
-        import traceback
-        logger.error(f"Login error: {e}")
-        logger.error(f"Login traceback: {traceback.format_exc()}")
+        logger.exception(f"Login error: {e}")
         
         # Check if it's a database connection error
-        error_str = str(e).lower()
-        if any(db_error in error_str for db_error in [
-            'connection refused', 'connection to server', 'database', 
-            'psycopg2', 'sqlalchemy', 'operational error'
-        ]):
-            return jsonify({
-                'message': 'Database service is currently unavailable. Please try again later.',
-                'error_type': 'database_connection_error'
-            }), 503
+        if is_database_unavailable(e):
+            return unavailable_response(e)
         
         # For other errors, return generic 500
         return jsonify({
@@ -443,6 +417,7 @@ def token_refresh():  # Function: token_refresh
 
 @auth_endpoint.route('/v1/token/logout/access', methods=['POST'])
 @jwt_required()  # Requires valid JWT token for access
+@transactional
 def user_logout_access():  # Function: user_logout_access
     """
     Revoke access token (logout from current session)
@@ -464,6 +439,7 @@ def user_logout_access():  # Function: user_logout_access
 
 @auth_endpoint.route('/v1/token/logout/refresh', methods=['POST'])
 @jwt_required(refresh=True)  # JWT token manager
+@transactional
 def user_logout_refresh():  # Function: user_logout_refresh
     """
     Revoke refresh token (logout from all sessions)
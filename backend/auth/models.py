@@ -2,7 +2,7 @@
 Authentication models for BookVault application
 """
 from typing import Optional
-from db import db
+from db import db, commit_session
 
 
 class RevokedTokenModel(db.Model):  # Database model for revokedtoken data
@@ -20,7 +20,7 @@ class RevokedTokenModel(db.Model):  # Database model for revokedtoken data
     def add(self):
         """Add token to blacklist"""
         db.session.add(self)
-        db.session.commit()
+        commit_session()
 
     @classmethod  # Decorator: classmethod
     def is_jti_blacklisted(cls, jti: str) -> bool:  # Function: is_jti_blacklisted
@@ -0,0 +1,172 @@
+"""
+Command-line entry point: python -m benchmarks --help (run from backend/)
+"""
+import argparse
+import json
+import logging  # Application logging
+import os  # Operating system interface
+import sys
+import tempfile
+from datetime import datetime  # Date and time handling
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_RESULTS_DIR = BENCH_DIR / "results"
+
+
+def parse_args(argv=None):  # Function: parse_args
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Load-test the BookVault API with the React client's call mix."
+    )
+    parser.add_argument("--database-url",
+                        help="database to benchmark (default: SQLite in a temp dir)")
+    parser.add_argument("--url",
+                        help="benchmark an already running server (e.g. gunicorn) "
+                             "instead of the built-in one; it must use the same "
+                             "database and AUTH_SECRET_KEY")
+    parser.add_argument("--clients", type=int, default=8,
+                        help="concurrent clients (default: 8)")
+    parser.add_argument("--duration", type=float, default=30,
+                        help="measured seconds (default: 30)")
+    parser.add_argument("--warmup", type=float, default=3,
+                        help="unmeasured warm-up seconds (default: 3)")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--books-per-user", type=int, default=200)
+    parser.add_argument("--notes-per-book", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42,
+                        help="random seed for data and call sequence (default: 42)")
+    parser.add_argument("--output",
+                        help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE),
+                        help="baseline to compare against (default: benchmarks/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed p95/throughput change before a regression "
+                             "is reported (default: 0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def boot(database_url, work_dir):  # Function: boot
+    """Import the real app against the benchmark database"""
+  # Exports and the slow-query log write relative to the working directory;
+  # keep them out of the source tree
+    sys.path.insert(0, str(BENCH_DIR.parent))
+    os.chdir(work_dir)
+  # Config reads the environment at import time, so set it first
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("FLASK_ENV", "benchmark")
+    from app import app
+    from db import db
+
+    logging.getLogger().setLevel(logging.WARNING)
+    app.logger.setLevel(logging.WARNING)
+    logging.getLogger("bookvault.timing").setLevel(logging.ERROR)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def main(argv=None):  # Function: main
+    args = parse_args(argv)
+    work_dir = tempfile.TemporaryDirectory(prefix="bookvault-bench-")
+    database_url = (args.database_url
+                    or f"sqlite:///{work_dir.name}/bench.db")
+    if args.output:  # Conditional statement
+        args.output = os.path.abspath(args.output)
+    args.baseline = os.path.abspath(args.baseline)
+
+    app = boot(database_url, work_dir.name)
+    from flask_jwt_extended import create_access_token
+    from benchmarks import dataset, runner
+
+    with app.app_context():
+        print(f"Seeding {args.users} users x ~{args.books_per_user} books ...")
+        users = dataset.seed(args.users, args.books_per_user,
+                             args.notes_per_book, args.seed)
+        tokens = [create_access_token(
+            identity=user["email"],
+            additional_claims={"role": "user", "id": user["id"]}
+        ) for user in users]
+
+    server = None
+    base_url = args.url
+    if not base_url:  # Conditional statement
+        server, base_url = runner.serve(app)
+
+    try:  # Exception handling block
+        if args.warmup > 0:  # Conditional statement
+            runner.drive(base_url, users, tokens, args.clients, args.warmup,
+                         args.seed + 1)
+        print(f"Running {args.clients} clients for {args.duration:.0f}s "
+              f"against {base_url} ...")
+        samples, elapsed = runner.drive(base_url, users, tokens, args.clients,
+                                        args.duration, args.seed)
+    finally:
+        if server is not None:  # Conditional statement
+            server.shutdown()
+
+    results = runner.summarize(samples, elapsed)
+    results["meta"] = {
+        "recorded_at": datetime.utcnow().isoformat() + "Z",
+        "database": database_url.split("://", 1)[0],
+        "server": "external" if args.url else "werkzeug",
+        "clients": args.clients,
+        "duration_seconds": round(elapsed, 2),
+        "users": args.users,
+        "books_per_user": args.books_per_user,
+        "notes_per_book": args.notes_per_book,
+        "seed": args.seed,
+    }
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:  # Conditional statement
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        different = [
+            key for key in ("database", "server", "clients", "users",
+                            "books_per_user", "notes_per_book", "seed")
+            if baseline.get("meta", {}).get(key) != results["meta"][key]
+        ]
+        if different:  # Conditional statement
+            print(f"⚠️ Baseline was recorded with different settings "
+                  f"({', '.join(different)}); comparison may be misleading.")
+
+    print()
+    print(runner.format_table(results, baseline))
+    print()
+
+    output = Path(args.output) if args.output else (
+        DEFAULT_RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%SZ}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+    if args.save_baseline:  # Conditional statement
+        Path(args.baseline).write_text(json.dumps(results, indent=2),
+                                       encoding="utf-8")
+        print(f"Baseline saved to {args.baseline}")
+
+    status = 0
+    if results["overall"] is None or results["overall"]["errors"]:  # Conditional statement
+        print("⚠️ Some requests failed; see the err column.")
+    if baseline:  # Conditional statement
+        regressions = runner.compare(results, baseline, args.tolerance)
+        if regressions:  # Conditional statement
+            print(f"❌ {len(regressions)} regression(s) beyond "
+                  f"{args.tolerance:.0%} of the baseline:")
+            for regression in regressions:  # Loop iteration
+                print(f"  - {regression}")
+            status = 1
+        else:  # Default case
+            print(f"✅ No regressions beyond {args.tolerance:.0%} of the baseline.")
+
+    work_dir.cleanup()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
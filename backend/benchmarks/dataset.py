@@ -0,0 +1,80 @@
+"""
+Deterministic benchmark dataset
+
+The data itself comes from the `flask seed` generator (commands/seed.py);
+this module only makes seeding idempotent and collects the ids the
+scenarios pick from.
+"""
+from sqlalchemy import select  # Database ORM components
+
+from commands.seed import seed_database
+from db import db
+from models import Books, Notes, User
+from sharding import shard_router
+
+
+def _email(seed, n):  # Function: _email
+    return f"bench{seed}-{n}@example.com"
+
+
+def seed(users=20, books_per_user=200, notes_per_book=2, seed=42):  # Function: seed
+    """
+    Create benchmark users and their libraries (inside an app context).
+
+    Seeding is idempotent: when the users for this seed already exist their
+    data is reused, so a PostgreSQL database only has to be filled once.
+
+    Returns one dict per user with the ids the scenarios need:
+    {"id", "email", "books": [(id, isbn, total_pages)], "notes": [ids]}
+    """
+    emails = [_email(seed, n) for n in range(users)]
+    existing = _user_ids(emails)
+    if len(existing) < users:  # Conditional statement
+        if existing:  # Conditional statement
+            raise RuntimeError(
+                f"Found {len(existing)} of {users} benchmark users for seed "
+                f"{seed}; use a fresh database or a different --seed"
+            )
+        seed_database(users, books_per_user, notes_per_book, seed=seed,
+                      email_prefix=f"bench{seed}")
+        existing = _user_ids(emails)
+    return _load(existing)
+
+
+def _user_ids(emails):  # Function: _user_ids
+    rows = db.session.execute(
+        select(User.id, User.email).where(User.email.in_(emails))
+    ).all()
+    return {row.id: row.email for row in rows}
+
+
+def _load(users):  # Function: _load
+    """Collect the ids the scenarios need for the given {id: email} users"""
+    user_ids = sorted(users)
+    by_user = {user_id: {
+        "id": user_id,
+        "email": users[user_id],
+        "books": [],
+        "notes": [],
+    } for user_id in user_ids}
+
+  # Once per shard when the per-user tables are sharded
+    for _ in shard_router.each_shard():  # Loop iteration
+        books = db.session.execute(
+            select(Books.id, Books.owner_id, Books.isbn, Books.total_pages)
+            .where(Books.owner_id.in_(user_ids))
+            .order_by(Books.id)
+        ).all()
+        for book in books:  # Loop iteration
+            by_user[book.owner_id]["books"].append(
+                (book.id, book.isbn, book.total_pages)
+            )
+
+        notes = db.session.execute(
+            select(Notes.id, Notes.owner_id)
+            .where(Notes.owner_id.in_(user_ids))
+            .order_by(Notes.id)
+        ).all()
+        for note in notes:  # Loop iteration
+            by_user[note.owner_id]["notes"].append(note.id)
+    return [by_user[user_id] for user_id in user_ids]
@@ -0,0 +1,189 @@
+"""
+Load generator, statistics and baseline comparison
+
+Every client is a thread with its own keep-alive HTTP connection, its own
+user and its own seeded random generator, so the sequence of requests is
+reproducible for a given --seed (timing, of course, is not).
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.scenarios import OPERATIONS
+
+  # Endpoints with fewer samples than this are too noisy to compare
+MIN_SAMPLES_TO_COMPARE = 30
+
+
+def serve(app):  # Function: serve
+    """Start the app on a free localhost port in a daemon thread"""
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(
+        target=server.serve_forever, name="benchmark-server", daemon=True
+    ).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+class Client(threading.Thread):
+    """One simulated browser session issuing the weighted call mix"""
+
+    def __init__(self, base_url, user, token, seed, stop_at, samples):  # Special method: __init__
+        super().__init__(name=f"benchmark-client-{user['id']}", daemon=True)
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.user = user
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        self.rng = random.Random(seed)
+        self.stop_at = stop_at
+        self.samples = samples  # list of (operation, seconds, status)
+        self.weights = [op.weight for op in OPERATIONS]
+
+    def run(self):  # Function: run
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        while time.perf_counter() < self.stop_at:  # Loop iteration
+            op = self.rng.choices(OPERATIONS, self.weights)[0]
+            method, path, body = op.build(self.user, self.rng)
+            payload = json.dumps(body) if body is not None else None
+            start = time.perf_counter()
+            try:  # Exception handling block
+                conn.request(method, path, body=payload, headers=self.headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):  # Exception handler
+                conn.close()
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+                status = 0
+            self.samples.append((op.name, time.perf_counter() - start, status))
+        conn.close()
+
+
+def drive(base_url, users, tokens, clients, duration, seed):  # Function: drive
+    """Run `clients` concurrent sessions for `duration` seconds"""
+    samples = []
+    stop_at = time.perf_counter() + duration
+    threads = [
+        Client(base_url, users[i % len(users)], tokens[i % len(users)],
+               seed * 1000 + i, stop_at, samples)
+        for i in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:  # Loop iteration
+        thread.start()
+    for thread in threads:  # Loop iteration
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+  # -------------------- STATISTICS --------------------
+
+
+def percentile(sorted_values, pct):  # Function: percentile
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:  # Conditional statement
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _latency_stats(latencies, errors, elapsed):  # Function: _latency_stats
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+def summarize(samples, elapsed):  # Function: summarize
+    """Per-operation and overall statistics; 4xx/5xx/connection errors count as errors"""
+    by_op = {}
+    for name, seconds, status in samples:  # Loop iteration
+        by_op.setdefault(name, ([], [0]))
+        by_op[name][0].append(seconds)
+        if status == 0 or status >= 400:  # Conditional statement
+            by_op[name][1][0] += 1
+
+    endpoints = {
+        name: _latency_stats(latencies, errors[0], elapsed)
+        for name, (latencies, errors) in sorted(by_op.items())
+    }
+    overall = _latency_stats(
+        [seconds for _, seconds, _ in samples],
+        sum(stats["errors"] for stats in endpoints.values()),
+        elapsed
+    ) if samples else None
+    return {"overall": overall, "endpoints": endpoints}
+
+
+  # -------------------- BASELINE --------------------
+
+
+def compare(results, baseline, tolerance):  # Function: compare
+    """
+    List regressions against a baseline result file.
+
+    An endpoint regresses when its p95 latency grows, or its throughput
+    drops, by more than `tolerance` (a fraction, e.g. 0.2 for 20%), or
+    when it returns more errors than before.
+    """
+    regressions = []
+    current = dict(results["endpoints"], overall=results["overall"])
+    previous = dict(baseline.get("endpoints", {}),
+                    overall=baseline.get("overall"))
+    for name, stats in sorted(current.items()):  # Loop iteration
+        base = previous.get(name)
+        if not base or not stats:  # Conditional statement
+            continue
+        if min(base["requests"], stats["requests"]) < MIN_SAMPLES_TO_COMPARE:  # Conditional statement
+            continue
+        if stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):  # Conditional statement
+            regressions.append(
+                f"{name}: p95 {base['p95_ms']}ms -> {stats['p95_ms']}ms"
+            )
+        if stats["rps"] < base["rps"] * (1 - tolerance):  # Conditional statement
+            regressions.append(
+                f"{name}: throughput {base['rps']} -> {stats['rps']} req/s"
+            )
+        if stats["errors"] > base["errors"]:  # Conditional statement
+            regressions.append(
+                f"{name}: errors {base['errors']} -> {stats['errors']}"
+            )
+    return regressions
+
+
+def format_table(results, baseline=None):  # Function: format_table
+    """Human-readable table, with the baseline p95 when there is one"""
+    previous = (baseline or {}).get("endpoints", {})
+    header = (f"{'endpoint':<28} {'reqs':>7} {'err':>5} {'req/s':>8} "
+              f"{'p50':>8} {'p95':>8} {'p99':>8}")
+    if baseline:  # Conditional statement
+        header += f" {'base p95':>9}"
+    lines = [header, "-" * len(header)]
+    rows = list(results["endpoints"].items())
+    if results["overall"]:  # Conditional statement
+        rows.append(("overall", results["overall"]))
+        previous = dict(previous, overall=(baseline or {}).get("overall"))
+    for name, stats in rows:  # Loop iteration
+        line = (f"{name:<28} {stats['requests']:>7} {stats['errors']:>5} "
+                f"{stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+                f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+        if baseline:  # Conditional statement
+            base = previous.get(name)
+            line += f" {base['p95_ms']:>9.1f}" if base else f" {'-':>9}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,92 @@
+"""
+Call mix of the React client
+
+Each operation picks its arguments from the seeded data of the client's
+user and returns (method, path, json_body). Weights approximate what the
+frontend sends while someone browses and reads: mostly library pages and
+progress PATCHes, some search/stats/notes, and the occasional export.
+"""
+from collections import namedtuple
+from urllib.parse import quote, urlencode
+
+from commands.seed import READING_STATUSES, WORDS
+
+Operation = namedtuple("Operation", ["name", "weight", "build"])
+
+
+def _list_books(user, rng):  # Function: _list_books
+    params = {"limit": 25, "offset": rng.randint(1, max(1, len(user["books"]) // 25))}
+    if rng.random() < 0.3:  # Conditional statement
+        params["status"] = rng.choice(READING_STATUSES)
+    return "GET", f"/v1/books?{urlencode(params)}", None
+
+
+def _stats(user, rng):  # Function: _stats
+    return "GET", "/v1/books/stats", None
+
+
+def _search(user, rng):  # Function: _search
+    params = {"q": rng.choice(WORDS), "limit": 25}
+    return "GET", f"/v1/books/search?{urlencode(params)}", None
+
+
+def _book_by_isbn(user, rng):  # Function: _book_by_isbn
+    _, isbn, _ = rng.choice(user["books"])
+    return "GET", f"/v1/books/{quote(isbn)}", None
+
+
+def _update_progress(user, rng):  # Function: _update_progress
+    book_id, _, total_pages = rng.choice(user["books"])
+    return "PATCH", f"/v1/books/{book_id}", {
+        "current_page": rng.randint(0, total_pages)
+    }
+
+
+def _book_notes(user, rng):  # Function: _book_notes
+    book_id, _, _ = rng.choice(user["books"])
+    return "GET", f"/v1/books/{book_id}/notes", None
+
+
+def _add_note(user, rng):  # Function: _add_note
+    book_id, _, total_pages = rng.choice(user["books"])
+    return "POST", f"/v1/books/{book_id}/notes", {
+        "content": " ".join(rng.choice(WORDS) for _ in range(20)),
+        "quote_page": rng.randint(1, total_pages),
+    }
+
+
+def _edit_note(user, rng):  # Function: _edit_note
+    if not user["notes"]:  # Conditional statement
+        return _book_notes(user, rng)
+    return "PATCH", f"/v1/notes/{rng.choice(user['notes'])}", {
+        "content": " ".join(rng.choice(WORDS) for _ in range(20))
+    }
+
+
+def _profile(user, rng):  # Function: _profile
+    return "GET", "/v1/profiles", None
+
+
+def _settings(user, rng):  # Function: _settings
+    return "GET", "/v1/settings", None
+
+
+def _export(user, rng):  # Function: _export
+    return "POST", "/v1/tasks", {
+        "type": rng.choice(("csv_export", "json_export")), "data": {}
+    }
+
+
+OPERATIONS = (
+    Operation("GET /v1/books", 30, _list_books),
+    Operation("PATCH /v1/books/<id>", 20, _update_progress),
+    Operation("GET /v1/books/stats", 10, _stats),
+    Operation("GET /v1/books/search", 10, _search),
+    Operation("GET /v1/books/<isbn>", 8, _book_by_isbn),
+    Operation("GET /v1/books/<id>/notes", 8, _book_notes),
+    Operation("POST /v1/books/<id>/notes", 4, _add_note),
+    Operation("PATCH /v1/notes/<id>", 3, _edit_note),
+    Operation("GET /v1/profiles", 3, _profile),
+    Operation("GET /v1/settings", 2, _settings),
+    Operation("POST /v1/tasks (export)", 1, _export),
+)
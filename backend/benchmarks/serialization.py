@@ -0,0 +1,227 @@
+"""
+Serialization benchmark
+
+Row serializers: seeds a scratch SQLite database (the `flask seed` data)
+and dumps a page of --books books, one book's notes and a user's files
+both with the marshmallow schemas (ORM instances, as the endpoints did)
+and with the RowSerializers of serializers.py (selected columns), checks
+that the results are equal and prints the per-call times, query included.
+
+JSON encoding: encodes a /v1/books page (BooksSchema dump of --books books, some with
+non-ASCII titles and descriptions) with Flask's DefaultJSONProvider and
+with FastJSONProvider (json_provider.py) and prints the per-call times.
+It also checks that both produce the same bytes, with ensure_ascii on (the
+default) and off (JSON_RAW_UTF8, see json_provider.py). Without orjson
+installed both columns measure the stdlib encoder.
+
+Usage (from backend/):
+    python -m benchmarks.serialization [--books 100] [--iterations 500]
+"""
+import argparse
+import os  # Operating system interface
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta  # Date and time handling
+from decimal import Decimal
+
+  # Titles with characters that ensure_ascii has to escape (BMP and beyond)
+SAMPLE_TITLES = (
+    "The Pragmatic Programmer",
+    "Cien años de soledad",
+    "Привет, мир",
+    "吾輩は猫である",
+    "Emoji 📚 in a title",
+)
+
+
+def build_page(count):  # Function: build_page
+    """The body get_books returns for a page of `count` books"""
+    from models import Books, BooksSchema
+
+    started = datetime(2026, 1, 1, 8, 30)
+    books = [
+        Books(
+            id=index + 1, owner_id=1,
+            title=f"{SAMPLE_TITLES[index % len(SAMPLE_TITLES)]} #{index}",
+            author=f"Author {index % 17}",
+            isbn=f"978{index:010d}",
+            description=("A longer description with \"quotes\", a tab\tand "
+                         "a newline\n. ") * 4 + SAMPLE_TITLES[index % 3],
+            reading_status=("To be read", "Reading", "Read")[index % 3],
+            current_page=index * 3, total_pages=300 + index,
+            rating=Decimal("4.25") if index % 4 else None,
+            created_at=started + timedelta(minutes=index),
+            updated_at=started + timedelta(hours=index, microseconds=index),
+        )
+        for index in range(count)
+    ]
+    return {
+        "items": BooksSchema(many=True).dump(books),
+        "meta": {
+            "page": 1, "per_page": count, "total_items": count * 3,
+            "total_pages": 3, "has_next": True, "has_prev": False, "offset": 0,
+        },
+    }
+
+
+def mixed_values():  # Function: mixed_values
+    """Types the views hand to jsonify unconverted, for the byte check"""
+    return {
+        "at": datetime(2026, 3, 4, 5, 6, 7, 890),
+        "day": date(2026, 3, 4),
+        "rating": Decimal("3.50"),
+        "request_id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "ratio": 0.1, "big": 2 ** 70, "empty": [], "nested": {"b": 1, "a": None},
+        "text": "control \x01\x1f, DEL \x7f, quote \" and slash /",
+    }
+
+
+def timed(call, iterations):  # Function: timed
+    """Median microseconds per call()"""
+    samples = []
+    for _ in range(iterations):  # Loop iteration
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def row_cases(user_id, books):  # Function: row_cases
+    """(name, schema, ORM query, row serializer, row query) per list endpoint"""
+    from db import db
+    from models import Books, BooksSchema, Files, FilesSchema, Notes, NotesSchema
+    from serializers import books_rows, files_rows, notes_rows
+
+    book_id = db.session.query(Notes.book_id).filter(
+        Notes.owner_id == user_id).limit(1).scalar()
+    return (
+        (f"books page ({books})", BooksSchema(many=True),
+         lambda: Books.query.filter(Books.owner_id == user_id).limit(books),
+         books_rows,
+         lambda: Books.query.with_entities(*books_rows.columns)
+         .filter(Books.owner_id == user_id).limit(books)),
+        ("book notes", NotesSchema(many=True),
+         lambda: Notes.query.filter(Notes.book_id == book_id).order_by(Notes.id),
+         notes_rows,
+         lambda: Notes.query.with_entities(*notes_rows.columns)
+         .filter(Notes.book_id == book_id).order_by(Notes.id)),
+        ("files", FilesSchema(many=True),
+         lambda: Files.query.filter_by(owner_id=user_id)
+         .order_by(Files.created_at.desc()),
+         files_rows,
+         lambda: Files.query.with_entities(*files_rows.columns)
+         .filter_by(owner_id=user_id).order_by(Files.created_at.desc())),
+    )
+
+
+def add_files(user_id, count):  # Function: add_files
+    """The seed gives a user 0-3 files; give the files case a full page"""
+    from db import db
+    from models import Files
+
+    started = datetime(2026, 1, 1, 8, 30)
+    db.session.add_all(
+        Files(owner_id=user_id, filename=f"export_{user_id}_{index}.csv",
+              file_type="csv", file_path=f"export_data/export_{user_id}_{index}.csv",
+              file_size=1000 + index, description="CSV export" if index % 2 else None,
+              created_at=started + timedelta(hours=index))
+        for index in range(count)
+    )
+    db.session.commit()
+
+
+def compare_rows(user_id, books, iterations):  # Function: compare_rows
+    """Check and time schema.dump against the row serializers; returns 0 or 1"""
+    from db import db
+
+    def fresh(query):  # Function: fresh
+  # A new session per call, as in a request: nothing cached in the identity map
+        db.session.remove()
+        return query().all()
+
+    status = 0
+    print(f"{'':22}{'marshmallow':>13}{'rows':>11}   (query + dump, dump only)")
+    for name, schema, orm_query, serializer, row_query in row_cases(user_id, books):  # Loop iteration
+        instances, rows = fresh(orm_query), row_query().all()
+        if serializer.dump(rows) != schema.dump(instances):  # Conditional statement
+            print(f"❌ {name}: row serializer output differs from the schema")
+            status = 1
+        timings = (
+            timed(lambda: schema.dump(fresh(orm_query)), iterations),
+            timed(lambda: serializer.dump(fresh(row_query)), iterations),
+            timed(lambda: schema.dump(instances), iterations),
+            timed(lambda: serializer.dump(rows), iterations),
+        )
+        for label, (schema_us, rows_us) in (("", timings[:2]), ("  dump only", timings[2:])):  # Loop iteration
+            print(f"  {(label or name):20}{schema_us:11.1f}us{rows_us:9.1f}us  "
+                  f"({schema_us / rows_us:.1f}x)")
+    db.session.remove()
+    return status
+
+
+def main(argv=None):  # Function: main
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.serialization",
+        description="Compare the stdlib and orjson JSON providers on a books page."
+    )
+    parser.add_argument("--books", type=int, default=100,
+                        help="books on the page (default: 100)")
+    parser.add_argument("--iterations", type=int, default=500,
+                        help="encodings per provider; the median is reported")
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.TemporaryDirectory(prefix="bookvault-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{scratch.name}/bench.db"
+    os.environ.setdefault("EXPORT_FOLDER", os.path.join(scratch.name, "export"))
+    os.environ.setdefault("SWAGGER_ENABLED", "false")
+
+    from flask.json.provider import DefaultJSONProvider
+
+    from app import create_app
+    from benchmarks import dataset
+    from db import db
+    from json_provider import FastJSONProvider, orjson
+
+    app = create_app()
+    app.debug = False
+    status = 0
+    with app.app_context():
+        db.create_all()
+        user = dataset.seed(users=1, books_per_user=args.books, notes_per_book=3)[0]
+        add_files(user["id"], args.books)
+        status = compare_rows(user["id"], args.books, max(1, args.iterations // 5))
+
+        page = build_page(args.books)
+        stdlib = DefaultJSONProvider(app)
+        fast = FastJSONProvider(app)
+
+        for escape in (True, False):  # Loop iteration
+            reference, candidate = DefaultJSONProvider(app), FastJSONProvider(app)
+            reference.ensure_ascii = candidate.ensure_ascii = escape
+            for name, payload in (("books page", page), ("mixed types", mixed_values())):  # Loop iteration
+                expected = reference.response(payload).get_data()
+                if candidate.response(payload).get_data() != expected:  # Conditional statement
+                    print(f"❌ {name} (ensure_ascii={escape}): output differs "
+                          f"from DefaultJSONProvider")
+                    status = 1
+
+        size_kb = len(stdlib.response(page).get_data()) / 1024
+        stdlib_us = timed(lambda: stdlib.response(page), args.iterations)
+        fast_us = timed(lambda: fast.response(page), args.iterations)
+
+    engine = f"orjson {orjson.__version__}" if fast.use_orjson else "stdlib (orjson not installed)"
+    print(f"{args.books} books, {size_kb:.1f} KiB per response, "
+          f"median of {args.iterations} encodings")
+    print(f"  DefaultJSONProvider  {stdlib_us:9.1f}us")
+    print(f"  FastJSONProvider     {fast_us:9.1f}us  ({engine}, "
+          f"{stdlib_us / fast_us:.1f}x)")
+    if status == 0:  # Conditional statement
+        print("✅ Identical output.")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
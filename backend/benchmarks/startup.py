@@ -0,0 +1,123 @@
+"""
+Worker boot budget check
+
+Runs `python -X importtime` on create_app() in a fresh interpreter and
+fails when the total import time exceeds the budget, or when a module that
+must stay lazy (Mastodon, alembic, bleach, flasgger with SWAGGER_ENABLED
+off) is imported at boot.
+
+Usage (from backend/):
+    python -m benchmarks.startup [--budget-ms 900] [--runs 5]
+"""
+import argparse
+import os  # Operating system interface
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+  # Total import time allowed for create_app(), median over --runs
+DEFAULT_BUDGET_MS = 900
+
+  # Modules that must only be imported when the feature is used
+LAZY_MODULES = ("mastodon", "alembic", "flask_migrate", "bleach", "flasgger")
+
+BOOT_SCRIPT = "from app import create_app; create_app()"
+
+
+def measure(swagger_enabled=False):  # Function: measure
+    """
+    Import create_app() once with -X importtime.
+
+    Returns (total_ms, {module: cumulative_ms}, imported_names), where the
+    dict holds the modules imported directly by the boot script or by app.
+    """
+    scratch = tempfile.gettempdir()
+  # create_app() does not connect, so the database does not need to exist
+    env = dict(
+        os.environ,
+        DATABASE_URL=os.environ.get(
+            "DATABASE_URL", f"sqlite:///{scratch}/bookvault-startup.db"
+        ),
+        FLASK_ENV="production",
+        SWAGGER_ENABLED="true" if swagger_enabled else "false",
+        EXPORT_FOLDER=os.path.join(scratch, "bookvault-startup-export"),
+    )
+    env.pop("FLASK_RUN_FROM_CLI", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:  # Conditional statement
+        raise RuntimeError(f"create_app() failed:\n{proc.stderr[-2000:]}")
+
+    total = 0.0
+    direct = {}
+    names = set()
+    for line in proc.stderr.splitlines():  # Loop iteration
+        if not line.startswith("import time:") or "|" not in line:  # Conditional statement
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():  # Conditional statement
+            continue  # the header line
+        module = name.strip()
+        names.add(module)
+  # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:  # Conditional statement
+            total += int(cumulative) / 1000.0
+        if depth <= 1 and module != "app":  # Conditional statement
+            direct[module] = int(cumulative) / 1000.0
+    return total, direct, names
+
+
+def main(argv=None):  # Function: main
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.startup",
+        description="Fail when worker boot (create_app import time) regresses."
+    )
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"import time budget (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--runs", type=int, default=5,
+                        help="interpreters to start; the median is compared")
+    parser.add_argument("--swagger", action="store_true",
+                        help="measure with SWAGGER_ENABLED=true")
+    parser.add_argument("--top", type=int, default=10,
+                        help="heaviest direct imports to list")
+    args = parser.parse_args(argv)
+
+    totals = []
+    direct = names = None
+    for _ in range(args.runs):  # Loop iteration
+        total, direct, names = measure(args.swagger)
+        totals.append(total)
+    median = statistics.median(totals)
+
+    print(f"create_app() import time: median {median:.0f}ms over {args.runs} "
+          f"run(s) (min {min(totals):.0f}ms, max {max(totals):.0f}ms)")
+    print("Heaviest direct imports:")
+    for module, ms in sorted(direct.items(), key=lambda item: -item[1])[:args.top]:  # Loop iteration
+        print(f"  {ms:8.1f}ms  {module}")
+
+    status = 0
+    lazy = [m for m in LAZY_MODULES if not (m == "flasgger" and args.swagger)]
+    eager = sorted(
+        name for name in names if name.split(".")[0] in lazy
+    )
+    if eager:  # Conditional statement
+        roots = sorted({name.split(".")[0] for name in eager})
+        print(f"❌ Imported at boot but should be lazy: {', '.join(roots)}")
+        status = 1
+    if median > args.budget_ms:  # Conditional statement
+        print(f"❌ Over budget: {median:.0f}ms > {args.budget_ms:.0f}ms")
+        status = 1
+    if status == 0:  # Conditional statement
+        print(f"✅ Within budget ({args.budget_ms:.0f}ms).")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Circuit breaker for the primary database
+
+When PostgreSQL is unreachable every request would otherwise wait for
+connect_timeout (10s) on a fresh connection, tying up every gunicorn
+worker for the length of the outage. The breaker wraps the opening of
+new connections on the primary engines (the main engine and the "tasks"
+pool):
+
+- closed: connections are opened normally. DB_BREAKER_FAILURE_THRESHOLD
+  consecutive connection failures open the breaker.
+- open: opening a connection raises DatabaseUnavailable right away; the
+  app answers 503 with Retry-After. A background thread probes the
+  database every DB_BREAKER_RESET_SECONDS.
+- half_open: the probe is running; only the probe may connect. Success
+  closes the breaker, failure opens it again.
+
+Pooled connections are still checked with pool_pre_ping, so a dead server
+invalidates them and the next checkout goes through the breaker. Replicas
+(replicas.py) and shards keep their own error handling.
+
+The state is per process and reported by /health.
+
+Most views catch Exception around their queries and answer 500 "An
+unexpected error occurred", so the DatabaseUnavailable (or connection
+error) never reaches the app's error handlers. The breaker therefore also
+notes the error on the request, and the app's after_request hook replaces
+a 500 from a request that could not reach the database with the 503
+(unavailable_instead_of_500()).
+"""
+import logging  # Application logging
+import threading
+import time
+
+from flask import g, has_request_context, jsonify  # Flask web framework components
+from sqlalchemy import event, exc, text  # Database ORM components
+
+from pool_budget import TASKS_BIND
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class DatabaseUnavailable(RuntimeError):
+    """The circuit breaker is open; the database is not being contacted"""
+
+    def __init__(self, retry_after):  # Special method: __init__
+        super().__init__("Database unavailable (circuit breaker open)")
+        self.retry_after = retry_after
+
+
+class DatabaseCircuitBreaker:
+    """Counts connection failures and fails fast while the database is down"""
+
+    def __init__(self, app=None):  # Special method: __init__
+        self.enabled = False
+        self.failure_threshold = 5
+        self.reset_seconds = 10.0
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._next_probe = 0.0
+        self._engine = None
+        self._prober = None
+        self._probing = threading.local()
+        self._lock = threading.Lock()
+        if app is not None:  # Conditional statement
+            self.init_app(app)
+
+    def init_app(self, app):  # Function: init_app
+        """Wrap connection opening on the primary engines"""
+        from db import db
+
+        self.enabled = app.config.get("DB_BREAKER_ENABLED", True)
+        self.failure_threshold = max(
+            1, int(app.config.get("DB_BREAKER_FAILURE_THRESHOLD", 5))
+        )
+        self.reset_seconds = float(app.config.get("DB_BREAKER_RESET_SECONDS", 10))
+        app.extensions["db_circuit_breaker"] = self
+
+        @app.errorhandler(DatabaseUnavailable)
+        def database_unavailable(error):  # Function: database_unavailable
+            return unavailable_response(error)
+
+        if not self.enabled:  # Conditional statement
+            return
+        with app.app_context():
+            self._engine = db.engine
+            engines = [db.engine]
+            if TASKS_BIND in db.engines:  # Conditional statement
+                engines.append(db.engines[TASKS_BIND])
+        for engine in engines:  # Loop iteration
+  # do_connect is a dialect event; both engines share the primary's URL
+            if not event.contains(engine, "do_connect", self._connect):  # Conditional statement
+                event.listen(engine, "do_connect", self._connect)
+
+    def _connect(self, dialect, conn_rec, cargs, cparams):  # Function: _connect
+        """do_connect hook: open the DBAPI connection unless the breaker is open"""
+        probing = getattr(self._probing, "active", False)
+        if self.state != CLOSED and not probing:  # Conditional statement
+            self._ensure_prober()
+            error = DatabaseUnavailable(self.retry_after())
+            _note_unavailable(error)
+            raise error
+        try:  # Exception handling block
+            connection = dialect.connect(*cargs, **cparams)
+        except Exception as e:  # Exception handler
+            if not probing:  # Conditional statement
+                self.record_failure(e)
+                _note_unavailable(e)
+            raise
+        if not probing:  # Conditional statement
+            self.record_success()
+        return connection
+
+    def record_failure(self, error):  # Function: record_failure
+        with self._lock:
+            self.failures += 1
+            self.last_error = _describe(error)
+            if self.state == CLOSED and self.failures >= self.failure_threshold:  # Conditional statement
+                self._open()
+
+    def record_success(self):  # Function: record_success
+        if self.failures:  # Conditional statement
+            with self._lock:
+                self.failures = 0
+
+    def _open(self):  # Function: _open
+        """Called with the lock held"""
+        self.state = OPEN
+        self.opened_at = time.time()
+        self._next_probe = time.monotonic() + self.reset_seconds
+        logger.error(
+            "Database circuit breaker opened after %d connection failure(s): %s",
+            self.failures, self.last_error
+        )
+        self._start_prober()
+
+    def _start_prober(self):  # Function: _start_prober
+        """Called with the lock held"""
+        if self._prober is not None and self._prober.is_alive():  # Conditional statement
+            return
+        self._prober = threading.Thread(
+            target=self._probe_loop, name="db-breaker-probe", daemon=True
+        )
+        self._prober.start()
+
+    def _ensure_prober(self):  # Function: _ensure_prober
+  # A gunicorn worker forked while the breaker was open has no probe thread
+        if self._prober is None or not self._prober.is_alive():  # Conditional statement
+            with self._lock:
+                if self.state != CLOSED:  # Conditional statement
+                    self._start_prober()
+
+    def _probe_loop(self):  # Function: _probe_loop
+        while True:  # Loop iteration
+            time.sleep(max(0.0, self._next_probe - time.monotonic()))
+            with self._lock:
+                self.state = HALF_OPEN
+            healthy = self.probe()
+            with self._lock:
+                if healthy:  # Conditional statement
+                    outage = time.time() - (self.opened_at or time.time())
+                    self.state = CLOSED
+                    self.failures = 0
+                    self.opened_at = None
+                    logger.warning(
+                        "Database circuit breaker closed after %.0fs", outage
+                    )
+                    return
+                self.state = OPEN
+                self._next_probe = time.monotonic() + self.reset_seconds
+
+    def probe(self):  # Function: probe
+        """SELECT 1 on the primary, bypassing the open breaker"""
+        self._probing.active = True
+        try:  # Exception handling block
+            with self._engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:  # Exception handler
+            self.last_error = _describe(e)
+            logger.info("Database probe failed: %s", self.last_error)
+            return False
+        finally:
+            self._probing.active = False
+
+    def retry_after(self):  # Function: retry_after
+        """Whole seconds until the next probe (at least 1)"""
+        return max(1, int(self._next_probe - time.monotonic() + 0.999))
+
+    def status(self):  # Function: status
+        """Breaker state for /health"""
+        status = {"state": self.state, "failures": self.failures}
+        if self.state != CLOSED:  # Conditional statement
+            status["retry_after"] = self.retry_after()
+            status["open_seconds"] = round(time.time() - (self.opened_at or time.time()), 1)
+            status["last_error"] = self.last_error
+        return status
+
+
+def unavailable_instead_of_500(response):  # Function: unavailable_instead_of_500
+    """
+    The 503 for a 500 response of a request that could not reach the
+    database (a view's own `except Exception` hid the error); otherwise
+    the response unchanged.
+    """
+    error = g.get("_db_unavailable")
+    if error is not None and response.status_code == 500:  # Conditional statement
+        return unavailable_response(error)
+    return response
+
+
+def _note_unavailable(error):  # Function: _note_unavailable
+    """Remember on the request that the database could not be reached"""
+    if has_request_context():  # Conditional statement
+        g._db_unavailable = error
+
+
+def _describe(error):  # Function: _describe
+    lines = str(error).splitlines()
+    return f"{type(error).__name__}: {lines[0] if lines else ''}"[:200]
+
+
+def is_database_unavailable(error):  # Function: is_database_unavailable
+    """
+    True for errors that mean the database cannot be reached: an open
+    breaker, a failed connection attempt or a dropped connection.
+    """
+    if isinstance(error, DatabaseUnavailable):  # Conditional statement
+        return True
+    if isinstance(error, exc.DBAPIError):  # Conditional statement
+  # Errors raised while connecting carry no statement
+        return error.connection_invalidated or error.statement is None or \
+            isinstance(error, exc.InterfaceError)
+    return isinstance(error, exc.DisconnectionError)
+
+
+def unavailable_response(error=None):  # Function: unavailable_response
+    """Structured 503 for an unreachable database, with Retry-After"""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:  # Conditional statement
+        retry_after = db_breaker.retry_after() if db_breaker.state != CLOSED \
+            else max(1, int(db_breaker.reset_seconds))
+    response = jsonify({
+        'message': 'Database service is currently unavailable. Please try again later.',
+        'error_type': 'database_connection_error',
+        'retry_after': retry_after
+    })
+    response.status_code = 503
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+db_breaker = DatabaseCircuitBreaker()
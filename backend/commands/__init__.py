@@ -7,11 +7,18 @@ Available commands:
 - flask tasks queue - List all pending tasks
 - flask tasks clear - Clear all pending tasks
 - flask db-check - Check database connection
+- flask db slow-queries - Report statements caught by the slow-query log
+- flask seed --users N --books-per-user M - Generate synthetic data
+- flask shards init|status|move|adopt|rebalance|prune - Manage shards
+- flask memory status|start|stop|snapshot|show - Memory diagnostics of a running worker
 """
 
 from .user import user_command
 from .tasks import tasks_command
 from .db_check import db_check_command
+from .seed import seed_command
+from .shards import shards_command
+from .memory import memory_command
 
 
 def register_cli_commands(app):  # Function: register_cli_commands
@@ -21,3 +28,6 @@ def register_cli_commands(app):  # Function: register_cli_commands
     app.cli.add_command(user_command)
     app.cli.add_command(tasks_command)
     app.cli.add_command(db_check_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(shards_command)
+    app.cli.add_command(memory_command)
@@ -0,0 +1,181 @@
+"""
+Memory diagnostics of a running server (see memory_diagnostics.py)
+
+Usage:
+    flask memory status                       RSS, GC counts, structure sizes
+    flask memory start [--frames N]           start tracemalloc
+    flask memory snapshot [--compare-to ID]   take a snapshot (and diff it)
+    flask memory show ID [--compare-to ID]    top sites of a snapshot, or a diff
+    flask memory stop                         stop tracemalloc, drop snapshots
+
+The commands call the admin endpoints of the server at --url (default
+http://127.0.0.1:$PORT) with a short-lived admin token signed with this
+app's JWT secret. Each call reaches one gunicorn worker; pass --pid (the
+pid printed by the first call) to keep talking to the same worker.
+
+Typical leak hunt:
+    flask memory start
+    flask memory snapshot                 -> id 1, pid 4242
+    ... let traffic run for a while ...
+    flask memory --pid 4242 snapshot --compare-to 1
+    flask memory --pid 4242 stop
+"""
+import json
+import os  # Operating system interface
+import sys
+from datetime import timedelta  # Date and time handling
+
+import click
+from flask.cli import AppGroup  # Flask web framework components
+
+  # Attempts to reach the worker asked for with --pid
+PID_ATTEMPTS = 30
+
+
+@click.group("memory", cls=AppGroup)
+@click.option("--url", default=None,
+              help="Server base URL (default: http://127.0.0.1:$PORT)")
+@click.option("--pid", type=int, default=None,
+              help="Only accept answers from this worker process")
+@click.pass_context
+def memory_command(ctx, url, pid):  # Function: memory_command
+    """Memory diagnostics of a running server worker."""
+    ctx.meta["memory"] = {
+        "url": (url or f"http://127.0.0.1:{os.environ.get('PORT', '5000')}").rstrip("/"),
+        "pid": pid,
+    }
+
+
+def _call(method, path, body=None, params=None):  # Function: _call
+    """Call an admin memory endpoint; exits on errors"""
+    import requests
+    from flask_jwt_extended import create_access_token
+
+    options = click.get_current_context().meta["memory"]
+    token = create_access_token(
+        identity="memory-cli", additional_claims={"id": None, "role": "admin"},
+        expires_delta=timedelta(minutes=5)
+    )
+    params = dict(params or {})
+    if options["pid"] is not None:  # Conditional statement
+        params["pid"] = options["pid"]
+
+    for _ in range(PID_ATTEMPTS if options["pid"] is not None else 1):  # Loop iteration
+        try:  # Exception handling block
+            response = requests.request(
+                method, f"{options['url']}{path}", json=body, params=params,
+                headers={"Authorization": f"Bearer {token}",
+                         "Connection": "close"},
+                timeout=60
+            )
+        except requests.RequestException as e:  # Exception handler
+            print(f"❌ Could not reach {options['url']}: {e}")
+            sys.exit(1)
+        if response.status_code != 409 or "pid" not in params:  # Conditional statement
+            break
+    data = response.json() if response.content else {}
+    if response.status_code >= 400:  # Conditional statement
+        print(f"❌ {response.status_code}: {data.get('message', data)}")
+        sys.exit(1)
+    return data
+
+
+def _print_sites(result):  # Function: _print_sites
+    for entry in result["top"]:  # Loop iteration
+        where = entry["site"][0] if entry["site"] else "?"
+        if "size_diff_kb" in entry:  # Conditional statement
+            print(f"  {entry['size_diff_kb']:+10.1f} KiB {entry['count_diff']:+8d} "
+                  f"blocks  {where}")
+        else:  # Default case
+            print(f"  {entry['size_kb']:10.1f} KiB {entry['count']:8d} blocks  {where}")
+        for frame in entry["site"][1:]:  # Loop iteration
+            print(f"  {'':32}{frame}")
+
+
+def _print_result(result):  # Function: _print_result
+    if "from" in result:  # Conditional statement
+        print(f"Worker {result['pid']}: snapshot {result['to']} vs {result['from']} "
+              f"({result['seconds']}s apart), {result['size_diff_kb']:+.1f} KiB")
+    else:  # Default case
+        print(f"Worker {result['pid']}: snapshot {result['id']}, "
+              f"{result['total_kb']:.1f} KiB traced")
+    _print_sites(result)
+
+
+@memory_command.command("status")  # Decorator: memory_command.command
+@click.option("--json", "as_json", is_flag=True, help="Print the raw report")
+def memory_status(as_json):  # Function: memory_status
+    """RSS, GC generation counts, threads and in-process structure sizes."""
+    report = _call("GET", "/v1/admin/memory")
+    if as_json:  # Conditional statement
+        print(json.dumps(report, indent=2))
+        return
+    memory = report["memory"]
+    gc_state = report["gc"]
+    print(f"Worker {report['pid']}: " + ", ".join(
+        f"{name[:-3]} {value / 1024:.1f} MiB" for name, value in memory.items()
+    ))
+    print(f"  gc counts {gc_state['counts']}, collections "
+          f"{gc_state['collections']}, garbage {gc_state['garbage']}, "
+          f"frozen {gc_state['frozen']}")
+    print(f"  threads {report['threads']['total']}, background tasks "
+          f"{report['threads']['background_tasks']}")
+    for name, value in report["structures"].items():  # Loop iteration
+        print(f"  {name}: {value}")
+    tracing = report["tracemalloc"]
+    if tracing["tracing"]:  # Conditional statement
+        print(f"  tracemalloc on ({tracing['frames']} frames): "
+              f"{tracing['traced_kb'] / 1024:.1f} MiB traced, peak "
+              f"{tracing['peak_kb'] / 1024:.1f} MiB; snapshots "
+              f"{[s['id'] for s in report['snapshots']] or 'none'}")
+    else:  # Default case
+        print("  tracemalloc off")
+
+
+@memory_command.command("start")  # Decorator: memory_command.command
+@click.option("--frames", default=10, show_default=True,
+              help="Traceback depth recorded per allocation")
+def memory_start(frames):  # Function: memory_start
+    """Start tracemalloc in the worker."""
+    result = _call("POST", "/v1/admin/memory/tracemalloc",
+                   {"enabled": True, "frames": frames})
+    state = "started" if result["changed"] else "already running"
+    print(f"✅ tracemalloc {state} in worker {result['pid']}")
+
+
+@memory_command.command("stop")  # Decorator: memory_command.command
+def memory_stop():  # Function: memory_stop
+    """Stop tracemalloc in the worker and drop its snapshots."""
+    result = _call("POST", "/v1/admin/memory/tracemalloc", {"enabled": False})
+    state = "stopped" if result["changed"] else "was not running"
+    print(f"✅ tracemalloc {state} in worker {result['pid']}")
+
+
+@memory_command.command("snapshot")  # Decorator: memory_command.command
+@click.option("--compare-to", type=int, default=None,
+              help="Show what grew since this snapshot")
+@click.option("--limit", default=20, show_default=True)
+@click.option("--key-type", default="lineno", show_default=True,
+              type=click.Choice(["lineno", "filename", "traceback"]))
+def memory_snapshot(compare_to, limit, key_type):  # Function: memory_snapshot
+    """Take a snapshot and show its top allocation sites (or the diff)."""
+    body = {"limit": limit, "key_type": key_type}
+    if compare_to is not None:  # Conditional statement
+        body["compare_to"] = compare_to
+    _print_result(_call("POST", "/v1/admin/memory/snapshots", body))
+
+
+@memory_command.command("show")  # Decorator: memory_command.command
+@click.argument("snapshot_id", type=int)
+@click.option("--compare-to", type=int, default=None,
+              help="Diff SNAPSHOT_ID against this older snapshot")
+@click.option("--limit", default=20, show_default=True)
+@click.option("--key-type", default="lineno", show_default=True,
+              type=click.Choice(["lineno", "filename", "traceback"]))
+def memory_show(snapshot_id, compare_to, limit, key_type):  # Function: memory_show
+    """Top allocation sites of a stored snapshot, or a diff of two."""
+    params = {"limit": limit, "key_type": key_type}
+    if compare_to is not None:  # Conditional statement
+        params["compare_to"] = compare_to
+    _print_result(_call("GET", f"/v1/admin/memory/snapshots/{snapshot_id}",
+                        params=params))
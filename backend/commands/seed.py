@@ -0,0 +1,324 @@
+"""
+Synthetic data generator for scale testing
+
+Usage:
+    flask seed --users 1000 --books-per-user 200 --notes-per-book 2 --tasks --files
+
+Fills users, verification, profiles, user_settings, books and notes (and
+optionally tasks and files) with production-like data:
+- skewed library sizes (Pareto: a few heavy readers, many light ones)
+- long descriptions and the real reading_status values
+- consistent reading progress and ratings for finished books
+
+The same --seed always produces the same data. Rows are written with bulk
+INSERTs in batches of users, each batch committed on its own, so millions
+of books load in minutes and memory stays flat. Text is drawn from pools
+generated once up front, which keeps per-row work to a few random choices.
+"""
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta  # Date and time handling
+
+import click
+from flask.cli import with_appcontext  # Flask web framework components
+from sqlalchemy import insert, select  # Database ORM components
+from werkzeug.security import generate_password_hash
+
+from db import db
+from sharding import shard_router
+from models import (Books, Files, Notes, Profile, Tasks, User, UserSettings,
+                    Verification)
+
+READING_STATUSES = ("To be read", "Currently reading", "Read")
+STATUS_WEIGHTS = (0.45, 0.15, 0.40)
+
+TASK_TYPES = ("csv_export", "json_export", "html_export", "share_book_event")
+TASK_STATUSES = ("success", "failed", "pending")
+TASK_STATUS_WEIGHTS = (0.85, 0.05, 0.10)
+
+SEED_PASSWORD = "seed-password"
+
+  # Timestamps are spread backwards from a fixed point so output is repeatable
+REFERENCE_TIME = datetime(2025, 1, 1)
+
+  # Users generated, inserted and committed together
+USER_BATCH_SIZE = 500
+  # Rows per INSERT statement
+INSERT_BATCH_SIZE = 5000
+
+WORDS = (
+    "library", "chapter", "novel", "story", "history", "journey", "river",
+    "winter", "garden", "empire", "letters", "shadow", "light", "memory",
+    "mountain", "city", "ocean", "silence", "family", "war", "machine",
+    "dream", "island", "season", "secret", "voice", "road", "kingdom",
+    "science", "friendship", "stranger", "fire", "glass", "forest", "night",
+)
+
+
+def _sentence(rng, min_words, max_words):  # Function: _sentence
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng, min_sentences, max_sentences):  # Function: _paragraph
+    return " ".join(
+        _sentence(rng, 8, 25)
+        for _ in range(rng.randint(min_sentences, max_sentences))
+    )
+
+
+class TextPools:
+    """Pre-generated strings that rows pick from"""
+
+    def __init__(self, rng):  # Special method: __init__
+        self.titles = [_sentence(rng, 2, 7).rstrip(".") for _ in range(4096)]
+        self.authors = [
+            f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}"
+            for _ in range(1024)
+        ]
+        self.descriptions = [_paragraph(rng, 3, 20) for _ in range(1024)]
+        self.bios = [_paragraph(rng, 1, 4) for _ in range(256)]
+        self.notes = [_sentence(rng, 5, 60) for _ in range(2048)]
+        self.quotes = [_sentence(rng, 5, 30) for _ in range(512)]
+
+
+def isbn13(digits):  # Function: isbn13
+    """ISBN-13 from its first 12 digits, with the check digit appended"""
+    checksum = sum(int(digit) * (3 if i % 2 else 1)
+                   for i, digit in enumerate(digits))  # Loop iteration
+    return f"{digits}{(10 - checksum % 10) % 10}"
+
+
+def library_sizes(rng, users, books_per_user):  # Function: library_sizes
+    """Pareto-distributed library sizes whose mean is books_per_user"""
+    weights = [rng.paretovariate(1.5) for _ in range(users)]
+    scale = books_per_user * users / sum(weights)
+    return [max(1, round(w * scale)) for w in weights]
+
+
+def _bulk_insert(table, rows, returning=None):  # Function: _bulk_insert
+    if shard_router.enabled and table.info.get("sharded"):  # Conditional statement
+  # Ids come from the cross-shard allocator; rows go to their owner's shard
+        for row, row_id in zip(rows, shard_router.next_ids(table.name, len(rows))):  # Loop iteration
+            row["id"] = row_id
+        by_shard = {}
+        for row in rows:  # Loop iteration
+            by_shard.setdefault(
+                shard_router.shard_for_owner(row["owner_id"]), []
+            ).append(row)
+        returned = []
+        for key, shard_rows in by_shard.items():  # Loop iteration
+            with shard_router.using_shard(key):
+                returned.extend(_bulk_insert_rows(table, shard_rows, returning))
+        return returned
+    return _bulk_insert_rows(table, rows, returning)
+
+
+def _bulk_insert_rows(table, rows, returning=None):  # Function: _bulk_insert_rows
+    returned = []
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):  # Loop iteration
+        chunk = rows[start:start + INSERT_BATCH_SIZE]
+        if returning is None:  # Conditional statement
+            db.session.execute(insert(table), chunk)
+        else:  # Default case
+            returned.extend(db.session.execute(
+                insert(table).returning(*returning), chunk
+            ).all())
+    return returned
+
+
+def seed_database(users, books_per_user, notes_per_book=2, tasks=False,  # Function: seed_database
+                  files=False, seed=42, email_prefix=None, progress=None):
+    """
+    Generate and insert the synthetic dataset (inside an app context).
+
+    Users get emails "<email_prefix>-<n>@example.com" (default prefix:
+    "seed<seed>"). Returns the list of created user ids in order.
+    progress, if given, is called with (users_done, books_done).
+    """
+    rng = random.Random(seed)
+    pools = TextPools(rng)
+    prefix = email_prefix or f"seed{seed}"
+    password = generate_password_hash(SEED_PASSWORD)
+    now = REFERENCE_TIME
+    sizes = library_sizes(rng, users, books_per_user)
+
+    user_ids = []
+    books_done = 0
+    for batch_start in range(0, users, USER_BATCH_SIZE):  # Loop iteration
+        batch = range(batch_start, min(batch_start + USER_BATCH_SIZE, users))
+        created = _bulk_insert(User.__table__, [{
+            "email": f"{prefix}-{n}@example.com",
+            "name": f"Reader {n}",
+            "password": password,
+            "role": "user",
+            "status": "active",
+        } for n in batch], returning=(User.__table__.c.id,
+                                      User.__table__.c.email))
+        ids_by_email = {row.email: row.id for row in created}
+        batch_ids = [ids_by_email[f"{prefix}-{n}@example.com"] for n in batch]
+        user_ids.extend(batch_ids)
+
+        _bulk_insert(Verification.__table__, [
+            {"user_id": user_id, "status": "verified"} for user_id in batch_ids
+        ])
+        _bulk_insert(Profile.__table__, [{
+            "owner_id": user_id,
+            "name": f"Reader {n}",
+            "display_name": f"{prefix}_{n}",
+            "bio": rng.choice(pools.bios),
+            "visibility": rng.choice(("public", "private")),
+            "created_at": now,
+            "updated_at": now,
+        } for n, user_id in zip(batch, batch_ids)])
+        if shard_router.enabled:  # Conditional statement
+  # Release the global database before the id allocator writes to it
+            db.session.commit()
+        _bulk_insert(UserSettings.__table__, [{
+            "owner_id": user_id,
+            "theme": rng.choice(("light", "dark")),
+            "send_book_events": False,  # never call out to Mastodon
+            "created_at": now,
+            "updated_at": now,
+        } for user_id in batch_ids])
+
+        book_rows = []
+        for n, user_id in zip(batch, batch_ids):  # Loop iteration
+            for i in range(sizes[n]):  # Loop iteration
+                status = rng.choices(READING_STATUSES, STATUS_WEIGHTS)[0]
+                total_pages = rng.randint(80, 1200)
+                if status == "Read":  # Conditional statement
+                    current_page = total_pages
+                elif status == "Currently reading":  # Alternative condition
+                    current_page = rng.randint(1, total_pages)
+                else:  # Default case
+                    current_page = 0
+                added = now - timedelta(minutes=rng.randint(0, 3 * 365 * 1440))
+                book_rows.append({
+                    "owner_id": user_id,
+                    "title": rng.choice(pools.titles),
+                    "author": rng.choice(pools.authors),
+                    "isbn": isbn13(f"978{n % 1000:03d}{i % 1000000:06d}"),
+                    "description": rng.choice(pools.descriptions),
+                    "reading_status": status,
+                    "current_page": current_page,
+                    "total_pages": total_pages,
+                    "rating": (round(rng.uniform(1, 5), 2)
+                               if status == "Read" and rng.random() < 0.7
+                               else None),
+                    "created_at": added,
+                    "updated_at": added,
+                })
+        books_table = Books.__table__
+        books = _bulk_insert(books_table, book_rows, returning=(
+            books_table.c.id, books_table.c.owner_id, books_table.c.total_pages
+        ))
+        books_done += len(books)
+
+        if notes_per_book > 0:  # Conditional statement
+            note_rows = []
+            for book in books:  # Loop iteration
+                for _ in range(rng.randint(0, notes_per_book * 2)):  # Loop iteration
+                    note_rows.append({
+                        "owner_id": book.owner_id,
+                        "book_id": book.id,
+                        "note": rng.choice(pools.notes),
+                        "quote": (rng.choice(pools.quotes)
+                                  if rng.random() < 0.3 else None),
+                        "quote_page": rng.randint(1, book.total_pages),
+                        "visibility": "private",
+                        "created_at": now,
+                        "updated_at": now,
+                    })
+            _bulk_insert(Notes.__table__, note_rows)
+
+        if tasks:  # Conditional statement
+            task_rows = []
+            for user_id in batch_ids:  # Loop iteration
+                for _ in range(rng.randint(0, 6)):  # Loop iteration
+                    task_type = rng.choice(TASK_TYPES)
+                    status = rng.choices(TASK_STATUSES, TASK_STATUS_WEIGHTS)[0]
+                    created = now - timedelta(minutes=rng.randint(0, 90 * 1440))
+                    task_rows.append({
+                        "owner_id": user_id,
+                        "task_type": task_type,
+                        "status": status,
+                        "progress": {"success": 100, "failed": 30,
+                                     "pending": 0}[status],
+                        "result": (f"Task {task_type} completed successfully"
+                                   if status == "success" else None),
+                        "error": "Synthetic failure" if status == "failed" else None,
+                        "task_metadata": json.dumps({}),
+                        "created_at": created,
+                        "updated_at": created,
+                    })
+            _bulk_insert(Tasks.__table__, task_rows)
+
+        if files:  # Conditional statement
+            file_rows = []
+            for user_id in batch_ids:  # Loop iteration
+                for _ in range(rng.randint(0, 3)):  # Loop iteration
+                    file_type = rng.choice(("csv", "json", "html"))
+                    suffix = "".join(rng.choice("abcdefghijklmnop") for _ in range(8))
+                    filename = f"export_{user_id}_{suffix}.{file_type}"
+                    file_rows.append({
+                        "owner_id": user_id,
+                        "filename": filename,
+                        "file_type": file_type,
+                        "file_path": f"export_data/{filename}",
+                        "file_size": rng.randint(2_000, 5_000_000),
+                        "description": f"{file_type.upper()} export",
+                        "created_at": now - timedelta(days=rng.randint(0, 90)),
+                    })
+            _bulk_insert(Files.__table__, file_rows)
+
+        db.session.commit()
+        if progress is not None:  # Conditional statement
+            progress(len(user_ids), books_done)
+    return user_ids
+
+
+@click.command("seed")
+@click.option("--users", default=100, show_default=True,
+              help="Number of users to create")
+@click.option("--books-per-user", default=50, show_default=True,
+              help="Mean library size (actual sizes are skewed)")
+@click.option("--notes-per-book", default=1, show_default=True,
+              help="Mean number of notes per book")
+@click.option("--tasks", is_flag=True, help="Also create background task history")
+@click.option("--files", is_flag=True, help="Also create export file records")
+@click.option("--seed", "random_seed", default=42, show_default=True,
+              help="Random seed; the same seed produces the same data")
+@with_appcontext
+def seed_command(users, books_per_user, notes_per_book, tasks, files,  # Function: seed_command
+                 random_seed):
+    """Fill the database with deterministic synthetic data."""
+    prefix = f"seed{random_seed}"
+    exists = db.session.scalar(
+        select(User.id).where(User.email == f"{prefix}-0@example.com")
+    )
+    if exists:
+        print(f"❌ Data for seed {random_seed} already exists; "
+              f"use another --seed or an empty database.")
+        sys.exit(1)
+
+    started = time.perf_counter()
+
+    def report(users_done, books_done):  # Function: report
+        elapsed = time.perf_counter() - started
+        print(f"  {users_done}/{users} users, {books_done} books "
+              f"({books_done / elapsed:,.0f} books/s)")
+
+    print(f"[SEED] {users} users, ~{books_per_user} books/user, "
+          f"~{notes_per_book} notes/book, seed {random_seed}")
+    try:
+        seed_database(users, books_per_user, notes_per_book, tasks, files,
+                      random_seed, progress=report)
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Seeding failed: {e}")
+        sys.exit(1)
+    print(f"✅ Done in {time.perf_counter() - started:.1f}s. "
+          f"Users log in as {prefix}-<n>@example.com / {SEED_PASSWORD}")
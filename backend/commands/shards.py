@@ -0,0 +1,191 @@
+"""
+Shard placement and resharding (see sharding.py)
+
+Usage:
+    flask shards init                   create the sharded tables on every shard
+    flask shards status                 users and rows per shard
+    flask shards move USER_ID SHARD     move one user's rows online
+    flask shards adopt SHARD            pin users found on SHARD to it
+    flask shards rebalance --hash-count N [--dry-run]
+    flask shards prune                  drop directory entries that match the hash
+
+Adding a shard:
+    1. append its URL to SHARD_DATABASE_URLS, keep SHARD_HASH_COUNT at the
+       old count, restart and run `flask shards init`
+    2. flask shards rebalance --hash-count <new count>
+    3. set SHARD_HASH_COUNT to the new count, restart, `flask shards prune`
+
+Moving from one database to shards: list DATABASE_URL itself as the first
+shard, run `flask shards adopt shard_0`, then rebalance.
+"""
+import sys
+
+import click
+from flask.cli import AppGroup  # Flask web framework components
+from sqlalchemy import delete, func, select  # Database ORM components
+
+from db import db
+from models import ShardAssignment, User
+from sharding import create_shard_schema, shard_router, sharded_tables
+
+shards_command = AppGroup('shards')
+
+
+def _require_sharding():  # Function: _require_sharding
+    if not shard_router.enabled:
+        print("❌ Sharding is off; set SHARD_DATABASE_URLS first.")
+        sys.exit(1)
+
+
+def _owners_on(key):  # Function: _owners_on
+    """Owner ids that have rows in any sharded table of a shard"""
+    owners = set()
+    with db.engines[key].connect() as conn:
+        for table in sharded_tables(db.metadata):  # Loop iteration
+            owners.update(conn.execute(
+                select(table.c.owner_id).distinct()
+            ).scalars())
+    return owners
+
+
+@shards_command.command("init")  # Decorator: shards_command.command
+def init_shards():  # Function: init_shards
+    """Create the global tables and the sharded tables on every shard."""
+    _require_sharding()
+    db.create_all()
+    for key in shard_router.keys:  # Loop iteration
+        create_shard_schema(db.engines[key], db.metadata)
+        print(f"✅ {key}: schema ready")
+
+
+@shards_command.command("status")  # Decorator: shards_command.command
+def shard_status():  # Function: shard_status
+    """Show users and rows per shard and the directory entries."""
+    _require_sharding()
+    tables = sharded_tables(db.metadata)
+    print(f"{len(shard_router.keys)} shard(s), hashing over "
+          f"{shard_router.hash_count}")
+    for key in shard_router.keys:  # Loop iteration
+        with db.engines[key].connect() as conn:
+            counts = {
+                table.name: conn.execute(
+                    select(func.count()).select_from(table)
+                ).scalar()
+                for table in tables
+            }
+        users = len(_owners_on(key))
+        print(f"  {key}: {users} user(s), " + ", ".join(
+            f"{name} {count}" for name, count in counts.items()
+        ))
+    entries = db.session.execute(
+        select(ShardAssignment.state, func.count())
+        .group_by(ShardAssignment.state)
+    ).all()
+    print("Directory: " + (", ".join(
+        f"{count} {state}" for state, count in entries
+    ) or "empty (all users on their hash shard)"))
+
+
+@shards_command.command("move")  # Decorator: shards_command.command
+@click.argument("user_id", type=int)
+@click.argument("shard")
+@click.option("--no-wait", is_flag=True,
+              help="Skip waiting for other processes (only when none are running)")
+def move_user(user_id, shard, no_wait):  # Function: move_user
+    """Move all rows of USER_ID to SHARD while the app keeps serving."""
+    _require_sharding()
+    source = shard_router.shard_for_owner(user_id)
+    print(f"[MOVE] user {user_id}: {source} -> {shard}")
+    try:
+        moved = shard_router.move(
+            user_id, shard, wait=not no_wait,
+            progress=lambda table, rows: print(f"  copied {rows} {table}")
+        )
+    except Exception as e:
+        print(f"❌ Move failed, user {user_id} stays on {source}: {e}")
+        sys.exit(1)
+    if not moved:
+        print(f"ℹ️ User {user_id} is already on {shard}.")
+    else:
+        print(f"✅ Moved {sum(moved.values())} row(s).")
+
+
+@shards_command.command("adopt")  # Decorator: shards_command.command
+@click.argument("shard")
+def adopt_shard(shard):  # Function: adopt_shard
+    """Pin every user that has rows on SHARD to it."""
+    _require_sharding()
+    if shard not in shard_router.keys:
+        print(f"❌ Unknown shard {shard}; shards: {', '.join(shard_router.keys)}")
+        sys.exit(1)
+    owners = _owners_on(shard)
+    pinned = 0
+    for owner_id in sorted(owners):  # Loop iteration
+        if shard_router.shard_for_owner(owner_id) != shard:
+            shard_router.set_placement(owner_id, shard)
+            pinned += 1
+    print(f"✅ {len(owners)} user(s) on {shard}, {pinned} pinned to it.")
+
+
+@shards_command.command("rebalance")  # Decorator: shards_command.command
+@click.option("--hash-count", type=int, default=None,
+              help="Shard count to hash over (default: SHARD_HASH_COUNT)")
+@click.option("--dry-run", is_flag=True, help="Only list the moves")
+@click.option("--no-wait", is_flag=True,
+              help="Skip waiting for other processes (only when none are running)")
+def rebalance(hash_count, dry_run, no_wait):  # Function: rebalance
+    """Move every user that is not on its hash shard for --hash-count."""
+    _require_sharding()
+    hash_count = hash_count or shard_router.hash_count
+    if not 0 < hash_count <= len(shard_router.keys):
+        print(f"❌ --hash-count must be between 1 and {len(shard_router.keys)}")
+        sys.exit(1)
+
+    user_ids = db.session.execute(select(User.id).order_by(User.id)).scalars()
+    moves = []
+    for user_id in user_ids:  # Loop iteration
+        current = shard_router.shard_for_owner(user_id)
+        target = shard_router.home_shard(user_id, hash_count)
+        if current != target:
+            moves.append((user_id, current, target))
+    print(f"[REBALANCE] {len(moves)} user(s) to move (hash over {hash_count})")
+
+    failed = 0
+    for user_id, current, target in moves:  # Loop iteration
+        if dry_run:
+            print(f"  user {user_id}: {current} -> {target}")
+            continue
+        try:
+            moved = shard_router.move(user_id, target, wait=not no_wait)
+            print(f"  user {user_id}: {current} -> {target} "
+                  f"({sum(moved.values())} rows)")
+        except Exception as e:
+            failed += 1
+            print(f"  ❌ user {user_id}: {e}")
+    if failed:
+        print(f"❌ {failed} move(s) failed; run rebalance again.")
+        sys.exit(1)
+    if not dry_run:
+        print(f"✅ Done. Set SHARD_HASH_COUNT={hash_count}, restart, then "
+              f"run `flask shards prune`.")
+
+
+@shards_command.command("prune")  # Decorator: shards_command.command
+def prune_directory():  # Function: prune_directory
+    """Delete directory entries that point at the user's hash shard."""
+    _require_sharding()
+    entries = db.session.execute(
+        select(ShardAssignment.owner_id, ShardAssignment.shard)
+        .where(ShardAssignment.state == "active")
+    ).all()
+    redundant = [
+        entry.owner_id for entry in entries
+        if entry.shard == shard_router.home_shard(entry.owner_id)
+    ]
+    if redundant:
+        db.session.execute(delete(ShardAssignment).where(
+            ShardAssignment.owner_id.in_(redundant)
+        ))
+        db.session.commit()
+    shard_router.forget()
+    print(f"✅ Removed {len(redundant)} of {len(entries)} directory entries.")
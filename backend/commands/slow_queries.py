@@ -0,0 +1,81 @@
+"""
+Slow-query report
+
+Usage:
+    flask db slow-queries [--file PATH] [--limit N] [--sort total|max|count]
+
+Summarises the JSON lines written by the slow-query hook (see
+slow_queries.py), grouping identical statements together.
+"""
+import json
+import sys
+import click
+from flask import current_app  # Flask web framework components
+from flask.cli import with_appcontext  # Flask web framework components
+
+
+@click.command("slow-queries")
+@click.option("--file", "log_file", type=click.Path(),
+              help="Slow query log to read (default: SLOW_QUERY_LOG_FILE)")
+@click.option("--limit", default=20, show_default=True,
+              help="Number of statements to show")
+@click.option("--sort", "sort_by", default="total", show_default=True,
+              type=click.Choice(["total", "max", "count"]))
+@click.option("--plans/--no-plans", default=False,
+              help="Print the captured EXPLAIN plan for each statement")
+@with_appcontext
+def slow_queries_command(log_file, limit, sort_by, plans):  # Function: slow_queries_command
+    """Report the slowest SQL statements recorded by the slow-query hook."""
+    log_file = log_file or current_app.config.get("SLOW_QUERY_LOG_FILE")
+    if not log_file:
+        print("❌ No slow query log configured (SLOW_QUERY_LOG_FILE).")
+        sys.exit(1)
+
+    groups = {}
+    try:
+        with open(log_file, encoding="utf-8") as f:
+            for line in f:  # Loop iteration
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                statement = " ".join(entry["statement"].split())
+                group = groups.setdefault(statement, {
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "endpoints": set(), "binds": set(), "plan": None
+                })
+                group["count"] += 1
+                group["total_ms"] += entry["duration_ms"]
+                group["max_ms"] = max(group["max_ms"], entry["duration_ms"])
+                group["endpoints"].add(entry.get("endpoint") or "?")
+                group["binds"].add(entry.get("bind") or "primary")
+                if entry.get("plan"):
+                    group["plan"] = entry["plan"]
+    except FileNotFoundError:
+        print(f"ℹ️ No slow queries recorded yet ({log_file} does not exist).")
+        return
+
+    if not groups:
+        print("ℹ️ No slow queries recorded yet.")
+        return
+
+    sort_keys = {
+        "total": lambda item: item[1]["total_ms"],
+        "max": lambda item: item[1]["max_ms"],
+        "count": lambda item: item[1]["count"],
+    }
+    ranked = sorted(groups.items(), key=sort_keys[sort_by], reverse=True)
+
+    print(f"🐢 SLOW QUERIES: {len(groups)} distinct statement(s) in {log_file}")
+    for statement, group in ranked[:limit]:  # Loop iteration
+        mean_ms = group["total_ms"] / group["count"]
+        print("-" * 72)
+        print(f"count={group['count']}  total={group['total_ms']:.1f}ms  "
+              f"mean={mean_ms:.1f}ms  max={group['max_ms']:.1f}ms")
+        print(f"endpoints: {', '.join(sorted(group['endpoints']))}")
+        print(f"databases: {', '.join(sorted(group['binds']))}")
+        print(statement[:500])
+        if plans and group["plan"]:
+            print("plan:")
+            for plan_line in group["plan"].splitlines():  # Loop iteration
+                print(f"    {plan_line}")
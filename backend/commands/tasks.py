@@ -2,6 +2,7 @@ from flask.cli import AppGroup  # Flask web framework components
 import sys
 from models import Tasks
 from db import db
+from sharding import shard_router, use_owner
 
   # AppGroup for CLI task commands
 tasks_command = AppGroup('tasks')
@@ -13,15 +14,20 @@ def clear_tasks():  # Function: clear_tasks
     print("[CLEAR QUEUED TASKS]")
 
     try:
-        query = Tasks.query.filter(Tasks.status == "pending")
-        task_count = query.count()
+        task_count = sum(
+            Tasks.query.filter(Tasks.status == "pending").count()
+            for _ in shard_router.each_shard()
+        )
 
         if task_count > 0:
             confirmation = input(
                 f"Are you sure you want to clear {task_count} tasks? (y/N) "
             ).strip().lower()
             if confirmation == "y":
-                query.delete(synchronize_session=False)
+                for _ in shard_router.each_shard():  # Loop iteration
+                    Tasks.query.filter(Tasks.status == "pending").delete(
+                        synchronize_session=False
+                    )
                 db.session.commit()
                 print("✅ Tasks cleared successfully.")
                 sys.exit(0)
@@ -42,7 +48,10 @@ def clear_tasks():  # Function: clear_tasks
 def list_tasks():
     """List all pending tasks in the queue."""
     try:  # Exception handling block
-        all_tasks = Tasks.query.filter(Tasks.status == "pending").all()
+        all_tasks = [
+            task for _ in shard_router.each_shard()
+            for task in Tasks.query.filter(Tasks.status == "pending").all()
+        ]
         print(f"🕒 IN QUEUE: {len(all_tasks)} task(s)")
         for task in all_tasks:  # Loop iteration
             print(f"- {task.task_type} (ID: {task.id})")
@@ -57,7 +66,10 @@ def run_tasks():  # Function: run_tasks
     print("[RUNNING QUEUED TASKS]")
     
     try:
-        pending_tasks = Tasks.query.filter(Tasks.status == "pending").all()
+        pending_tasks = [
+            task for _ in shard_router.each_shard()
+            for task in Tasks.query.filter(Tasks.status == "pending").all()
+        ]
         
         if not pending_tasks:
             print("ℹ️ No pending tasks found to run.")
@@ -67,6 +79,7 @@ def run_tasks():  # Function: run_tasks
         
         for task in pending_tasks:
             print(f"📋 Processing task: {task.task_type} (ID: {task.id})")
+            use_owner(task.owner_id)  # commit to the task owner's shard
             
             try:
   # Update task status to running
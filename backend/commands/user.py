@@ -3,6 +3,7 @@ from getpass import getpass
 import sys
 import re
 from models import User, Verification
+from db import unit_of_work
 from flask.cli import AppGroup  # Flask web framework components
 
 user_command = AppGroup('user')
@@ -59,14 +60,15 @@ def create_user(email, name, role, password):  # Function: create_user
     )
 
     try:
-        new_user.save_to_db()
-        new_verification = Verification(
-            user_id=new_user.id,
-            status="verified",
-            code=None,
-            code_valid_until=None
-        )
-        new_verification.save_to_db()
+        with unit_of_work():
+            new_user.save_to_db()
+            new_verification = Verification(
+                user_id=new_user.id,
+                status="verified",
+                code=None,
+                code_valid_until=None
+            )
+            new_verification.save_to_db()
 
         print(
             f"Successfully created a new user:\n\tEmail: {email}\n\t"
@@ -55,6 +55,117 @@ class Config:
     JSON_SORT_KEYS = False
     JSONIFY_PRETTYPRINT_REGULAR = False
 
+  # Write-behind buffer for reading/task progress (opt-in, see write_buffer.py)
+    PROGRESS_BUFFER_ENABLED = (
+        os.environ.get("PROGRESS_BUFFER_ENABLED", "false").lower() == "true"
+    )
+    PROGRESS_BUFFER_FLUSH_SECONDS = float(
+        os.environ.get("PROGRESS_BUFFER_FLUSH_SECONDS", "2")
+    )
+    PROGRESS_BUFFER_MAX_LOSS_SECONDS = float(
+        os.environ.get("PROGRESS_BUFFER_MAX_LOSS_SECONDS", "5")
+    )
+
+  # Read replicas for @replica_reads views (comma separated, see replicas.py)
+    DATABASE_REPLICA_URLS = [
+        url.strip()
+        for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",")
+        if url.strip()
+    ]
+  # Seconds a user's reads stay on the primary after a write
+    REPLICA_PIN_SECONDS = float(os.environ.get("REPLICA_PIN_SECONDS", "5"))
+    REPLICA_CHECK_SECONDS = float(os.environ.get("REPLICA_CHECK_SECONDS", "10"))
+    REPLICA_MAX_LAG_SECONDS = float(
+        os.environ.get("REPLICA_MAX_LAG_SECONDS", "30")
+    )
+
+  # Shards for the per-user tables (comma separated, see sharding.py)
+    SHARD_DATABASE_URLS = [
+        url.strip()
+        for url in os.environ.get("SHARD_DATABASE_URLS", "").split(",")
+        if url.strip()
+    ]
+  # Shards users are hashed over (default: all); raise it after a rebalance
+    SHARD_HASH_COUNT = int(os.environ.get("SHARD_HASH_COUNT", "0")) or None
+  # Seconds a process caches a user's shard placement
+    SHARD_DIRECTORY_TTL = float(os.environ.get("SHARD_DIRECTORY_TTL", "5"))
+
+  # Database circuit breaker (see circuit_breaker.py)
+    DB_BREAKER_ENABLED = (
+        os.environ.get("DB_BREAKER_ENABLED", "true").lower() == "true"
+    )
+  # Consecutive connection failures that open the breaker
+    DB_BREAKER_FAILURE_THRESHOLD = int(
+        os.environ.get("DB_BREAKER_FAILURE_THRESHOLD", "5")
+    )
+  # Seconds between background probes while it is open
+    DB_BREAKER_RESET_SECONDS = float(
+        os.environ.get("DB_BREAKER_RESET_SECONDS", "10")
+    )
+
+  # Log one in N repeated 4xx responses per endpoint and status (see log_queue.py)
+    LOG_4XX_SAMPLE_EVERY = int(os.environ.get(
+        "LOG_4XX_SAMPLE_EVERY",
+        "10" if os.environ.get("FLASK_ENV") == "production"
+        or os.environ.get("RENDER") == "true" else "1"
+    ))
+
+  # On-demand profiling of requests with a signed X-Profile header (see profiling.py)
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+    PROFILE_SAMPLE_INTERVAL_MS = float(
+        os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", "1")
+    )
+    PROFILE_RETENTION_COUNT = int(os.environ.get("PROFILE_RETENTION_COUNT", "100"))
+    PROFILE_RETENTION_HOURS = float(os.environ.get("PROFILE_RETENTION_HOURS", "72"))
+  # Longest lifetime of an X-Profile token, in seconds
+    PROFILE_TOKEN_MAX_AGE = int(os.environ.get("PROFILE_TOKEN_MAX_AGE", "3600"))
+
+  # tracemalloc snapshots kept per worker (see memory_diagnostics.py)
+    MEMORY_SNAPSHOT_LIMIT = int(os.environ.get("MEMORY_SNAPSHOT_LIMIT", "5"))
+
+  # Per-process ISBN membership sets, revalidated per lookup (see isbn_cache.py); 0 disables
+    ISBN_CACHE_TTL = float(os.environ.get("ISBN_CACHE_TTL", "60"))
+    ISBN_CACHE_MAX_USERS = int(os.environ.get("ISBN_CACHE_MAX_USERS", "1000"))
+
+  # Note import files with more rows run as a background task (see note_import.py)
+    NOTES_IMPORT_INLINE_MAX = int(os.environ.get("NOTES_IMPORT_INLINE_MAX", "500"))
+
+  # Encode JSON responses with orjson when it is installed (see json_provider.py)
+    JSON_ORJSON_ENABLED = (
+        os.environ.get("JSON_ORJSON_ENABLED", "true").lower() == "true"
+    )
+  # Send non-ASCII characters as UTF-8 instead of \uXXXX escapes (opt-in)
+    JSON_RAW_UTF8 = os.environ.get("JSON_RAW_UTF8", "false").lower() == "true"
+
+  # Per-request timing (Server-Timing header + structured log line)
+    REQUEST_TIMING_ENABLED = (
+        os.environ.get("REQUEST_TIMING_ENABLED", "true").lower() == "true"
+    )
+  # Requests running more SQL statements than this are flagged as N+1 suspects
+    REQUEST_QUERY_COUNT_THRESHOLD = int(
+        os.environ.get("REQUEST_QUERY_COUNT_THRESHOLD", "25")
+    )
+
+  # Prometheus /metrics (bearer token required when set)
+    METRICS_AUTH_TOKEN = os.environ.get("METRICS_AUTH_TOKEN")
+
+  # Slow-query log (0 disables); see slow_queries.py
+    SLOW_QUERY_THRESHOLD_MS = float(
+        os.environ.get("SLOW_QUERY_THRESHOLD_MS", "200")
+    )
+    SLOW_QUERY_EXPLAIN = (
+        os.environ.get("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+    )
+    SLOW_QUERY_BUFFER_SIZE = int(os.environ.get("SLOW_QUERY_BUFFER_SIZE", "200"))
+    SLOW_QUERY_LOG_FILE = os.environ.get(
+        "SLOW_QUERY_LOG_FILE", "slow_queries.jsonl"
+    )
+
+  # Swagger UI at /docs; disabling it skips importing flasgger at boot
+    SWAGGER_ENABLED = (
+        os.environ.get("SWAGGER_ENABLED", "true").lower() == "true"
+    )
+
   # Swagger/OpenAPI config
     SWAGGER = {
         "openapi": "3.0.0",
@@ -103,36 +214,46 @@ class Config:
         
         logger.info(f"Production mode: {is_production}")
 
-        # Engine options with better error handling
-        self.SQLALCHEMY_ENGINE_OPTIONS = {
-            'pool_pre_ping': True,
-            'pool_recycle': 300 if is_production else 3600,
-            'pool_timeout': 30 if is_production else 20,
-            'pool_size': 10 if is_production else 3,
-            'max_overflow': 15 if is_production else 5,
-            'echo': False,  # Set to True for SQL debugging
-        }
-
-        connect_args = {
-            'connect_timeout': 10,
-            'application_name': 'BookVault',
-            'keepalives': 1,
-            'keepalives_idle': 60,
-            'keepalives_interval': 10,
-            'keepalives_count': 3,
-        }
-
-        if db_url.startswith('postgresql'):  # Conditional statement
-            if is_production:  # Conditional statement
-                connect_args.update({
-                    'sslmode': 'require',
-                    'options': '-c statement_timeout=30000'
-                })
-                logger.info("Added production SSL and timeout settings")
-            else:  # Default case
-                connect_args['sslmode'] = 'prefer'
-                logger.info("Added development SSL settings")
-
-            self.SQLALCHEMY_ENGINE_OPTIONS['connect_args'] = connect_args
-        else:
+        # Pool sizes follow the declared workers/threads and the server's
+        # max_connections; background tasks get their own "tasks" engine
+        from pool_budget import engine_options, uses_pgbouncer
+        (self.SQLALCHEMY_ENGINE_OPTIONS, self.SQLALCHEMY_BINDS,
+         budget) = engine_options(db_url, is_production)
+
+        # Replicas are separate servers with the primary's pool settings
+        replica_urls = [
+            url.replace("postgres://", "postgresql://", 1)
+            for url in self.DATABASE_REPLICA_URLS
+        ]
+        if replica_urls:  # Conditional statement
+            from replicas import replica_binds
+            self.SQLALCHEMY_BINDS.update(
+                replica_binds(replica_urls, self.SQLALCHEMY_ENGINE_OPTIONS)
+            )
+            logger.info(f"Read replicas configured: {len(replica_urls)}")
+
+        # Shards are separate servers with the primary's pool settings
+        shard_urls = [
+            url.replace("postgres://", "postgresql://", 1)
+            for url in self.SHARD_DATABASE_URLS
+        ]
+        if shard_urls:  # Conditional statement
+            from sharding import shard_binds
+            self.SQLALCHEMY_BINDS.update(
+                shard_binds(shard_urls, self.SQLALCHEMY_ENGINE_OPTIONS)
+            )
+            logger.info(f"Shards configured: {len(shard_urls)}")
+
+        if budget is not None:  # Conditional statement
+            logger.info(
+                f"DB pool budget: {budget['processes']} process(es) x "
+                f"(pool {budget['pool_size']} + overflow "
+                f"{budget['max_overflow']} + tasks {budget['task_pool_size']})"
+                f" = {budget['total']} of {budget['max_connections']} "
+                f"connections ({budget['reserved']} reserved)"
+            )
+        elif uses_pgbouncer():  # Alternative condition
+            logger.info("DB_POOLER=pgbouncer: using NullPool")
+
+        if not db_url.startswith('postgresql'):  # Conditional statement
             logger.warning(f"Non-PostgreSQL database URL detected: {db_url[:20]}...")
@@ -2,12 +2,59 @@
 Database connection logic for BookVault
 """
 
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, g, has_app_context  # Flask web framework components
 from flask_sqlalchemy import SQLAlchemy  # Flask web framework components
+from flask_sqlalchemy.session import Session
 from flask_marshmallow import Marshmallow  # Flask web framework components
 
+from pool_budget import TASKS_BIND
+from sharding import routed_engine
+
+
+class RoutingSession(Session):
+    """
+    Session that sends statements on per-user tables to the owner's shard
+    (see sharding.py) and everything else to the engine named by
+    g._db_pool: the "tasks" engine for background task work (see
+    pool_budget.py), or a read replica inside @replica_reads views (see
+    replicas.py). Flushes of global tables always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):  # Function: get_bind
+        if bind is None and has_app_context():  # Conditional statement
+  # Per-user tables live on the owner's shard (sharding.py)
+            engine = routed_engine(self._db, mapper, clause, self._flushing)
+            if engine is not None:  # Conditional statement
+                return engine
+            key = g.get("_db_pool")
+            if key is not None and key in self._db.engines and (
+                    key == TASKS_BIND or not self._flushing):  # Conditional statement
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind,
+                                **kwargs)
+
+
+class RoutedSQLAlchemy(SQLAlchemy):
+    """
+    The extra binds are a second pool to the primary ("tasks"), read-only
+    copies of it (replicas) or shards, which get their tables from
+    `flask shards init`; so schema operations only run against the primary
+    by default.
+    """
+
+    def create_all(self, bind_key=None):  # Function: create_all
+        super().create_all(bind_key=bind_key)
+
+    def drop_all(self, bind_key=None):  # Function: drop_all
+        super().drop_all(bind_key=bind_key)
+
+
   # Initialize extensions
 
-db = SQLAlchemy()  # Database connection
+db = RoutedSQLAlchemy(session_options={"class_": RoutingSession})  # Database connection
 ma = Marshmallow()
 
 
@@ -17,3 +64,132 @@ def init_db(app):  # Function: init_db
     """
     db.init_app(app)
     ma.init_app(app)
+
+
+def use_task_pool():  # Function: use_task_pool
+    """
+    Route this app context's session to the background task pool. Call it
+    right after pushing a fresh app context in a worker thread.
+    """
+    g._db_pool = TASKS_BIND
+
+
+  # -------------------- UNIT OF WORK --------------------
+
+
+def _in_unit_of_work():  # Function: _in_unit_of_work
+    return has_app_context() and g.get("_uow_depth", 0) > 0
+
+
+def commit_session():  # Function: commit_session
+    """
+    Commit the session, or only flush it inside a unit of work.
+
+    Flushing still assigns primary keys, so callers can use new ids right
+    away; the single COMMIT happens when the outermost unit_of_work() ends.
+    """
+    if _in_unit_of_work():  # Conditional statement
+        db.session.flush()
+    else:  # Default case
+        db.session.commit()
+
+
+def after_commit(callback):  # Function: after_commit
+    """
+    Run callback once the current unit of work has committed (or right
+    away when there is none). Used for side effects such as starting a
+    background thread that must be able to see the committed rows.
+    """
+    if _in_unit_of_work():  # Conditional statement
+        g._uow_after_commit.append(callback)
+    else:  # Default case
+        callback()
+
+
+def after_rollback(callback):  # Function: after_rollback
+    """
+    Run callback if the current unit of work rolls back (or fails to
+    commit) instead. Used to undo in-memory bookkeeping done for writes
+    that did not happen; outside a unit of work it is never called.
+    """
+    if _in_unit_of_work():  # Conditional statement
+        g._uow_after_rollback.append(callback)
+
+
+@contextmanager
+def unit_of_work():  # Function: unit_of_work
+    """
+    Group every write in the block into one transaction.
+
+    save_to_db() and commit_session() only flush inside the block; the
+    outermost block commits once on success and rolls back on error.
+    Nested blocks join the outer transaction.
+    """
+    depth = g.get("_uow_depth", 0)
+    if depth == 0:  # Conditional statement
+        g._uow_after_commit = []
+        g._uow_after_rollback = []
+    g._uow_depth = depth + 1
+    try:  # Exception handling block
+        yield db.session
+    except Exception:  # Exception handler
+        g._uow_depth = depth
+        if depth == 0:  # Conditional statement
+            _rollback_unit_of_work()
+        raise
+    g._uow_depth = depth
+    if depth == 0:  # Conditional statement
+        _commit_unit_of_work()
+
+
+def _commit_unit_of_work():  # Function: _commit_unit_of_work
+    callbacks, g._uow_after_commit = g._uow_after_commit, []
+    try:  # Exception handling block
+        db.session.commit()
+    except Exception:  # Exception handler
+        _rollback_unit_of_work()
+        raise
+    g._uow_after_rollback = []
+    for callback in callbacks:  # Loop iteration
+        callback()
+
+
+def _rollback_unit_of_work():  # Function: _rollback_unit_of_work
+    callbacks = g.get("_uow_after_rollback", [])
+    g._uow_after_commit, g._uow_after_rollback = [], []
+    db.session.rollback()
+    for callback in callbacks:  # Loop iteration
+        callback()
+
+
+def transactional(fn):  # Function: transactional
+    """
+    Decorator that runs a view inside a request-scoped unit of work.
+
+    The view's writes are committed once when it returns a successful
+    response; 4xx/5xx responses and exceptions roll everything back.
+    """
+    @wraps(fn)  # Decorator: wraps
+    def wrapper(*args, **kwargs):  # Function: wrapper
+        if _in_unit_of_work():  # Conditional statement
+            return fn(*args, **kwargs)
+
+        g._uow_depth = 1
+        g._uow_after_commit = []
+        g._uow_after_rollback = []
+        try:  # Exception handling block
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code < 400:  # Conditional statement
+                g._uow_depth = 0
+                _commit_unit_of_work()
+            else:  # Default case
+                _rollback_unit_of_work()
+            return response
+        except Exception:  # Exception handler
+            _rollback_unit_of_work()
+            raise
+        finally:
+            g._uow_depth = 0
+            g._uow_after_commit = []
+            g._uow_after_rollback = []
+    return wrapper
@@ -0,0 +1,112 @@
+"""
+Gunicorn configuration for BookVault API
+
+Picked up automatically when gunicorn is started from backend/, e.g.
+    gunicorn            (serves wsgi:application)
+    gunicorn app:app
+
+The app is imported once in the master (preload_app) and warmed up there:
+hot read queries are compiled, schemas built and lazy modules imported.
+gc.freeze() then moves everything allocated so far out of the collector's
+reach, so workers share those pages copy-on-write instead of each paying
+the import and first-request cost and duplicating the memory.
+
+After fork every worker drops the inherited pool (dispose(close=False)),
+opens pool_size connections of its own and logs its startup memory. The
+latency of each worker's first request is logged as well.
+
+Environment:
+    PORT                  listen port (default 5000)
+    WEB_CONCURRENCY       worker processes (default 2)
+    GUNICORN_THREADS      threads per worker (default 1)
+    GUNICORN_TIMEOUT      worker timeout in seconds (default 30)
+    GUNICORN_PRELOAD      import the app in the master (default true)
+    GUNICORN_WARM_POOL    open pool_size connections per worker (default true)
+"""
+import gc
+import json
+import os  # Operating system interface
+import time
+
+import warmup
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "1"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+warm_pool = os.environ.get("GUNICORN_WARM_POOL", "true").lower() == "true"
+wsgi_app = "wsgi:application"
+accesslog = "-"
+
+
+def _log(logger, event, **fields):  # Function: _log
+    logger.info("%s %s", event, json.dumps(fields))
+
+
+def when_ready(server):  # Function: when_ready
+    """Master: warm the preloaded app, close its connections, freeze the heap"""
+    if not preload_app:  # Conditional statement
+        return
+    app = server.app.wsgi()
+    if warmup.is_bookvault_app(app):  # Conditional statement
+        seconds = warmup.warm_hot_queries(app)
+  # Workers must not inherit open connections
+        warmup.dispose_engine(app, close=True)
+        _log(server.log, "master_warmup", warmup_ms=round(seconds * 1000, 1))
+    gc.freeze()
+    _log(server.log, "master_ready", frozen_objects=gc.get_freeze_count(),
+         **warmup.process_memory())
+
+
+def pre_fork(server, worker):  # Function: pre_fork
+  # Objects created since when_ready (e.g. when a dead worker is replaced)
+    if preload_app:  # Conditional statement
+        gc.freeze()
+
+
+def post_fork(server, worker):  # Function: post_fork
+    worker.boot_started = time.perf_counter()
+    worker.first_request_logged = False
+    if preload_app:  # Conditional statement
+        app = server.app.wsgi()
+        if warmup.is_bookvault_app(app):  # Conditional statement
+            warmup.dispose_engine(app, close=False)
+
+
+def post_worker_init(worker):  # Function: post_worker_init
+    """Worker: open its own pool (and warm queries when not preloaded)"""
+    app = worker.wsgi
+    fields = {"pid": worker.pid}
+    if warmup.is_bookvault_app(app):  # Conditional statement
+        if not preload_app:  # Conditional statement
+            fields["warmup_ms"] = round(warmup.warm_hot_queries(app) * 1000, 1)
+        if warm_pool:  # Conditional statement
+            fields["pool_connections"] = warmup.warm_pool(app)
+    fields["boot_ms"] = round(
+        (time.perf_counter() - getattr(worker, "boot_started", time.perf_counter()))
+        * 1000, 1
+    )
+    fields.update(warmup.process_memory())
+    _log(worker.log, "worker_ready", **fields)
+
+
+def pre_request(worker, req):  # Function: pre_request
+    if not worker.first_request_logged:  # Conditional statement
+        worker.first_request_started = time.perf_counter()
+
+
+def post_request(worker, req, environ, resp):  # Function: post_request
+    if not worker.first_request_logged:  # Conditional statement
+        worker.first_request_logged = True
+        _log(worker.log, "worker_first_request", pid=worker.pid,
+             path=req.path,
+             latency_ms=round(
+                 (time.perf_counter() - worker.first_request_started) * 1000, 1
+             ),
+             **warmup.process_memory())
+
+
+def child_exit(server, worker):  # Function: child_exit
+    import metrics
+    metrics.mark_worker_dead(worker)
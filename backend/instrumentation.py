@@ -0,0 +1,161 @@
+"""
+Per-request instrumentation for BookVault API
+
+Records, for every request:
+- wall time
+- time spent in SQL and the number of statements executed
+- time spent waiting for a pooled connection
+- time spent encoding the JSON response
+
+The numbers are returned in a Server-Timing header (visible in the browser
+devtools) and written as one structured log line. Requests that execute
+more statements than REQUEST_QUERY_COUNT_THRESHOLD are logged as likely
+N+1 patterns.
+
+Everything here is a handful of perf_counter() calls per request/query,
+so it is meant to stay on in production (REQUEST_TIMING_ENABLED).
+"""
+import logging  # Application logging
+import time
+
+from flask import g, has_request_context, request  # Flask web framework components
+from sqlalchemy import event  # Database ORM components
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from json_provider import FastJSONProvider
+
+logger = logging.getLogger("bookvault.timing")
+
+
+class RequestTiming:
+    """Accumulated timings for the current request (stored on flask.g)"""
+
+    __slots__ = ("start", "db_seconds", "queries", "pool_seconds",
+                 "serialize_seconds")
+
+    def __init__(self):  # Special method: __init__
+        self.start = time.perf_counter()
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.pool_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+    @property
+    def wall_seconds(self):  # Function: wall_seconds
+        return time.perf_counter() - self.start
+
+
+def current_timing():  # Function: current_timing
+    """Return the RequestTiming for the active request, or None"""
+    if has_request_context():  # Conditional statement
+        return g.get("request_timing")
+    return None
+
+
+  # -------------------- SQL EVENTS --------------------
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context,  # Function: _before_cursor_execute
+                           executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context,  # Function: _after_cursor_execute
+                          executemany):
+    starts = conn.info.get("query_start_time")
+    if not starts:  # Conditional statement
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    timing = current_timing()
+    if timing is not None:  # Conditional statement
+        timing.db_seconds += elapsed
+        timing.queries += 1
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a connection
+    (including opening a new one when the pool is below its limit).
+    """
+
+    def _do_get(self):  # Function: _do_get
+        start = time.perf_counter()
+        try:  # Exception handling block
+            return super()._do_get()
+        finally:
+            timing = current_timing()
+            if timing is not None:  # Conditional statement
+                timing.pool_seconds += time.perf_counter() - start
+
+
+  # -------------------- JSON ENCODING --------------------
+
+
+class TimedJSONProvider(FastJSONProvider):
+    """JSON provider (orjson when available) that records time spent encoding"""
+
+    def dumps_bytes(self, obj, **kwargs):  # Function: dumps_bytes
+        start = time.perf_counter()
+        try:  # Exception handling block
+            return super().dumps_bytes(obj, **kwargs)
+        finally:
+            timing = current_timing()
+            if timing is not None:  # Conditional statement
+                timing.serialize_seconds += time.perf_counter() - start
+
+
+  # -------------------- FLASK HOOKS --------------------
+
+
+def _server_timing_header(timing, wall_seconds):  # Function: _server_timing_header
+    return ", ".join([
+        f'db;dur={timing.db_seconds * 1000:.2f};desc="{timing.queries} queries"',
+        f"pool;dur={timing.pool_seconds * 1000:.2f}",
+        f"ser;dur={timing.serialize_seconds * 1000:.2f}",
+        f"total;dur={wall_seconds * 1000:.2f}",
+    ])
+
+
+def init_app(app):  # Function: init_app
+    """Register the timing hooks on the Flask app"""
+    if not app.config.get("REQUEST_TIMING_ENABLED", True):  # Conditional statement
+        return
+
+    threshold = int(app.config.get("REQUEST_QUERY_COUNT_THRESHOLD", 25))
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_request_timing():  # Function: start_request_timing
+        g.request_timing = RequestTiming()
+
+    @app.after_request
+    def finish_request_timing(response):  # Function: finish_request_timing
+        timing = g.get("request_timing")
+        if timing is None:  # Conditional statement
+            return response
+
+        wall_seconds = timing.wall_seconds
+        response.headers["Server-Timing"] = _server_timing_header(
+            timing, wall_seconds
+        )
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "wall_ms": round(wall_seconds * 1000, 2),
+            "db_ms": round(timing.db_seconds * 1000, 2),
+            "queries": timing.queries,
+            "pool_wait_ms": round(timing.pool_seconds * 1000, 2),
+            "serialize_ms": round(timing.serialize_seconds * 1000, 2),
+        }
+        if timing.queries > threshold:  # Conditional statement
+            record["n_plus_one_suspect"] = True
+            logger.warning("request_timing", extra={"fields": record})
+        else:  # Default case
+            logger.info("request_timing", extra={"fields": record})
+        return response
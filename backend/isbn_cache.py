@@ -0,0 +1,148 @@
+"""
+Per-user ISBN membership cache
+
+"Is this book in my library?" is asked for every result on a page of
+OpenLibrary search results (POST /v1/books/lookup). Most results are not
+in the library, so IsbnMembership keeps each user's set of ISBNs in
+memory: ISBNs outside the set are answered without a query, and only the
+ones inside it are read from the database (in one IN query).
+
+GET /v1/books/<isbn> does not use it and always queries: a single lookup
+is one indexed query anyway, and must not miss a book another worker has
+just added.
+
+- A user's set is loaded with one column query on first use, together
+  with a version of the user's books: their count and latest updated_at.
+- The sets are per process. Before a set is used, the version is read
+  again (one aggregate query, no rows sent); a book added or given a new
+  ISBN through another worker changes it and the set is reloaded.
+- Commits in this process drop the entry right away when they insert or
+  delete one of the user's books or change a book's ISBN (ORM mapper
+  events; the batch endpoint's Core DELETE calls remember_owner() itself).
+- Entries older than ISBN_CACHE_TTL seconds are reloaded (0 disables the
+  cache).
+- At most ISBN_CACHE_MAX_USERS users are kept, least recently used first
+  out.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, func, inspect  # Database ORM components
+
+from db import RoutingSession
+from models import Books
+
+_PENDING_KEY = "isbn_cache_owners"  # session.info: owners written in this transaction
+
+
+class IsbnMembership:
+    """ISBN sets of recently active users, checked against a books version"""
+
+    def __init__(self, app=None):  # Special method: __init__
+        self.ttl = 60.0
+        self.max_users = 1000
+        self._entries = OrderedDict()  # owner id -> (loaded at, version, frozenset of ISBNs)
+        self._epoch = 0  # bumped by every invalidation
+        self._lock = threading.Lock()
+        if app is not None:  # Conditional statement
+            self.init_app(app)
+
+    def init_app(self, app):  # Function: init_app
+        self.ttl = float(app.config.get("ISBN_CACHE_TTL", 60))
+        self.max_users = max(1, int(app.config.get("ISBN_CACHE_MAX_USERS", 1000)))
+        app.extensions["isbn_membership"] = self
+        for name, listener in (("after_insert", _book_written),
+                               ("after_delete", _book_written),
+                               ("after_update", _isbn_changed)):  # Loop iteration
+            if not event.contains(Books, name, listener):  # Conditional statement
+                event.listen(Books, name, listener)
+        for name, listener in (("after_commit", _committed),
+                               ("after_rollback", _rolled_back)):  # Loop iteration
+            if not event.contains(RoutingSession, name, listener):  # Conditional statement
+                event.listen(RoutingSession, name, listener)
+
+    def isbns(self, owner_id):  # Function: isbns
+        """Frozenset of the ISBNs in the user's library"""
+        if self.ttl <= 0:  # Conditional statement
+            return self._load(owner_id)
+        now = time.monotonic()
+  # Read before the set is loaded, so a write in between shows up next time
+        version = self._version(owner_id)
+        with self._lock:
+            entry = self._entries.get(owner_id)
+            if (entry is not None and now - entry[0] < self.ttl
+                    and entry[1] == version):  # Conditional statement
+                self._entries.move_to_end(owner_id)
+                return entry[2]
+            epoch = self._epoch
+
+        isbns = self._load(owner_id)
+        with self._lock:
+  # A commit that landed while loading may not be in `isbns`: do not keep it
+            if self._epoch == epoch:  # Conditional statement
+                self._entries[owner_id] = (now, version, isbns)
+                self._entries.move_to_end(owner_id)
+                while len(self._entries) > self.max_users:  # Loop iteration
+                    self._entries.popitem(last=False)
+        return isbns
+
+    def invalidate(self, owner_ids):  # Function: invalidate
+        with self._lock:
+            self._epoch += 1
+            for owner_id in owner_ids:  # Loop iteration
+                self._entries.pop(owner_id, None)
+
+    def clear(self):  # Function: clear
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def _version(self, owner_id):  # Function: _version
+        """Changes when any worker adds a book or changes an ISBN"""
+        return tuple(Books.query.with_entities(
+            func.count(Books.id), func.max(Books.updated_at)
+        ).filter(Books.owner_id == owner_id).one())
+
+    def _load(self, owner_id):  # Function: _load
+        return frozenset(
+            isbn for (isbn,) in Books.query.with_entities(Books.isbn).filter(
+                Books.owner_id == owner_id
+            )
+        )
+
+
+def remember_owner(session, owner_id):  # Function: remember_owner
+    """
+    Drop owner_id's entry when session commits. For writes that bypass
+    the mapper events, such as Core DELETE statements on books.
+    """
+    session.info.setdefault(_PENDING_KEY, set()).add(owner_id)
+
+
+def _remember(target):  # Function: _remember
+    session = inspect(target).session
+    if session is not None:  # Conditional statement
+        remember_owner(session, target.owner_id)
+
+
+def _book_written(mapper, connection, target):  # Function: _book_written
+    _remember(target)
+
+
+def _isbn_changed(mapper, connection, target):  # Function: _isbn_changed
+    if inspect(target).attrs.isbn.history.has_changes():  # Conditional statement
+        _remember(target)
+
+
+def _committed(session):  # Function: _committed
+    owners = session.info.pop(_PENDING_KEY, None)
+    if owners:  # Conditional statement
+        isbn_membership.invalidate(owners)
+
+
+def _rolled_back(session):  # Function: _rolled_back
+    session.info.pop(_PENDING_KEY, None)
+
+
+isbn_membership = IsbnMembership()
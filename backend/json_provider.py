@@ -0,0 +1,125 @@
+"""
+orjson-backed JSON provider for Flask
+
+jsonify() and every dict returned from a view go through app.json. The
+stdlib encoder spends most of a large /v1/books page in Python-level
+hooks; orjson encodes the same page several times faster. It is an
+optional dependency: without it (or with JSON_ORJSON_ENABLED=false) the
+provider is Flask's own.
+
+The values are encoded exactly as Flask's DefaultJSONProvider encodes
+them: Decimal (books.rating) as a string, datetime and date in HTTP date
+format, dataclasses through asdict(), objects with __html__ - all via
+Flask's default hook, so these are the same by construction - with keys
+sorted and compact separators.
+
+Non-ASCII characters are escaped as \\uXXXX like the stdlib does
+(ensure_ascii, applied to orjson's output by ensure_ascii() below), so the
+bytes match. JSON_RAW_UTF8=true opts into UTF-8 bodies instead (for both
+encoders): every JSON parser reads both the same, and skipping the escape
+pass saves time on pages with non-ASCII titles. For ASCII-only responses
+the bytes are identical either way.
+
+Anything orjson refuses (non-string dict keys, integers beyond 64 bit,
+lone surrogates, unknown types) falls back to the stdlib encoder for that
+call, as do calls with other options (the indented output in debug mode,
+explicit cls=/default=). Remaining differences: floats in exponent
+notation are written as 1e-7 instead of 1e-07 (the same number), and
+NaN/Infinity, which the stdlib writes as invalid JSON, become null.
+
+`python -m benchmarks.serialization` compares both encoders on a
+100-book page and checks that the bytes match.
+"""
+import codecs
+from json.encoder import encode_basestring_ascii
+
+from flask.json.provider import DefaultJSONProvider
+
+try:  # Exception handling block
+    import orjson
+except ImportError:  # Exception handler
+    orjson = None
+
+_COMPACT = (",", ":")
+
+  # Codec error handler name: the ASCII encoder hands it each run of
+  # non-ASCII characters, which costs far less than a regex over the bytes
+_ESCAPE_ERRORS = "json_provider.escape"
+
+
+def _escape_run(error):  # Function: _escape_run
+    run = error.object[error.start:error.end]
+    return encode_basestring_ascii(run)[1:-1], error.end
+
+
+codecs.register_error(_ESCAPE_ERRORS, _escape_run)
+
+
+def ensure_ascii(data):  # Function: ensure_ascii
+    """Escape orjson's UTF-8 output the way json.dumps(ensure_ascii=True) does"""
+    if data.isascii():  # Conditional statement
+        if b"\x7f" not in data:  # Conditional statement
+            return data
+    else:  # Default case
+        data = data.decode("utf-8").encode("ascii", _ESCAPE_ERRORS)
+  # DEL is ASCII but escaped by the stdlib; it only occurs inside strings
+    return data.replace(b"\x7f", b"\\u007f")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider that encodes with orjson when it can"""
+
+    use_orjson = orjson is not None
+
+    def __init__(self, app):  # Special method: __init__
+        super().__init__(app)
+        self.use_orjson = self.use_orjson and app.config.get(
+            "JSON_ORJSON_ENABLED", True
+        )
+        if app.config.get("JSON_RAW_UTF8", False):  # Conditional statement
+            self.ensure_ascii = False  # see the module docstring
+
+    def _orjson_options(self):  # Function: _orjson_options
+  # Everything Flask's default hook handles goes to it, so the output
+  # matches; orjson's native formats for these would differ
+        options = (orjson.OPT_PASSTHROUGH_DATETIME
+                   | orjson.OPT_PASSTHROUGH_DATACLASS)
+        if self.sort_keys:  # Conditional statement
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps_bytes(self, obj, **kwargs):  # Function: dumps_bytes
+        """Serialize obj to UTF-8 encoded JSON bytes"""
+  # Flask's response() asks for compact output; other options need the stdlib
+        if self.use_orjson and kwargs == {"separators": _COMPACT}:  # Conditional statement
+            try:  # Exception handling block
+                data = orjson.dumps(obj, default=self.default,
+                                    option=self._orjson_options())
+                return ensure_ascii(data) if self.ensure_ascii else data
+            except TypeError:  # Exception handler
+                pass  # something only the stdlib encoder handles
+        return super().dumps(obj, **kwargs).encode("utf-8")
+
+    def dumps(self, obj, **kwargs):  # Function: dumps
+        return self.dumps_bytes(obj, **kwargs).decode("utf-8")
+
+    def loads(self, s, **kwargs):  # Function: loads
+        if self.use_orjson and not kwargs:  # Conditional statement
+            try:  # Exception handling block
+                return orjson.loads(s)
+            except (orjson.JSONDecodeError, TypeError):  # Exception handler
+                pass  # let the stdlib parser accept it or raise its usual error
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):  # Function: response
+        """Like DefaultJSONProvider.response, without a str round trip"""
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args = {}
+        if (self.compact is None and self._app.debug) or self.compact is False:  # Conditional statement
+            dump_args["indent"] = 2
+        else:  # Default case
+            dump_args["separators"] = _COMPACT
+        return self._app.response_class(
+            self.dumps_bytes(obj, **dump_args) + b"\n", mimetype=self.mimetype
+        )
+
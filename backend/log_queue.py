@@ -0,0 +1,197 @@
+"""
+Queue-based logging for BookVault API
+
+Log calls on request threads only put the record on an in-memory queue;
+a QueueListener thread formats it and writes it to stderr. A slow or
+blocked stderr (container log drivers, a paused terminal) then no longer
+adds to request latency. The queue is bounded (LOG_QUEUE_SIZE): when it
+is full, records are dropped and counted instead of blocking, and the
+count is logged once the queue drains.
+
+Records are written as one JSON object per line (LOG_FORMAT=json, the
+default in production) or as plain text (LOG_FORMAT=text, the default in
+development). Structured fields go in extra={"fields": {...}}:
+
+    logger.warning("slow_export", extra={"fields": {"rows": 1200}})
+
+and become keys of the JSON object (appended as JSON in text mode).
+
+LogSampler keeps noisy, repetitive records (4xx responses from clients
+retrying, bots probing URLs) down to one in LOG_4XX_SAMPLE_EVERY per key.
+
+Forked processes (gunicorn workers) get a listener of their own through
+os.register_at_fork.
+"""
+import atexit
+import json
+import logging  # Application logging
+import os  # Operating system interface
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+
+_listener = None
+_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, fields"""
+
+    def format(self, record):  # Function: format
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc)
+            .isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:  # Conditional statement
+            entry.update(fields)
+        if record.exc_info and not record.exc_text:  # Conditional statement
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:  # Conditional statement
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The classic text line, with structured fields appended as JSON"""
+
+    def format(self, record):  # Function: format
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:  # Conditional statement
+            line = f"{line} {json.dumps(fields, default=str)}"
+        return line
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks: records that do not fit are dropped.
+
+    prepare() only merges the message arguments and renders the traceback
+    (neither can wait: args may be mutated, traceback objects go stale);
+    the actual formatting happens on the listener thread.
+    """
+
+    def __init__(self, log_queue):  # Special method: __init__
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record):  # Function: prepare
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:  # Conditional statement
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):  # Function: enqueue
+        try:  # Exception handling block
+            if self.dropped:  # Conditional statement
+                dropped, self.dropped = self.dropped, 0
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": __name__, "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": "log_records_dropped",
+                    "fields": {"dropped": dropped},
+                }))
+            self.queue.put_nowait(record)
+        except queue.Full:  # Exception handler
+            self.dropped += 1
+
+
+def configure_logging(level, log_format=None, queue_size=None):  # Function: configure_logging
+    """
+    Route every log record through one bounded queue to a stderr writer.
+
+    Replaces the root logger's handlers, so it is safe to call after
+    logging.basicConfig() (wsgi.py, auth_route.py) and more than once.
+    """
+    global _handler, _listener
+
+    log_format = (log_format or os.getenv("LOG_FORMAT")
+                  or ("json" if _is_production() else "text")).lower()
+    queue_size = queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(
+        JsonFormatter() if log_format == "json" else TextFormatter(TEXT_FORMAT)
+    )
+
+    stop_listener()
+    _handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size))
+    root = logging.getLogger()
+    for handler in list(root.handlers):  # Loop iteration
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(_handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    return _handler
+
+
+def stop_listener():  # Function: stop_listener
+    """Write out everything still queued and stop the listener thread"""
+    global _listener
+    if _listener is not None:  # Conditional statement
+        try:  # Exception handling block
+            _listener.stop()
+        except Exception:  # Exception handler
+            pass  # already stopped, or its thread did not survive a fork
+        _listener = None
+
+
+def _restart_in_child():  # Function: _restart_in_child
+  # The listener thread does not exist in a forked child, and the copied
+  # queue may hold the parent's records or a lock taken by its listener:
+  # give the child a fresh queue and a listener of its own
+    global _listener
+    if _listener is not None:  # Conditional statement
+        _handler.queue = queue.Queue(maxsize=_handler.queue.maxsize)
+        _listener = QueueListener(_handler.queue, *_listener.handlers,
+                                  respect_handler_level=True)
+        _listener.start()
+
+
+def _is_production():  # Function: _is_production
+    return os.getenv("FLASK_ENV") == "production" or os.getenv("RENDER") == "true"
+
+
+class LogSampler:
+    """
+    Log the first record per key, then one in `every`.
+
+    should_log(key) returns how many records the caller represents (the
+    current one plus the ones skipped since the last logged one), or 0
+    when this one is skipped. Counting is per process.
+    """
+
+    def __init__(self, every=1):  # Special method: __init__
+        self.every = max(1, int(every))
+        self._skipped = {}  # key -> records skipped since the last logged one
+        self._lock = threading.Lock()
+
+    def should_log(self, key):  # Function: should_log
+        if self.every == 1:  # Conditional statement
+            return 1
+        with self._lock:
+            skipped = self._skipped.get(key)
+            if skipped is None or skipped + 1 >= self.every:  # Conditional statement
+                self._skipped[key] = 0
+                return (skipped or 0) + 1
+            self._skipped[key] = skipped + 1
+            return 0
+
+
+atexit.register(stop_listener)
+if hasattr(os, "register_at_fork"):  # Conditional statement
+    os.register_at_fork(after_in_child=_restart_in_child)
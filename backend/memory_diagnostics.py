@@ -0,0 +1,219 @@
+"""
+Per-worker memory diagnostics
+
+Finds slow memory growth in a long-running worker without restarting it:
+
+- report(): RSS/PSS/USS, garbage collector generation counts, thread
+  counts and the sizes of the app's own in-process structures (rate-limit
+  store, background task threads, slow-query buffer, progress buffer,
+  shard directory, replica pins).
+- tracemalloc can be switched on and off at runtime. Snapshots are kept
+  in memory (the newest MEMORY_SNAPSHOT_LIMIT) and can be listed by top
+  allocation sites or diffed against each other, which shows what grew.
+
+tracemalloc slows allocation-heavy code down by roughly 2x while it is on,
+so switch it off again after taking the snapshots.
+
+Everything is per process: with several gunicorn workers each request
+lands on one of them. Every response carries the worker's pid, and the
+admin endpoints accept ?pid= to refuse (409) requests that reached a
+different worker; `flask memory` retries until it reaches the one asked for.
+"""
+import gc
+import os  # Operating system interface
+import threading
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime  # Date and time handling
+
+  # Prefix of background task thread names (routes/tasks.py)
+TASK_THREAD_PREFIX = "task-"
+
+  # Allocations made by tracemalloc itself are noise in every report
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+KEY_TYPES = ("lineno", "filename", "traceback")
+
+
+class SnapshotNotFound(KeyError):
+    """No snapshot with that id in this worker"""
+
+
+class MemoryDiagnostics:
+    """tracemalloc control, snapshot store and process memory report"""
+
+    def __init__(self, app=None):  # Special method: __init__
+        self.snapshot_limit = 5
+        self._snapshots = OrderedDict()  # id -> (taken at, Snapshot)
+        self._next_id = 1
+        self._lock = threading.Lock()
+        if app is not None:  # Conditional statement
+            self.init_app(app)
+
+    def init_app(self, app):  # Function: init_app
+        self.snapshot_limit = max(1, int(app.config.get("MEMORY_SNAPSHOT_LIMIT", 5)))
+        app.extensions["memory_diagnostics"] = self
+
+  # -------------------- TRACEMALLOC --------------------
+
+    def start(self, frames=10):  # Function: start
+        """Start tracing allocations; frames is the traceback depth kept"""
+        if tracemalloc.is_tracing():  # Conditional statement
+            return False
+        tracemalloc.start(max(1, min(int(frames), 100)))
+        return True
+
+    def stop(self):  # Function: stop
+        """Stop tracing and drop the snapshots (they keep their traces alive)"""
+        with self._lock:
+            self._snapshots.clear()
+        if not tracemalloc.is_tracing():  # Conditional statement
+            return False
+        tracemalloc.stop()
+        return True
+
+    def take_snapshot(self):  # Function: take_snapshot
+        """Snapshot the traced allocations; returns its id"""
+        if not tracemalloc.is_tracing():  # Conditional statement
+            raise RuntimeError("tracemalloc is not running")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = (datetime.utcnow(), snapshot)
+            while len(self._snapshots) > self.snapshot_limit:  # Loop iteration
+                self._snapshots.popitem(last=False)
+        return snapshot_id
+
+    def _get(self, snapshot_id):  # Function: _get
+        with self._lock:
+            try:  # Exception handling block
+                return self._snapshots[int(snapshot_id)]
+            except (KeyError, ValueError):  # Exception handler
+                raise SnapshotNotFound(snapshot_id) from None
+
+    def snapshots(self):  # Function: snapshots
+        with self._lock:
+            items = list(self._snapshots.items())
+        return [
+            {
+                "id": snapshot_id,
+                "taken_at": taken_at.isoformat(),
+                "traces": len(snapshot.traces),
+            }
+            for snapshot_id, (taken_at, snapshot) in items
+        ]
+
+    def top(self, snapshot_id, limit=20, key_type="lineno"):  # Function: top
+        """Largest allocation sites of one snapshot"""
+        taken_at, snapshot = self._get(snapshot_id)
+        stats = snapshot.statistics(key_type)
+        return {
+            "id": int(snapshot_id),
+            "taken_at": taken_at.isoformat(),
+            "total_kb": round(sum(stat.size for stat in stats) / 1024, 1),
+            "top": [_stat(stat) for stat in stats[:limit]],
+        }
+
+    def diff(self, old_id, new_id=None, limit=20, key_type="lineno"):  # Function: diff
+        """
+        Allocation sites that grew the most between two snapshots; without
+        new_id a fresh snapshot is taken and compared.
+        """
+        if new_id is None:  # Conditional statement
+            new_id = self.take_snapshot()
+        old_taken, old = self._get(old_id)
+        new_taken, new = self._get(new_id)
+        stats = new.compare_to(old, key_type)
+        return {
+            "from": int(old_id),
+            "to": int(new_id),
+            "seconds": round((new_taken - old_taken).total_seconds(), 1),
+            "size_diff_kb": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+            "top": [_stat_diff(stat) for stat in stats[:limit]],
+        }
+
+  # -------------------- REPORT --------------------
+
+    def report(self):  # Function: report
+        """Process memory, GC state, threads and in-process structures"""
+        from warmup import process_memory
+
+        threads = threading.enumerate()
+        report = {
+            "pid": os.getpid(),
+            "memory": process_memory(),
+            "gc": {
+                "counts": gc.get_count(),
+                "thresholds": gc.get_threshold(),
+                "collections": [stats["collections"] for stats in gc.get_stats()],
+                "uncollectable": [stats["uncollectable"] for stats in gc.get_stats()],
+                "garbage": len(gc.garbage),
+                "frozen": gc.get_freeze_count(),
+            },
+            "threads": {
+                "total": len(threads),
+                "background_tasks": sum(
+                    1 for thread in threads
+                    if thread.name.startswith(TASK_THREAD_PREFIX)
+                ),
+            },
+            "structures": structure_sizes(),
+            "tracemalloc": {"tracing": tracemalloc.is_tracing()},
+            "snapshots": self.snapshots(),
+        }
+        if tracemalloc.is_tracing():  # Conditional statement
+            current, peak = tracemalloc.get_traced_memory()
+            report["tracemalloc"].update({
+                "frames": tracemalloc.get_traceback_limit(),
+                "traced_kb": round(current / 1024, 1),
+                "peak_kb": round(peak / 1024, 1),
+                "overhead_kb": round(tracemalloc.get_tracemalloc_memory() / 1024, 1),
+            })
+        return report
+
+
+def structure_sizes():  # Function: structure_sizes
+    """Entry counts of the app's long-lived in-process structures"""
+    from rate_limiter import rate_limit_lock, rate_limit_store
+    from replicas import replica_router
+    from sharding import shard_router
+    from slow_queries import slow_query_log
+    from write_buffer import progress_buffer
+
+    with rate_limit_lock:
+        rate_limit_keys = len(rate_limit_store)
+        rate_limit_timestamps = sum(len(v) for v in rate_limit_store.values())
+    return {
+        "rate_limit_store": {
+            "keys": rate_limit_keys,
+            "timestamps": rate_limit_timestamps,
+        },
+        "slow_query_log": len(slow_query_log.entries),
+        "progress_buffer_pending": len(progress_buffer._pending),
+        "shard_directory": len(shard_router._directory),
+        "replica_pins": len(replica_router._pins),
+    }
+
+
+def _frame(stat):  # Function: _frame
+    return [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+
+
+def _stat(stat):  # Function: _stat
+    return {"site": _frame(stat), "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count}
+
+
+def _stat_diff(stat):  # Function: _stat_diff
+    return {"site": _frame(stat), "size_kb": round(stat.size / 1024, 1),
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "count": stat.count, "count_diff": stat.count_diff}
+
+
+memory_diagnostics = MemoryDiagnostics()
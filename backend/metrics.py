@@ -0,0 +1,220 @@
+"""
+Prometheus metrics for BookVault API
+
+Exposes GET /metrics in the Prometheus text format with:
+- per-endpoint request latency histograms and in-flight requests
+- database connection pool gauges (size, checked out, overflow)
+- background task depth and duration by task_type
+- rate limiter rejections
+- bytes written by exports
+
+Running under gunicorn with several workers, set PROMETHEUS_MULTIPROC_DIR
+to an empty, writable directory *before* the app is imported. Every worker
+then writes its samples there and /metrics aggregates all of them through
+prometheus_client's MultiProcessCollector, whichever worker serves the
+scrape. Call mark_worker_dead() from gunicorn's child_exit hook so gauges
+of dead workers are dropped.
+
+prometheus_client is optional: without it the helpers below are no-ops
+and /metrics answers 503.
+"""
+import hmac
+import logging  # Application logging
+import os  # Operating system interface
+import time
+
+from flask import Response, g, jsonify, request  # Flask web framework components
+
+try:  # Exception handling block
+    from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                                   CollectorRegistry, Counter, Gauge,
+                                   Histogram, generate_latest, multiprocess)
+except ImportError:  # Exception handler
+    Histogram = None
+
+logger = logging.getLogger(__name__)
+
+  # Buckets tuned for an API whose typical responses take 5-500ms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+TASK_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+  # task_type comes from the client, so anything unknown shares one label
+TASK_TYPES = {"csv_export", "json_export", "html_export", "share_book_event",
+              "note_import"}
+
+if Histogram is not None:  # Conditional statement
+    REQUEST_LATENCY = Histogram(
+        "bookvault_http_request_duration_seconds",
+        "HTTP request latency by endpoint",
+        ["endpoint", "method", "status"],
+        buckets=LATENCY_BUCKETS
+    )
+    REQUESTS_IN_FLIGHT = Gauge(
+        "bookvault_http_requests_in_flight",
+        "Requests currently being processed",
+        multiprocess_mode="livesum"
+    )
+    DB_POOL_SIZE = Gauge(
+        "bookvault_db_pool_size",
+        "Configured connection pool size",
+        multiprocess_mode="livesum"
+    )
+    DB_POOL_CHECKED_OUT = Gauge(
+        "bookvault_db_pool_checked_out",
+        "Connections currently checked out of the pool",
+        multiprocess_mode="livesum"
+    )
+    DB_POOL_OVERFLOW = Gauge(
+        "bookvault_db_pool_overflow",
+        "Connections opened beyond pool_size",
+        multiprocess_mode="livesum"
+    )
+    TASKS_IN_PROGRESS = Gauge(
+        "bookvault_background_tasks_in_progress",
+        "Background tasks queued or running",
+        ["task_type"],
+        multiprocess_mode="livesum"
+    )
+    TASK_DURATION = Histogram(
+        "bookvault_background_task_duration_seconds",
+        "Background task duration by task_type and outcome",
+        ["task_type", "status"],
+        buckets=TASK_BUCKETS
+    )
+    RATE_LIMIT_REJECTIONS = Counter(
+        "bookvault_rate_limit_rejections_total",
+        "Requests rejected by the rate limiter",
+        ["endpoint"]
+    )
+    EXPORT_BYTES = Counter(
+        "bookvault_export_bytes_total",
+        "Bytes written by library exports",
+        ["format"]
+    )
+
+
+def enabled():  # Function: enabled
+    return Histogram is not None
+
+
+  # -------------------- RECORDING HELPERS --------------------
+
+
+def _task_label(task_type):  # Function: _task_label
+    return task_type if task_type in TASK_TYPES else "other"
+
+
+def task_started(task_type):  # Function: task_started
+    if enabled():  # Conditional statement
+        TASKS_IN_PROGRESS.labels(task_type=_task_label(task_type)).inc()
+
+
+def task_finished(task_type, status, duration_seconds):  # Function: task_finished
+    if enabled():  # Conditional statement
+        label = _task_label(task_type)
+        TASKS_IN_PROGRESS.labels(task_type=label).dec()
+        TASK_DURATION.labels(task_type=label, status=status).observe(
+            duration_seconds
+        )
+
+
+def rate_limit_rejected(endpoint):  # Function: rate_limit_rejected
+    if enabled():  # Conditional statement
+        RATE_LIMIT_REJECTIONS.labels(endpoint=endpoint).inc()
+
+
+def export_written(export_format, num_bytes):  # Function: export_written
+    if enabled():  # Conditional statement
+        EXPORT_BYTES.labels(format=export_format).inc(num_bytes)
+
+
+def update_pool_gauges():  # Function: update_pool_gauges
+    """Copy the current engine pool state into the pool gauges"""
+    if not enabled():  # Conditional statement
+        return
+    from db import db
+    try:  # Exception handling block
+        pool = db.engine.pool
+        size = getattr(pool, "size", None)
+        checked_out = getattr(pool, "checkedout", None)
+        overflow = getattr(pool, "overflow", None)
+        DB_POOL_SIZE.set(size() if callable(size) else (size or 0))
+        DB_POOL_CHECKED_OUT.set(
+            checked_out() if callable(checked_out) else (checked_out or 0)
+        )
+        DB_POOL_OVERFLOW.set(
+            max(overflow() if callable(overflow) else (overflow or 0), 0)
+        )
+    except Exception as e:  # Exception handler
+        logger.debug("Could not read pool state: %s", e)
+
+
+def mark_worker_dead(worker):  # Function: mark_worker_dead
+    """gunicorn child_exit hook: drop live gauges of an exited worker"""
+    if enabled() and os.environ.get("PROMETHEUS_MULTIPROC_DIR"):  # Conditional statement
+        multiprocess.mark_process_dead(worker.pid)
+
+
+  # -------------------- FLASK INTEGRATION --------------------
+
+
+def _render_metrics():  # Function: _render_metrics
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):  # Conditional statement
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:  # Default case
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+def init_app(app):  # Function: init_app
+    """Register request hooks and the /metrics endpoint"""
+    if not enabled():  # Conditional statement
+        app.logger.info("prometheus_client not installed, metrics disabled")
+
+        @app.route("/metrics", methods=["GET"])
+        def metrics():  # Function: metrics
+            return jsonify({
+                "error": "Service Unavailable",
+                "message": "Metrics are not available on this server."
+            }), 503
+        return
+
+    @app.before_request
+    def start_request_metrics():  # Function: start_request_metrics
+        if request.environ.get("bookvault.warmup"):  # Conditional statement
+            return  # worker warm-up (warmup.py), not user traffic
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_request_metrics(response):  # Function: record_request_metrics
+        start = g.get("metrics_start")
+        if start is not None:  # Conditional statement
+            REQUEST_LATENCY.labels(
+                endpoint=request.endpoint or "unmatched",
+                method=request.method,
+                status=str(response.status_code)
+            ).observe(time.perf_counter() - start)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):  # Function: finish_request_metrics
+        if g.pop("metrics_start", None) is not None:  # Conditional statement
+            REQUESTS_IN_FLIGHT.dec()
+        update_pool_gauges()
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():  # Function: metrics
+        """Prometheus scrape endpoint (optionally behind METRICS_AUTH_TOKEN)"""
+        token = app.config.get("METRICS_AUTH_TOKEN")
+        if token:  # Conditional statement
+            supplied = request.headers.get("Authorization", "")
+            if not hmac.compare_digest(supplied, f"Bearer {token}"):  # Conditional statement
+                return jsonify({
+                    "error": "Unauthorized",
+                    "message": "Authentication required."
+                }), 401
+        update_pool_gauges()
+        return Response(_render_metrics(), content_type=CONTENT_TYPE_LATEST)
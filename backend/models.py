@@ -1,7 +1,7 @@
 from datetime import datetime  # Date and time handling
 from werkzeug.security import generate_password_hash, check_password_hash
 from marshmallow import fields as ma_fields  # JSON serialization components
-from db import db, ma
+from db import db, ma, commit_session
 
   # -------------------- VERIFICATION --------------------
 
@@ -19,7 +19,7 @@ class Verification(db.Model):
 
     def save_to_db(self):  # Save this instance to the database
         db.session.add(self)
-        db.session.commit()
+        commit_session()
 
 
 class VerificationSchema(ma.SQLAlchemyAutoSchema):  # JSON serialization schema for verification
@@ -48,7 +48,7 @@ class User(db.Model):
 
     def save_to_db(self):  # Save this instance to the database
         db.session.add(self)
-        db.session.commit()
+        commit_session()
 
     @classmethod  # Decorator: classmethod
     def find_by_email(cls, email: str):  # Database query method to find records
@@ -95,7 +95,7 @@ class Profile(db.Model):
 
     def save_to_db(self):  # Save this instance to the database
         db.session.add(self)
-        db.session.commit()
+        commit_session()
 
     @classmethod  # Decorator: classmethod
     def find_by_owner(cls, owner_id: int):  # Database query method to find records
@@ -115,6 +115,7 @@ class ProfileSchema(ma.SQLAlchemyAutoSchema):  # JSON serialization schema for p
   # -------------------- BOOKS --------------------
 class Books(db.Model):
     __tablename__ = 'books'
+    __table_args__ = {"info": {"sharded": True}}  # see sharding.py
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     title = db.Column(db.String(500), nullable=False)
@@ -140,11 +141,11 @@ class Books(db.Model):
 
     def save_to_db(self):  # Save this instance to the database
         db.session.add(self)
-        db.session.commit()
+        commit_session()
     
     def delete(self):  # Function: delete
         db.session.delete(self)
-        db.session.commit()
+        commit_session()
 
     @classmethod  # Decorator: classmethod
     def find_by_owner_and_isbn(cls, owner_id: int, isbn: str):  # Database query method to find records
@@ -154,6 +155,7 @@ class Books(db.Model):
   # -------------------- NOTES --------------------
 class Notes(db.Model):
     __tablename__ = 'notes'
+    __table_args__ = {"info": {"sharded": True}}  # see sharding.py
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     book_id = db.Column(db.Integer, db.ForeignKey("books.id"), nullable=False)
@@ -171,7 +173,7 @@ class Notes(db.Model):
 
     def save_to_db(self):  # Save this instance to the database
         db.session.add(self)
-        db.session.commit()
+        commit_session()
 
     @classmethod  # Decorator: classmethod
     def find_by_owner_and_book(cls, owner_id: int, book_id: int):  # Database query method to find records
@@ -216,6 +218,7 @@ class BooksStatusSchema(ma.SQLAlchemyAutoSchema):  # JSON serialization schema f
   # -------------------- TASKS --------------------
 class Tasks(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = {"info": {"sharded": True}}  # see sharding.py
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     task_type = db.Column(db.String(50), nullable=False)
@@ -234,7 +237,7 @@ class Tasks(db.Model):
 
     def save_to_db(self):  # Save this instance to the database
         db.session.add(self)
-        db.session.commit()
+        commit_session()
 
     @classmethod  # Decorator: classmethod
     def find_by_owner(cls, owner_id: int):  # Database query method to find records
@@ -254,6 +257,7 @@ class TasksSchema(ma.SQLAlchemyAutoSchema):  # JSON serialization schema for tas
   # -------------------- FILES --------------------
 class Files(db.Model):
     __tablename__ = 'files'
+    __table_args__ = {"info": {"sharded": True}}  # see sharding.py
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
@@ -268,7 +272,7 @@ class Files(db.Model):
 
     def save_to_db(self):  # Save this instance to the database
         db.session.add(self)
-        db.session.commit()
+        commit_session()
 
     @classmethod  # Decorator: classmethod
     def find_by_owner(cls, owner_id: int):  # Database query method to find records
@@ -288,6 +292,7 @@ class FilesSchema(ma.SQLAlchemyAutoSchema):  # JSON serialization schema for fil
   # -------------------- USER SETTINGS --------------------
 class UserSettings(db.Model):
     __tablename__ = 'user_settings'
+    __table_args__ = {"info": {"sharded": True}}  # see sharding.py
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(
         db.Integer, db.ForeignKey("users.id"), nullable=False, unique=True  # Database connection
@@ -311,7 +316,7 @@ class UserSettings(db.Model):
 
     def save_to_db(self):  # Save this instance to the database
         db.session.add(self)
-        db.session.commit()
+        commit_session()
 
     @classmethod  # Decorator: classmethod
     def find_by_owner(cls, owner_id: int):  # Database query method to find records
@@ -327,3 +332,20 @@ class UserSettingsSchema(ma.SQLAlchemyAutoSchema):  # JSON serialization schema
             "mastodon_url", "mastodon_access_token", "created_at", "updated_at"
         )
         load_instance = True
+
+
+  # -------------------- SHARDING (global database) --------------------
+class ShardAssignment(db.Model):
+    """Users placed away from their hash shard, or being moved"""
+    __tablename__ = 'shard_assignments'
+    owner_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    shard = db.Column(db.String(50), nullable=False)
+    state = db.Column(db.String(20), nullable=False, default="active")
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class IdBlock(db.Model):
+    """Next free id block per sharded table (ids are unique across shards)"""
+    __tablename__ = 'id_blocks'
+    name = db.Column(db.String(50), primary_key=True)
+    next_block = db.Column(db.BigInteger, nullable=False)
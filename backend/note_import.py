@@ -0,0 +1,238 @@
+"""
+Bulk note creation and note import
+
+Users migrating highlights from e-readers bring thousands of quotes;
+creating them one POST (and one INSERT and COMMIT) at a time is slow.
+This module holds what POST /v1/books/<id>/notes/batch and the note file
+import (POST /v1/notes/import) share:
+
+- note_values() validates one note exactly as POST /v1/books/<id>/notes
+  does;
+- insert_notes() writes many notes with one INSERT statement per
+  NOTES_INSERT_CHUNK rows (executemany, batched into multi-row VALUES by
+  the PostgreSQL driver) instead of one flush per Notes instance. With
+  sharding, the ids are reserved as one block (sharding.py's
+  before_insert hook only sees ORM inserts);
+- read_note_file() and import_notes() handle an import file: CSV with an
+  "isbn" and a "content" column, or a JSON list of objects (optionally
+  under "notes"), each with isbn, content and optionally quote,
+  quote_page and visibility. All books of a file are resolved with one
+  ISBN lookup; rows for unknown ISBNs or with invalid values are skipped
+  and reported, the rest are imported.
+
+Files with more than NOTES_IMPORT_INLINE_MAX rows are imported by a
+"note_import" background task (import_note_file()) from a copy saved
+under EXPORT_FOLDER/imports.
+"""
+import csv
+import json
+import os  # Operating system interface
+import secrets
+
+from db import db, commit_session
+from models import Books, Notes
+from sharding import shard_router
+
+  # Rows per INSERT statement
+NOTES_INSERT_CHUNK = 1000
+
+  # Skipped rows listed in an import summary
+MAX_REPORTED_ERRORS = 50
+
+NOTE_IMPORT_FORMATS = ("csv", "json")
+
+  # API visibility -> value stored in notes.visibility
+VISIBILITY_VALUES = {"private": "hidden", "public": "public"}
+
+
+def note_values(item, total_pages):  # Function: note_values
+    """
+    Validate one note for a book with total_pages pages.
+
+    Returns (column values, None) or (None, error message).
+    """
+    content = item.get("content")
+    if content is None:  # Conditional statement
+        return None, "Missing required field: content"
+    if not isinstance(content, str) or not content.strip():  # Conditional statement
+        return None, "Note content cannot be empty"
+
+    quote = item.get("quote")
+    if quote is not None and not isinstance(quote, str):  # Conditional statement
+        return None, "Quote must be a string"
+
+    quote_page = item.get("quote_page")
+    if quote_page is not None and quote_page != "":  # Conditional statement
+        try:  # Exception handling block
+            quote_page = int(quote_page)
+        except (ValueError, TypeError):  # Exception handler
+            return None, "Quote page must be a valid integer"
+        if quote_page < 1:  # Conditional statement
+            return None, "Quote page must be a positive integer"
+  # Validate against book's total pages
+        if total_pages and total_pages > 0 and quote_page > total_pages:  # Conditional statement
+            return None, "Quote page cannot exceed book's total pages"
+    else:  # Default case
+        quote_page = None
+
+    visibility = item.get("visibility") or "private"
+    if visibility not in VISIBILITY_VALUES:  # Conditional statement
+        return None, "Visibility must be either 'private' or 'public'"
+
+    return {
+        "note": content.strip(),
+        "quote": (quote or "").strip() or None,
+        "quote_page": quote_page,
+        "visibility": VISIBILITY_VALUES[visibility]
+    }, None
+
+
+def insert_notes(owner_id, rows):  # Function: insert_notes
+    """
+    Insert notes given as dicts of note_values() plus "book_id", in
+    batched statements. Flushes (or commits) the session first so the
+    notes follow the session's pending writes. Returns the number written.
+    """
+    commit_session()
+    notes = Notes.__table__
+    for start in range(0, len(rows), NOTES_INSERT_CHUNK):  # Loop iteration
+        chunk = [dict(row, owner_id=owner_id)
+                 for row in rows[start:start + NOTES_INSERT_CHUNK]]
+        if shard_router.enabled:  # Conditional statement
+            for row, note_id in zip(chunk, shard_router.next_ids(notes.name, len(chunk))):  # Loop iteration
+                row["id"] = note_id
+        db.session.execute(db.insert(notes), chunk)
+    return len(rows)
+
+
+def read_note_file(data, file_format):  # Function: read_note_file
+    """
+    Parse an uploaded note file into a list of dicts.
+    Raises ValueError with a message for the client.
+    """
+    try:  # Exception handling block
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:  # Exception handler
+        raise ValueError("File must be UTF-8 encoded")
+
+    if file_format == "csv":  # Conditional statement
+        reader = csv.DictReader(text.splitlines())
+        missing = {"isbn", "content"} - set(reader.fieldnames or [])
+        if missing:  # Conditional statement
+            raise ValueError(f"Missing headers: {sorted(missing)}")
+        return list(reader)
+
+    try:  # Exception handling block
+        entries = json.loads(text)
+    except ValueError:  # Exception handler
+        raise ValueError("File is not valid JSON")
+    if isinstance(entries, dict):  # Conditional statement
+        entries = entries.get("notes")
+    if (not isinstance(entries, list)
+            or not all(isinstance(entry, dict) for entry in entries)):  # Conditional statement
+        raise ValueError('Expected a list of note objects, or {"notes": [...]}')
+    return entries
+
+
+def import_notes(owner_id, entries):  # Function: import_notes
+    """
+    Import parsed entries: one lookup for every ISBN of the file, then
+    batched inserts of the valid rows. Returns a summary dict.
+    """
+    from routes.books import validate_isbn  # routes.books imports this module
+
+    isbns = [
+        validate_isbn(str(entry.get("isbn") or "").strip()) for entry in entries
+    ]
+    books = {}
+    wanted = {isbn for isbn in isbns if isbn}
+    if wanted:  # Conditional statement
+        for isbn, book_id, total_pages in Books.query.with_entities(
+            Books.isbn, Books.id, Books.total_pages
+        ).filter(
+            Books.owner_id == owner_id, Books.isbn.in_(wanted)
+        ).order_by(Books.id):  # Loop iteration
+            books.setdefault(isbn, (book_id, total_pages))
+
+    rows, errors = [], []
+    for number, (entry, isbn) in enumerate(zip(entries, isbns), start=1):  # Loop iteration
+        if not isbn:  # Conditional statement
+            message = "Invalid or missing ISBN"
+        elif isbn not in books:  # Alternative condition
+            message = f"No book with ISBN {isbn} in your library"
+        else:  # Default case
+            book_id, total_pages = books[isbn]
+            values, message = note_values(entry, total_pages)
+            if values:  # Conditional statement
+                values["book_id"] = book_id
+                rows.append(values)
+        if message:  # Conditional statement
+            errors.append({"row": number, "message": message})
+
+    insert_notes(owner_id, rows)
+    return {
+        "imported": len(rows),
+        "skipped": len(errors),
+        "books": len({row["book_id"] for row in rows}),
+        "errors": errors[:MAX_REPORTED_ERRORS]
+    }
+
+
+def _imports_folder():  # Function: _imports_folder
+    return os.path.realpath(
+        os.path.join(os.getenv("EXPORT_FOLDER", "export_data"), "imports")
+    )
+
+
+def _import_path(name):  # Function: _import_path
+    """
+    Path of a saved import file. Task metadata can be written by others
+    than save_import_file, so only plain names inside the imports folder
+    are accepted.
+    """
+    if not isinstance(name, str) or not name:  # Conditional statement
+        raise ValueError(f"Invalid import file: {name}")
+    folder = _imports_folder()
+    path = os.path.realpath(os.path.join(folder, name))
+    if os.path.dirname(path) != folder:  # Conditional statement
+        raise ValueError(f"Invalid import file: {name}")
+    return path
+
+
+def save_import_file(data, file_format):  # Function: save_import_file
+    """Keep an upload for the background task; returns its file name"""
+    folder = _imports_folder()
+    os.makedirs(folder, exist_ok=True)
+    name = f"notes_{secrets.token_hex(8)}.{file_format}"
+    with open(os.path.join(folder, name), "wb") as f:
+        f.write(data)
+    return name
+
+
+def import_note_file(owner_id, metadata):  # Function: import_note_file
+    """
+    Body of the "note_import" task: import the saved file and remove it.
+    Returns the task's result message.
+    """
+    if isinstance(metadata, str):  # Conditional statement
+        metadata = json.loads(metadata)
+    if metadata.get("format") not in NOTE_IMPORT_FORMATS:  # Conditional statement
+        raise ValueError(f"Invalid import format: {metadata.get('format')}")
+    path = _import_path(metadata.get("file"))
+    with open(path, "rb") as f:
+        entries = read_note_file(f.read(), metadata["format"])
+    summary = import_notes(owner_id, entries)
+    db.session.commit()
+  # Kept on failure, so a retried task can read it again
+    os.remove(path)
+    return import_summary_message(summary)
+
+
+def import_summary_message(summary):  # Function: import_summary_message
+    message = (f"Imported {summary['imported']} notes into "
+               f"{summary['books']} books.")
+    if summary["skipped"]:  # Conditional statement
+        first = summary["errors"][0]
+        message += (f" Skipped {summary['skipped']} rows "
+                    f"(row {first['row']}: {first['message']}).")
+    return message
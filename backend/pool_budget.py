@@ -0,0 +1,167 @@
+"""
+Connection budget for the database pools
+
+Every gunicorn worker has its own SQLAlchemy pools, so the number of
+connections the app can open is
+
+    instances x workers x (pool_size + max_overflow + task pool)
+
+and it must stay below the server's max_connections, or requests end up
+waiting for a connection until pool_timeout. The pool sizes are derived
+from the declared deployment instead of being hardcoded:
+
+    DB_MAX_CONNECTIONS       server max_connections (default 100)
+    DB_RESERVED_CONNECTIONS  kept free for psql, migrations, superuser (default 5)
+    APP_INSTANCES            app instances sharing the database (default 1)
+    WEB_CONCURRENCY          gunicorn workers per instance (see gunicorn.conf.py)
+    GUNICORN_THREADS         threads per worker
+    TASK_POOL_SIZE           connections for background task threads (default 2)
+    DB_MAX_OVERFLOW          cap on burst connections per worker (default 5)
+    DB_POOL_TIMEOUT          seconds a request waits for a connection (default 10)
+
+Request threads use the main engine: pool_size equals the thread count
+(a thread holds at most one connection), overflow covers the helper threads
+(write buffer flush, slow-query EXPLAIN). Background tasks get their own
+small "tasks" engine, so a burst of exports cannot starve requests.
+
+DB_POOLER=pgbouncer is for running behind PgBouncer in transaction mode:
+the pooler owns the connections, so the app uses NullPool (no connections
+held between checkouts), no separate task pool and no startup options,
+which PgBouncer rejects. psycopg2 never uses server-side prepared
+statements; with psycopg 3 they are turned off (prepare_threshold=None).
+Set statement_timeout on the database role instead of per connection.
+"""
+import logging  # Application logging
+import os  # Operating system interface
+
+logger = logging.getLogger(__name__)
+
+TASKS_BIND = "tasks"
+
+
+def _env_int(environ, name, default):  # Function: _env_int
+    value = environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def uses_pgbouncer(environ=None):  # Function: uses_pgbouncer
+    environ = os.environ if environ is None else environ
+    return environ.get("DB_POOLER", "").lower() == "pgbouncer"
+
+
+def compute_budget(is_production, environ=None):  # Function: compute_budget
+    """
+    Split the server's connections between processes and pools.
+
+    Returns a dict with pool_size, max_overflow and task_pool_size per
+    process, plus the inputs and the resulting worst-case total.
+    """
+    environ = os.environ if environ is None else environ
+    max_connections = _env_int(environ, "DB_MAX_CONNECTIONS", 100)
+    reserved = _env_int(environ, "DB_RESERVED_CONNECTIONS", 5)
+    instances = max(1, _env_int(environ, "APP_INSTANCES", 1))
+    workers = max(1, _env_int(environ, "WEB_CONCURRENCY",
+                              2 if is_production else 1))
+  # The threaded development server has no fixed thread count
+    threads = max(1, _env_int(environ, "GUNICORN_THREADS",
+                              1 if is_production else 3))
+    task_pool_size = max(1, _env_int(environ, "TASK_POOL_SIZE", 2))
+    overflow_cap = max(0, _env_int(environ, "DB_MAX_OVERFLOW", 5))
+
+    processes = instances * workers
+    per_process = (max_connections - reserved) // processes
+
+    pool_size = threads
+    max_overflow = min(overflow_cap, per_process - task_pool_size - pool_size)
+    if max_overflow < 0:  # Conditional statement
+  # Not even one connection per thread fits: shrink and warn
+        task_pool_size = 1
+        pool_size = max(1, per_process - task_pool_size)
+        max_overflow = 0
+        logger.warning(
+            "Connection budget exceeded: %d process(es) x %d thread(s) need "
+            "more than the %d connections available (DB_MAX_CONNECTIONS=%d, "
+            "DB_RESERVED_CONNECTIONS=%d); requests will wait for connections. "
+            "Lower WEB_CONCURRENCY/GUNICORN_THREADS or use DB_POOLER=pgbouncer.",
+            processes, threads, max_connections - reserved, max_connections,
+            reserved
+        )
+
+    return {
+        "max_connections": max_connections,
+        "reserved": reserved,
+        "processes": processes,
+        "threads": threads,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "task_pool_size": task_pool_size,
+        "total": processes * (pool_size + max_overflow + task_pool_size),
+    }
+
+
+def engine_options(db_url, is_production, environ=None):  # Function: engine_options
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS and SQLALCHEMY_BINDS for Config.
+
+    Returns (engine_options, binds, budget); binds is empty in PgBouncer
+    mode, where background tasks share the main engine. budget is None
+    in that mode.
+    """
+    environ = os.environ if environ is None else environ
+    is_postgres = db_url.startswith("postgresql")
+    pool_timeout = _env_int(environ, "DB_POOL_TIMEOUT", 10)
+
+    connect_args = {}
+    if is_postgres:  # Conditional statement
+        connect_args = {
+            'connect_timeout': 10,
+            'application_name': 'BookVault',
+            'keepalives': 1,
+            'keepalives_idle': 60,
+            'keepalives_interval': 10,
+            'keepalives_count': 3,
+        }
+        if is_production:  # Conditional statement
+            connect_args.update({
+                'sslmode': 'require',
+                'options': '-c statement_timeout=30000'
+            })
+        else:  # Default case
+            connect_args['sslmode'] = 'prefer'
+
+    if uses_pgbouncer(environ):  # Conditional statement
+        from sqlalchemy.pool import NullPool
+
+        connect_args.pop('options', None)
+        if db_url.startswith("postgresql+psycopg:"):  # Conditional statement
+            connect_args['prepare_threshold'] = None
+        options = {'poolclass': NullPool, 'echo': False}
+        if connect_args:  # Conditional statement
+            options['connect_args'] = connect_args
+        return options, {}, None
+
+    budget = compute_budget(is_production, environ)
+    options = {
+        'pool_pre_ping': True,
+        'pool_recycle': 300 if is_production else 3600,
+        'pool_timeout': pool_timeout,
+        'pool_size': budget["pool_size"],
+        'max_overflow': budget["max_overflow"],
+        'echo': False,  # Set to True for SQL debugging
+    }
+    if is_postgres:  # Conditional statement
+        options['connect_args'] = connect_args
+  # QueuePool subclass that reports connection wait time per request
+        from instrumentation import TimedQueuePool
+        options['poolclass'] = TimedQueuePool
+
+    task_options = dict(
+        options,
+        pool_size=budget["task_pool_size"],
+        max_overflow=0,
+  # Tasks run in the background and can afford to queue
+        pool_timeout=max(pool_timeout, 60),
+    )
+    task_options.pop('poolclass', None)
+    binds = {TASKS_BIND: dict(task_options, url=db_url)}
+    return options, binds, budget
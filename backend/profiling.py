@@ -0,0 +1,284 @@
+"""
+On-demand request profiling
+
+An admin asks POST /v1/admin/profiles/token for a short-lived token signed
+with SECRET_KEY and sends it as the X-Profile header on the request to
+investigate (from any client and any user account). Only such requests are
+profiled; the middleware checks for the header with one dict lookup, so
+every other request runs exactly as before.
+
+Modes (chosen when the token is issued):
+- sample (default): a thread samples the request thread's stack every
+  PROFILE_SAMPLE_INTERVAL_MS and writes collapsed stacks ("a;b;c 12"),
+  which flamegraph.pl, speedscope and inferno read directly. Samples are
+  taken when the request thread releases the GIL or its switch interval
+  (5ms) ends, so pure-Python hot loops are sampled at about 5ms.
+- cprofile: deterministic cProfile statistics (.prof), for snakeviz,
+  `python -m pstats` or flameprof. Slows the request down noticeably.
+
+Profiles go to PROFILE_DIR as <id>.collapsed / <id>.prof with an <id>.json
+metadata file, and are listed and downloaded through the admin endpoints.
+Only the newest PROFILE_RETENTION_COUNT profiles younger than
+PROFILE_RETENTION_HOURS are kept. The response of a profiled request
+carries X-Profile-Id. One profile runs at a time per process; requests
+arriving meanwhile are served without profiling.
+"""
+import json
+import logging  # Application logging
+import os  # Operating system interface
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_MODES = ("sample", "cprofile")
+PROFILE_EXTENSIONS = {"sample": "collapsed", "cprofile": "prof"}
+TOKEN_SALT = "bookvault-profile"
+
+
+class StackSampler:
+    """Counts the collapsed stacks of one thread until stopped"""
+
+    def __init__(self, thread_id, interval):  # Special method: __init__
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler",
+                                        daemon=True)
+
+    def start(self):  # Function: start
+        self._thread.start()
+
+    def stop(self):  # Function: stop
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):  # Function: _run
+        while not self._stop.wait(self.interval):  # Loop iteration
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:  # Conditional statement
+                self.stacks[_collapse(frame)] += 1
+
+    def collapsed(self):  # Function: collapsed
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+def _collapse(frame):  # Function: _collapse
+    names = []
+    while frame is not None:  # Loop iteration
+        code = frame.f_code
+        names.append(
+            f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        )
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class RequestProfiler:
+    """WSGI middleware that profiles requests carrying a valid X-Profile token"""
+
+    def __init__(self, app=None):  # Special method: __init__
+        self.directory = "profiles"
+        self.sample_interval = 0.001
+        self.retention_count = 100
+        self.retention_seconds = 72 * 3600
+        self.token_max_age = 3600
+        self._serializer = None
+        self._busy = threading.Lock()
+        if app is not None:  # Conditional statement
+            self.init_app(app)
+
+    def init_app(self, app):  # Function: init_app
+        from itsdangerous import URLSafeTimedSerializer
+
+        self.directory = os.path.abspath(app.config.get("PROFILE_DIR", "profiles"))
+        self.sample_interval = float(
+            app.config.get("PROFILE_SAMPLE_INTERVAL_MS", 1)
+        ) / 1000.0
+        self.retention_count = int(app.config.get("PROFILE_RETENTION_COUNT", 100))
+        self.retention_seconds = float(
+            app.config.get("PROFILE_RETENTION_HOURS", 72)
+        ) * 3600
+        self.token_max_age = int(app.config.get("PROFILE_TOKEN_MAX_AGE", 3600))
+        self._serializer = URLSafeTimedSerializer(app.config["SECRET_KEY"],
+                                                  salt=TOKEN_SALT)
+        app.extensions["request_profiler"] = self
+        app.wsgi_app = self._middleware(app.wsgi_app)
+
+  # -------------------- TOKENS --------------------
+
+    def issue_token(self, issued_by, mode="sample", expires_in=None):  # Function: issue_token
+        """Signed X-Profile value; it expires after expires_in seconds"""
+        expires_in = min(int(expires_in or self.token_max_age), self.token_max_age)
+        token = self._serializer.dumps({
+            "by": issued_by, "mode": mode, "exp": int(time.time()) + expires_in
+        })
+        return token, expires_in
+
+    def verify_token(self, token):  # Function: verify_token
+        """The token's claims, or None when it is forged, stale or expired"""
+        from itsdangerous import BadSignature
+        try:  # Exception handling block
+            claims = self._serializer.loads(token, max_age=self.token_max_age)
+        except BadSignature:  # Exception handler
+            return None
+        if claims.get("exp", 0) < time.time() or claims.get("mode") not in PROFILE_MODES:  # Conditional statement
+            return None
+        return claims
+
+  # -------------------- MIDDLEWARE --------------------
+
+    def _middleware(self, wsgi_app):  # Function: _middleware
+        def profiled_app(environ, start_response):  # Function: profiled_app
+            token = environ.get("HTTP_X_PROFILE")
+            if token is None:  # Conditional statement
+                return wsgi_app(environ, start_response)
+            return self._profile(wsgi_app, environ, start_response, token)
+        return profiled_app
+
+    def _profile(self, wsgi_app, environ, start_response, token):  # Function: _profile
+        claims = self.verify_token(token)
+        if claims is None:  # Conditional statement
+            logger.warning("Ignoring invalid X-Profile header on %s %s",
+                           environ.get("REQUEST_METHOD"), environ.get("PATH_INFO"))
+            return wsgi_app(environ, start_response)
+        if not self._busy.acquire(blocking=False):  # Conditional statement
+            return wsgi_app(environ, start_response)
+
+        profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+        status = {}
+
+        def recording_start_response(code, headers, exc_info=None):  # Function: recording_start_response
+            status["code"] = int(code.split(" ", 1)[0])
+            headers = list(headers) + [("X-Profile-Id", profile_id)]
+            return start_response(code, headers, exc_info)
+
+        mode = claims["mode"]
+        started = time.perf_counter()
+        try:  # Exception handling block
+            if mode == "cprofile":  # Conditional statement
+                import cProfile
+                profiler = cProfile.Profile()
+  # Consume the body inside the profile: streamed responses do their work there
+                body = profiler.runcall(
+                    lambda: _consume(wsgi_app(environ, recording_start_response))
+                )
+            else:  # Default case
+                profiler = StackSampler(threading.get_ident(), self.sample_interval)
+                profiler.start()
+                try:  # Exception handling block
+                    body = _consume(wsgi_app(environ, recording_start_response))
+                finally:
+                    profiler.stop()
+            wall_seconds = time.perf_counter() - started
+            self._save(profile_id, mode, profiler, {
+                "method": environ.get("REQUEST_METHOD"),
+                "path": environ.get("PATH_INFO"),
+                "query": environ.get("QUERY_STRING") or None,
+                "status": status.get("code"),
+                "wall_ms": round(wall_seconds * 1000, 2),
+                "issued_by": claims.get("by"),
+            })
+        finally:
+            self._busy.release()
+        return body
+
+  # -------------------- STORAGE --------------------
+
+    def _save(self, profile_id, mode, profiler, meta):  # Function: _save
+        try:  # Exception handling block
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory,
+                                f"{profile_id}.{PROFILE_EXTENSIONS[mode]}")
+            if mode == "cprofile":  # Conditional statement
+                profiler.dump_stats(path)
+            else:  # Default case
+                meta["samples"] = sum(profiler.stacks.values())
+                meta["sample_interval_ms"] = round(self.sample_interval * 1000, 3)
+                with open(path, "w") as f:
+                    f.write(profiler.collapsed())
+            meta.update({
+                "id": profile_id,
+                "mode": mode,
+                "file": os.path.basename(path),
+                "size": os.path.getsize(path),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            })
+            with open(os.path.join(self.directory, f"{profile_id}.json"), "w") as f:
+                json.dump(meta, f)
+            logger.info("Saved %s profile %s for %s %s", mode, profile_id,
+                        meta["method"], meta["path"])
+            self.prune()
+        except OSError as e:  # Exception handler
+            logger.error("Could not save profile %s: %s", profile_id, e)
+
+    def list_profiles(self):  # Function: list_profiles
+        """Metadata of the stored profiles, newest first"""
+        if not os.path.isdir(self.directory):  # Conditional statement
+            return []
+        profiles = []
+        for name in os.listdir(self.directory):  # Loop iteration
+            if not name.endswith(".json"):  # Conditional statement
+                continue
+            try:  # Exception handling block
+                with open(os.path.join(self.directory, name)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):  # Exception handler
+                continue  # pruned or half written by another worker
+        profiles.sort(key=lambda meta: meta.get("id", ""), reverse=True)
+        return profiles
+
+    def get_profile(self, profile_id):  # Function: get_profile
+        """Metadata of one profile, or None"""
+        if not _is_profile_id(profile_id):  # Conditional statement
+            return None
+        try:  # Exception handling block
+            with open(os.path.join(self.directory, f"{profile_id}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):  # Exception handler
+            return None
+
+    def prune(self):  # Function: prune
+        """Apply PROFILE_RETENTION_COUNT and PROFILE_RETENTION_HOURS"""
+        cutoff = time.time() - self.retention_seconds
+        profiles = self.list_profiles()
+        removed = 0
+        for index, meta in enumerate(profiles):  # Loop iteration
+            path = os.path.join(self.directory, f"{meta['id']}.json")
+            try:  # Exception handling block
+                expired = os.path.getmtime(path) < cutoff
+            except OSError:  # Exception handler
+                continue
+            if index >= self.retention_count or expired:  # Conditional statement
+                for name in (meta.get("file"), f"{meta['id']}.json"):  # Loop iteration
+                    try:  # Exception handling block
+                        os.remove(os.path.join(self.directory, name))
+                    except (OSError, TypeError):  # Exception handler
+                        pass
+                removed += 1
+        return removed
+
+
+def _consume(body):  # Function: _consume
+    """Read a WSGI response body completely and close it"""
+    try:  # Exception handling block
+        return list(body)
+    finally:
+        if hasattr(body, "close"):  # Conditional statement
+            body.close()
+
+
+def _is_profile_id(value):  # Function: _is_profile_id
+  # Ids are generated here; anything else could be a path traversal attempt
+    return bool(value) and all(c.isalnum() or c == "-" for c in value)
+
+
+request_profiler = RequestProfiler()
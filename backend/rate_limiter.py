@@ -5,6 +5,7 @@ from datetime import datetime, timedelta  # Date and time handling
 import threading
 from functools import wraps
 from flask import request, jsonify  # Flask web framework components
+import metrics
 
   # In-memory store for rate limiting (in production, use Redis)
 rate_limit_store = {}
@@ -42,6 +43,7 @@ def rate_limit(max_requests=10, window_minutes=1):  # Function: rate_limit
 
   # Check if limit exceeded
                 if len(rate_limit_store[key]) >= max_requests:  # Conditional statement
+                    metrics.rate_limit_rejected(f.__name__)
                     return jsonify({
                         'error': 'Rate limit exceeded',
                         'message': (
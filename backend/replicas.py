@@ -0,0 +1,254 @@
+"""
+Read-replica routing
+
+With DATABASE_REPLICA_URLS set (comma separated), views decorated with
+@replica_reads run their queries against a read replica; everything else,
+and every flush, uses the primary. Each replica is an extra
+SQLALCHEMY_BINDS entry ("replica_0", "replica_1", ...) with the same pool
+options as the primary, and RoutingSession (db.py) picks the engine.
+
+- Replicas are used round-robin. One that fails a query, fails the
+  periodic probe, or lags more than REPLICA_MAX_LAG_SECONDS behind
+  (PostgreSQL) is skipped until a later probe succeeds.
+- Read-your-writes: a successful POST/PATCH/PUT/DELETE pins the user to the
+  primary for REPLICA_PIN_SECONDS. The pin travels with the client, so it
+  holds whichever worker serves the next read: the response carries a
+  signed token (user id and expiry) in the X-Last-Write header and a
+  cookie of the same name, and @replica_reads uses the primary while a
+  request sends back a valid, unexpired token for its user (header first;
+  the web client echoes the header). The worker that took the write also
+  remembers the pin, for clients that send neither.
+
+Local testing: point DATABASE_URL and DATABASE_REPLICA_URLS at two SQLite
+files (copy the primary file to create the "replica") or two local
+PostgreSQL databases.
+"""
+import itertools
+import logging  # Application logging
+import threading
+import time
+from functools import wraps
+
+from flask import g, request  # Flask web framework components
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import event, exc, text  # Database ORM components
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_PREFIX = "replica_"
+
+  # Methods that may change data and therefore pin the user to the primary
+WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+  # Response header and cookie carrying the signed read-your-writes pin
+PIN_HEADER = "X-Last-Write"
+
+
+def replica_binds(urls, engine_options):  # Function: replica_binds
+    """SQLALCHEMY_BINDS entries for the replica URLs (used by Config)"""
+    return {
+        f"{REPLICA_BIND_PREFIX}{i}": dict(engine_options, url=url)
+        for i, url in enumerate(urls)
+    }
+
+
+class ReplicaRouter:
+    """Chooses a healthy replica per request and tracks read-your-writes pins"""
+
+    def __init__(self, app=None):  # Special method: __init__
+        self.enabled = False
+        self.pin_seconds = 5.0
+        self.check_seconds = 10.0
+        self.max_lag_seconds = 30.0
+        self._keys = []
+        self._engines = {}
+        self._down_until = {}  # bind key -> monotonic time it is skipped until
+        self._next_probe = {}  # bind key -> monotonic time of the next probe
+        self._pins = {}  # user id -> monotonic time the pin expires
+        self._signer = None
+        self._cycle = itertools.cycle(())
+        self._lock = threading.Lock()
+        if app is not None:  # Conditional statement
+            self.init_app(app)
+
+    def init_app(self, app):  # Function: init_app
+        """Find the replica engines and register the pinning hook"""
+        from db import db
+
+        self.pin_seconds = float(app.config.get("REPLICA_PIN_SECONDS", 5))
+        self.check_seconds = float(app.config.get("REPLICA_CHECK_SECONDS", 10))
+        self.max_lag_seconds = float(
+            app.config.get("REPLICA_MAX_LAG_SECONDS", 30)
+        )
+        app.extensions["replica_router"] = self
+        self._signer = URLSafeSerializer(app.config["SECRET_KEY"],
+                                         salt="replica-pin")
+        with app.app_context():
+            self._engines = {
+                key: engine for key, engine in db.engines.items()
+                if key and key.startswith(REPLICA_BIND_PREFIX)
+            }
+        self._keys = sorted(self._engines)
+        self._cycle = itertools.cycle(self._keys)
+        self.enabled = bool(self._keys)
+        if not self.enabled:  # Conditional statement
+            return
+
+        for key, engine in self._engines.items():  # Loop iteration
+            event.listen(engine, "handle_error", self._on_error(key))
+        logger.info("Read replicas enabled: %d replica(s), pin %.0fs",
+                    len(self._keys), self.pin_seconds)
+
+        @app.after_request
+        def pin_writers_to_primary(response):  # Function: pin_writers_to_primary
+            if request.method in WRITE_METHODS and response.status_code < 400:  # Conditional statement
+                user_id = _current_user_id()
+                if user_id is not None:  # Conditional statement
+                    self.pin(user_id)
+                    token = self.pin_token(user_id)
+                    response.headers[PIN_HEADER] = token
+                    response.set_cookie(
+                        PIN_HEADER, token, max_age=max(1, int(self.pin_seconds)),
+                        secure=request.is_secure, httponly=True,
+                        samesite="None" if request.is_secure else "Lax"
+                    )
+            return response
+
+    def _on_error(self, key):  # Function: _on_error
+        def mark_down(context):  # Function: mark_down
+            if isinstance(context.original_exception, exc.DBAPIError) or \
+                    context.is_disconnect:  # Conditional statement
+                self.mark_down(key, context.original_exception)
+        return mark_down
+
+    def mark_down(self, key, reason=None):  # Function: mark_down
+        with self._lock:
+            already_down = key in self._down_until
+            self._down_until[key] = time.monotonic() + self.check_seconds
+        if not already_down:  # Conditional statement
+            logger.warning("Replica %s marked down: %s", key, reason)
+
+    def pin(self, user_id):  # Function: pin
+        """Send this user's reads to the primary for pin_seconds"""
+        now = time.monotonic()
+        with self._lock:
+            self._pins[user_id] = now + self.pin_seconds
+  # Drop expired pins so the dict stays small
+            if len(self._pins) > 1000:  # Conditional statement
+                self._pins = {
+                    uid: until for uid, until in self._pins.items()
+                    if until > now
+                }
+
+    def pin_token(self, user_id):  # Function: pin_token
+        """Signed pin for the client: the user id and the expiry (epoch seconds)"""
+        return self._signer.dumps([user_id, time.time() + self.pin_seconds])
+
+    def is_pinned(self, user_id, token=None):  # Function: is_pinned
+        """Pinned by this process, or by a valid pin token from the client"""
+        until = self._pins.get(user_id)
+        if until is not None and until > time.monotonic():  # Conditional statement
+            return True
+        if not token:  # Conditional statement
+            return False
+        try:  # Exception handling block
+            pinned_user, expires = self._signer.loads(token)
+        except (BadSignature, TypeError, ValueError):  # Exception handler
+            return False
+        return pinned_user == user_id and expires > time.time()
+
+    def choose(self):  # Function: choose
+        """Bind key of the next healthy replica, or None for the primary"""
+        for _ in range(len(self._keys)):  # Loop iteration
+            with self._lock:
+                key = next(self._cycle)
+            if self._is_usable(key):  # Conditional statement
+                return key
+        return None
+
+    def _is_usable(self, key):  # Function: _is_usable
+        now = time.monotonic()
+        down_until = self._down_until.get(key)
+        if down_until is not None and down_until > now:  # Conditional statement
+            return False
+        if down_until is None and self._next_probe.get(key, 0) > now:  # Conditional statement
+            return True
+  # Probe due, or a down replica is up for a retry; moving _next_probe first
+  # keeps other threads from probing the same replica meanwhile
+        with self._lock:
+            self._next_probe[key] = now + self.check_seconds
+        healthy = self.probe(key)
+        with self._lock:
+            if healthy:  # Conditional statement
+                if self._down_until.pop(key, None) is not None:  # Conditional statement
+                    logger.info("Replica %s is back", key)
+            else:  # Default case
+                self._down_until[key] = now + self.check_seconds
+        return healthy
+
+    def probe(self, key):  # Function: probe
+        """SELECT 1 on the replica, plus the replay lag on PostgreSQL"""
+        engine = self._engines[key]
+        try:  # Exception handling block
+            with engine.connect() as conn:
+                if engine.dialect.name == "postgresql":  # Conditional statement
+  # An idle but fully replayed replica counts as zero lag
+                    lag = conn.execute(text(
+                        "SELECT CASE WHEN pg_last_wal_receive_lsn() = "
+                        "pg_last_wal_replay_lsn() THEN 0 ELSE EXTRACT(EPOCH "
+                        "FROM now() - pg_last_xact_replay_timestamp()) END"
+                    )).scalar()
+                    if lag is not None and lag > self.max_lag_seconds:  # Conditional statement
+                        logger.warning("Replica %s lags %.1fs behind", key, lag)
+                        return False
+                else:  # Default case
+                    conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:  # Exception handler
+            logger.warning("Replica %s failed its health check: %s", key, e)
+            return False
+
+    def status(self):  # Function: status
+        """Health of every replica, for diagnostics"""
+        now = time.monotonic()
+        return {
+            key: ("down" if self._down_until.get(key, 0) > now else "up")
+            for key in self._keys
+        }
+
+
+def _current_user_id():  # Function: _current_user_id
+    from flask_jwt_extended import get_jwt
+    try:  # Exception handling block
+        return get_jwt().get("id")
+    except RuntimeError:  # Exception handler
+        return None  # no JWT verified for this request
+
+
+def use_primary():  # Function: use_primary
+    """Send the rest of this request's reads to the primary"""
+    if (g.get("_db_pool") or "").startswith(REPLICA_BIND_PREFIX):  # Conditional statement
+        g._db_pool = None
+
+
+def replica_reads(fn):  # Function: replica_reads
+    """
+    Decorator for read-only views: run their queries on a replica unless
+    replicas are disabled or down, or the user wrote recently. Place it
+    below @jwt_required() so the user is known.
+    """
+    @wraps(fn)  # Decorator: wraps
+    def wrapper(*args, **kwargs):  # Function: wrapper
+        if replica_router.enabled:  # Conditional statement
+            user_id = _current_user_id()
+            token = (request.headers.get(PIN_HEADER)
+                     or request.cookies.get(PIN_HEADER))
+            if user_id is None or not replica_router.is_pinned(user_id, token):  # Conditional statement
+                key = replica_router.choose()
+                if key is not None:  # Conditional statement
+                    g._db_pool = key
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+replica_router = ReplicaRouter()
@@ -0,0 +1,272 @@
+"""
+Admin-only diagnostics endpoints
+
+Everything here requires an access token with the "admin" role.
+"""
+import os  # Operating system interface
+
+from flask import Blueprint, request, jsonify, send_from_directory  # Flask web framework components
+from flask_jwt_extended import get_jwt, jwt_required  # Flask web framework components
+from auth.decorators import require_role
+from memory_diagnostics import KEY_TYPES, SnapshotNotFound, memory_diagnostics
+from profiling import PROFILE_HEADER, PROFILE_MODES, request_profiler
+from slow_queries import slow_query_log
+
+admin_endpoint = Blueprint('admin', __name__)
+
+
+@admin_endpoint.route("/v1/admin/slow-queries", methods=["GET"])
+@jwt_required()  # Requires valid JWT token for access
+@require_role("admin")  # Decorator: require_role
+def get_slow_queries():  # Getter method for slow_queries
+    """
+    Most recent slow SQL statements recorded by this worker.
+
+    Query parameters:
+    - limit: Number of entries to return (default: 50, max: 500)
+    - endpoint: Only return statements issued by this endpoint
+    """
+    limit = request.args.get("limit", 50, type=int)
+    if limit < 1 or limit > 500:  # Conditional statement
+        return jsonify({
+            "error": "Bad request",
+            "message": "Limit must be between 1 and 500"
+        }), 400
+
+    entries = slow_query_log.snapshot()
+    endpoint = request.args.get("endpoint")
+    if endpoint:  # Conditional statement
+        entries = [e for e in entries if e["endpoint"] == endpoint]
+
+    return jsonify({
+        "threshold_ms": round(slow_query_log.threshold_seconds * 1000, 2),
+        "total": len(entries),
+        "items": entries[:limit]
+    }), 200
+
+
+@admin_endpoint.route("/v1/admin/slow-queries", methods=["DELETE"])
+@jwt_required()  # Requires valid JWT token for access
+@require_role("admin")  # Decorator: require_role
+def clear_slow_queries():  # Function: clear_slow_queries
+    """Empty this worker's slow-query ring buffer."""
+    slow_query_log.clear()
+    return jsonify({"message": "Slow query log cleared"}), 200
+
+
+@admin_endpoint.route("/v1/admin/profiles/token", methods=["POST"])
+@jwt_required()  # Requires valid JWT token for access
+@require_role("admin")  # Decorator: require_role
+def create_profile_token():  # Function: create_profile_token
+    """
+    Issue a signed token for the X-Profile header (see profiling.py).
+
+    JSON body (optional):
+    - mode: "sample" (collapsed stacks, default) or "cprofile"
+    - expires_in: Token lifetime in seconds (default and max: PROFILE_TOKEN_MAX_AGE)
+    """
+    data = request.get_json(silent=True) or {}
+    mode = data.get("mode", "sample")
+    if mode not in PROFILE_MODES:  # Conditional statement
+        return jsonify({
+            "error": "Bad request",
+            "message": f"mode must be one of: {', '.join(PROFILE_MODES)}"
+        }), 400
+    expires_in = data.get("expires_in")
+    if expires_in is not None and (not isinstance(expires_in, int) or expires_in < 1):  # Conditional statement
+        return jsonify({
+            "error": "Bad request",
+            "message": "expires_in must be a positive number of seconds"
+        }), 400
+
+    token, expires_in = request_profiler.issue_token(
+        get_jwt().get("id"), mode=mode, expires_in=expires_in
+    )
+    return jsonify({
+        "header": PROFILE_HEADER,
+        "token": token,
+        "mode": mode,
+        "expires_in": expires_in
+    }), 201
+
+
+@admin_endpoint.route("/v1/admin/profiles", methods=["GET"])
+@jwt_required()  # Requires valid JWT token for access
+@require_role("admin")  # Decorator: require_role
+def get_profiles():  # Getter method for profiles
+    """
+    Stored request profiles, newest first.
+
+    Query parameters:
+    - limit: Number of entries to return (default: 50, max: 500)
+    - path: Only return profiles of this request path
+    """
+    limit = request.args.get("limit", 50, type=int)
+    if limit < 1 or limit > 500:  # Conditional statement
+        return jsonify({
+            "error": "Bad request",
+            "message": "Limit must be between 1 and 500"
+        }), 400
+
+    profiles = request_profiler.list_profiles()
+    path = request.args.get("path")
+    if path:  # Conditional statement
+        profiles = [p for p in profiles if p.get("path") == path]
+
+    return jsonify({
+        "total": len(profiles),
+        "items": profiles[:limit]
+    }), 200
+
+
+@admin_endpoint.route("/v1/admin/profiles/<profile_id>", methods=["GET"])
+@jwt_required()  # Requires valid JWT token for access
+@require_role("admin")  # Decorator: require_role
+def download_profile(profile_id):  # Function: download_profile
+    """Download one profile (.collapsed stacks or .prof cProfile stats)."""
+    meta = request_profiler.get_profile(profile_id)
+    if meta is None:  # Conditional statement
+        return jsonify({
+            "error": "Not found",
+            "message": "Profile not found"
+        }), 404
+    return send_from_directory(request_profiler.directory, meta["file"],
+                               as_attachment=True)
+
+
+  # -------------------- MEMORY DIAGNOSTICS --------------------
+  # Per worker; every response carries the pid and ?pid= pins the worker
+  # (see memory_diagnostics.py and `flask memory`)
+
+
+def _wrong_worker():  # Function: _wrong_worker
+    pid = request.args.get("pid", type=int)
+    if pid is not None and pid != os.getpid():  # Conditional statement
+        return jsonify({
+            "error": "Wrong worker",
+            "message": f"This is worker {os.getpid()}, not {pid}",
+            "pid": os.getpid()
+        }), 409
+    return None
+
+
+def _snapshot_options():  # Function: _snapshot_options
+    data = request.get_json(silent=True) or {}
+    limit = request.args.get("limit", data.get("limit", 20), type=int)
+    key_type = request.args.get("key_type", data.get("key_type", "lineno"))
+    compare_to = request.args.get("compare_to", data.get("compare_to"))
+    if not 1 <= limit <= 500 or key_type not in KEY_TYPES:  # Conditional statement
+        return None
+    return limit, key_type, compare_to
+
+
+def _bad_snapshot_options():  # Function: _bad_snapshot_options
+    return jsonify({
+        "error": "Bad request",
+        "message": f"limit must be between 1 and 500 and key_type one of: {', '.join(KEY_TYPES)}"
+    }), 400
+
+
+def _snapshot_not_found(error):  # Function: _snapshot_not_found
+    return jsonify({
+        "error": "Not found",
+        "message": f"Snapshot {error.args[0]} not found in worker {os.getpid()}",
+        "pid": os.getpid(),
+        "snapshots": [s["id"] for s in memory_diagnostics.snapshots()]
+    }), 404
+
+
+@admin_endpoint.route("/v1/admin/memory", methods=["GET"])
+@jwt_required()  # Requires valid JWT token for access
+@require_role("admin")  # Decorator: require_role
+def get_memory_report():  # Getter method for memory_report
+    """RSS, GC counts, threads, in-process structure sizes and tracemalloc state."""
+    return _wrong_worker() or (jsonify(memory_diagnostics.report()), 200)
+
+
+@admin_endpoint.route("/v1/admin/memory/tracemalloc", methods=["POST"])
+@jwt_required()  # Requires valid JWT token for access
+@require_role("admin")  # Decorator: require_role
+def toggle_tracemalloc():  # Function: toggle_tracemalloc
+    """
+    Start or stop tracemalloc in this worker.
+
+    JSON body:
+    - enabled: true to start, false to stop (drops the snapshots)
+    - frames: Traceback depth to record (default: 10)
+    """
+    wrong = _wrong_worker()
+    if wrong:  # Conditional statement
+        return wrong
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get("enabled"), bool):  # Conditional statement
+        return jsonify({
+            "error": "Bad request",
+            "message": "enabled (true or false) is required"
+        }), 400
+    if data["enabled"]:  # Conditional statement
+        changed = memory_diagnostics.start(data.get("frames", 10))
+    else:  # Default case
+        changed = memory_diagnostics.stop()
+    return jsonify({
+        "pid": os.getpid(),
+        "tracing": data["enabled"],
+        "changed": changed
+    }), 200
+
+
+@admin_endpoint.route("/v1/admin/memory/snapshots", methods=["POST"])
+@jwt_required()  # Requires valid JWT token for access
+@require_role("admin")  # Decorator: require_role
+def take_memory_snapshot():  # Function: take_memory_snapshot
+    """
+    Take a tracemalloc snapshot in this worker.
+
+    Returns its top allocation sites, or with compare_to the sites that
+    grew most since that snapshot. Options (JSON body or query string):
+    limit (default 20), key_type (lineno, filename, traceback), compare_to.
+    """
+    wrong = _wrong_worker()
+    if wrong:  # Conditional statement
+        return wrong
+    options = _snapshot_options()
+    if options is None:  # Conditional statement
+        return _bad_snapshot_options()
+    limit, key_type, compare_to = options
+    try:  # Exception handling block
+        snapshot_id = memory_diagnostics.take_snapshot()
+        if compare_to is not None:  # Conditional statement
+            result = memory_diagnostics.diff(compare_to, snapshot_id, limit, key_type)
+        else:  # Default case
+            result = memory_diagnostics.top(snapshot_id, limit, key_type)
+    except RuntimeError as e:  # Exception handler
+        return jsonify({
+            "error": "Conflict",
+            "message": f"{e}; start it with POST /v1/admin/memory/tracemalloc",
+            "pid": os.getpid()
+        }), 409
+    except SnapshotNotFound as e:  # Exception handler
+        return _snapshot_not_found(e)
+    return jsonify(dict(result, id=snapshot_id, pid=os.getpid())), 201
+
+
+@admin_endpoint.route("/v1/admin/memory/snapshots/<snapshot_id>", methods=["GET"])
+@jwt_required()  # Requires valid JWT token for access
+@require_role("admin")  # Decorator: require_role
+def get_memory_snapshot(snapshot_id):  # Getter method for memory_snapshot
+    """Top allocation sites of a snapshot, or its diff against ?compare_to=."""
+    wrong = _wrong_worker()
+    if wrong:  # Conditional statement
+        return wrong
+    options = _snapshot_options()
+    if options is None:  # Conditional statement
+        return _bad_snapshot_options()
+    limit, key_type, compare_to = options
+    try:  # Exception handling block
+        if compare_to is not None:  # Conditional statement
+            result = memory_diagnostics.diff(compare_to, snapshot_id, limit, key_type)
+        else:  # Default case
+            result = memory_diagnostics.top(snapshot_id, limit, key_type)
+    except SnapshotNotFound as e:  # Exception handler
+        return _snapshot_not_found(e)
+    return jsonify(dict(result, pid=os.getpid())), 200
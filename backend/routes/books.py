@@ -12,13 +12,18 @@ All endpoints require JWT authentication and operate on user-specific data.
 """
 from flask import Blueprint, request, jsonify  # Flask web framework components
 from flask_jwt_extended import jwt_required, get_jwt  # Flask web framework components
-from models import (Books, BooksSchema, NotesSchema, Notes, UserSettings,
-                    BooksStatusSchema, Profile)
-from db import db
+from models import Books, Notes, UserSettings, BooksStatusSchema, Profile
+from db import db, commit_session, transactional
+from replicas import replica_reads, use_primary
+from serializers import book_status_rows, books_rows, notes_rows
+from isbn_cache import isbn_membership, remember_owner
+from note_import import insert_notes, note_values
 from routes.tasks import _create_task
+from write_buffer import progress_buffer
 from security import sanitize_input, check_sql_injection, validate_isbn as security_validate_isbn
 import json
 import logging  # Application logging
+from sqlalchemy import case, func  # Database ORM components
 from sqlalchemy.exc import IntegrityError  # Database ORM components
 from decimal import Decimal, InvalidOperation
 import re
@@ -28,6 +33,117 @@ logger = logging.getLogger(__name__)
 
 books_endpoint = Blueprint('books', __name__)
 
+VALID_STATUSES = ["To be read", "Currently reading", "Read"]
+
+  # PATCH payloads made only of these keys skip the ORM and run as one UPDATE
+FAST_PATH_FIELDS = frozenset({"current_page", "rating", "status"})
+
+  # current_page and total_pages are 32-bit INTEGER columns
+MAX_PAGE_NUMBER = 2 ** 31 - 1
+
+  # Most ISBNs accepted by one POST /v1/books/lookup
+LOOKUP_MAX_ISBNS = 500
+
+  # Most operations accepted by one POST /v1/books/batch
+BATCH_MAX_OPERATIONS = 500
+
+  # Most notes accepted by one POST /v1/books/<id>/notes/batch
+NOTES_BATCH_MAX = 1000
+
+  # Schemas hold no per-request state; list endpoints use serializers.py
+book_status_schema = BooksStatusSchema()
+
+
+def requested_book_rows():  # Function: requested_book_rows
+    """
+    books_rows narrowed to the comma-separated ?fields= list (the columns
+    that are not listed are not selected). Raises ValueError for unknown
+    field names.
+    """
+    fields = request.args.get("fields", "").strip()
+    if not fields:  # Conditional statement
+        return books_rows
+    return books_rows.only(fields.split(","))
+
+
+def requested_includes(allowed):  # Function: requested_includes
+    """
+    Names from the comma-separated ?include= list (related data embedded in
+    the response). Raises ValueError for names not in `allowed`.
+    """
+    include = {
+        name.strip() for name in request.args.get("include", "").split(",")
+        if name.strip()
+    }
+    unknown = include.difference(allowed)
+    if unknown:  # Conditional statement
+        raise ValueError(
+            f"Unknown include: {', '.join(sorted(unknown))}. "
+            f"Available: {', '.join(sorted(allowed))}"
+        )
+    return include
+
+
+def _bad_request(error):  # Function: _bad_request
+    return jsonify({"error": "Bad request", "message": str(error)}), 400
+
+
+def embed_notes(claim_id, items):  # Function: embed_notes
+    """Add each book's notes to its item, with one query for the whole page"""
+    by_book = {}
+    for item in items:  # Loop iteration
+        item["notes"] = by_book.setdefault(item["id"], [])
+    if not by_book:  # Conditional statement
+        return items
+    rows = Notes.query.with_entities(Notes.book_id, *notes_rows.columns).filter(
+        Notes.owner_id == claim_id, Notes.book_id.in_(list(by_book))
+    ).order_by(Notes.id).all()
+    for row, note in zip(rows, notes_rows.dump(row[1:] for row in rows)):  # Loop iteration
+        by_book[row[0]].append(note)
+    return items
+
+
+def library_stats(claim_id):  # Function: library_stats
+    """Reading statistics of one user's library, in a single aggregate query"""
+  # Aggregates are computed in SQL, so write out buffered progress first
+    if progress_buffer.has_pending_for_owner(claim_id):  # Conditional statement
+        progress_buffer.flush()
+        use_primary()  # replicas have not seen the flush yet
+
+    in_progress = db.and_(Books.current_page > 0, Books.total_pages > 0)
+
+    def count_status(status):  # Function: count_status
+        return func.coalesce(
+            func.sum(case((Books.reading_status == status, 1), else_=0)), 0
+        )
+
+    row = Books.query.with_entities(
+        func.count(Books.id),
+        count_status("To be read"),
+        count_status("Currently reading"),
+        count_status("Read"),
+        func.coalesce(func.sum(case((in_progress, Books.current_page), else_=0)), 0),
+        func.coalesce(func.sum(case((in_progress, Books.total_pages), else_=0)), 0),
+        func.sum(Books.rating),
+        func.count(Books.rating),
+    ).filter(Books.owner_id == claim_id).one()
+    (total_books, to_be_read, currently_reading, read, total_pages_read,
+     total_pages_all, rating_sum, rated_books_count) = row
+
+    avg_rating = (float(rating_sum) / rated_books_count
+                  if rated_books_count else None)  # Conditional statement
+    return {
+        "total_books": total_books,
+        "to_be_read": to_be_read,
+        "currently_reading": currently_reading,
+        "read": read,
+        "total_pages_read": int(total_pages_read),
+        "total_pages_all": int(total_pages_all),
+        "average_rating": (round(avg_rating, 2)
+                           if avg_rating else None),  # Conditional statement
+        "rated_books_count": rated_books_count
+    }
+
 
 def validate_isbn(isbn):  # Function: validate_isbn
     """
@@ -78,13 +194,16 @@ def get_book_reading_status(isbn):  # Getter method for book_reading_status
                            "ISBN-10 or ISBN-13.")
             }), 400
 
+  # Always the database: the per-worker ISBN cache may not know a book that
+  # another worker just added (it only serves POST /v1/books/lookup)
         book = Books.query.filter(
             Books.owner_id == claim_id, Books.isbn == isbn
         ).first()
 
         if book:  # Conditional statement
-            books_status_schema = BooksStatusSchema(many=False)
-            return jsonify(books_status_schema.dump(book)), 200
+            book_data = book_status_schema.dump(book)
+            progress_buffer.overlay("books", [book_data])
+            return jsonify(book_data), 200
         else:  # Default case
             return jsonify({
                 "error": "Not found",
@@ -99,8 +218,78 @@ def get_book_reading_status(isbn):  # Getter method for book_reading_status
         }), 500
 
 
+@books_endpoint.route("/v1/books/lookup", methods=["POST"])
+@jwt_required()  # Requires valid JWT token for access
+def lookup_books():  # Function: lookup_books
+    """
+    Check many ISBNs (e.g. a page of search results) at once.
+
+    Expected JSON payload:
+    {
+        "isbns": ["9780134685991", "0-13-468599-1", ...]  // at most 500
+    }
+
+    Returns {"results": {isbn: status or null}, "found": n, "invalid": [...]}
+    keyed by the ISBNs as sent; a status is what GET /v1/books/<isbn>
+    returns, null means not in the library (or an invalid ISBN, which is
+    also listed in "invalid").
+    """
+    try:  # Exception handling block
+        claim_id = get_jwt()["id"]
+
+        payload = request.get_json(silent=True) or {}
+        isbns = payload.get("isbns") if isinstance(payload, dict) else None
+        if (not isinstance(isbns, list)
+                or not all(isinstance(isbn, str) for isbn in isbns)):  # Conditional statement
+            return jsonify({
+                "error": "Bad request",
+                "message": "isbns must be a list of strings"
+            }), 400
+        if len(isbns) > LOOKUP_MAX_ISBNS:  # Conditional statement
+            return jsonify({
+                "error": "Bad request",
+                "message": f"At most {LOOKUP_MAX_ISBNS} ISBNs per request"
+            }), 400
+
+        cleaned = {isbn: validate_isbn(isbn.strip()) for isbn in isbns}
+        members = isbn_membership.isbns(claim_id)
+        wanted = {isbn for isbn in cleaned.values() if isbn in members}
+
+  # One indexed IN query for the ISBNs that are in the library at all
+        statuses = {}
+        if wanted:  # Conditional statement
+            rows = Books.query.with_entities(
+                Books.isbn, *book_status_rows.columns
+            ).filter(
+                Books.owner_id == claim_id, Books.isbn.in_(wanted)
+            ).order_by(Books.id).all()
+            items = progress_buffer.overlay(
+                "books", book_status_rows.dump(row[1:] for row in rows)
+            )
+            for row, item in zip(rows, items):  # Loop iteration
+                statuses.setdefault(row[0], item)
+
+        results = {
+            isbn: statuses.get(clean) if clean else None
+            for isbn, clean in cleaned.items()
+        }
+        return jsonify({
+            "results": results,
+            "found": sum(1 for status in results.values() if status),
+            "invalid": [isbn for isbn, clean in cleaned.items() if not clean]
+        }), 200
+
+    except Exception as e:  # Exception handler
+        logger.error("Error looking up books: %s", e)
+        return jsonify({
+            "error": "Internal server error",
+            "message": "An unexpected error occurred"
+        }), 500
+
+
 @books_endpoint.route("/v1/books", methods=["GET"])
 @jwt_required()  # Requires valid JWT token for access
+@replica_reads
 def get_books():  # Getter method for books
     """
     Get books in user's library with pagination and filtering.
@@ -110,10 +299,21 @@ def get_books():  # Getter method for books
       "Read")
     - limit: Number of books per page (default: 25, max: 100)
     - offset: Page number (default: 1)
+    - fields: Comma-separated fields to return, e.g.
+      "title,author,isbn,reading_status,current_page,total_pages"
+      (default: all; id is always included)
+    - include: Comma-separated related data to embed: "notes" (each item's
+      notes), "stats" (the library statistics of /v1/books/stats)
     """
     try:  # Exception handling block
         claim_id = get_jwt()["id"]
 
+        try:  # Exception handling block
+            rows = requested_book_rows()
+            include = requested_includes(("notes", "stats"))
+        except ValueError as e:  # Exception handler
+            return _bad_request(e)
+
   # Parse pagination parameters
         limit = request.args.get('limit', 25, type=int)
         offset = request.args.get('offset', 1, type=int)
@@ -145,8 +345,10 @@ def get_books():  # Getter method for books
   # Parse search query
         search_query = request.args.get("search", "").strip()
 
-  # Build query
-        query = Books.query.filter(Books.owner_id == claim_id)
+  # Build query (only the columns the response needs, as rows)
+        query = Books.query.with_entities(*rows.columns).filter(
+            Books.owner_id == claim_id
+        )
 
         if query_status:  # Conditional statement
             query = query.filter(Books.reading_status == query_status)
@@ -167,10 +369,10 @@ def get_books():  # Getter method for books
         )
 
   # Serialize response
-        books_schema = BooksSchema(many=True)
-
         response_data = {
-            "items": books_schema.dump(books.items),
+            "items": progress_buffer.overlay(
+                "books", rows.dump(books.items)
+            ),
             "meta": {
                 "page": books.page,
                 "per_page": books.per_page,
@@ -181,6 +383,10 @@ def get_books():  # Getter method for books
                 "offset": (books.page - 1) * books.per_page
             }
         }
+        if "notes" in include:  # Conditional statement
+            embed_notes(claim_id, response_data["items"])
+        if "stats" in include:  # Conditional statement
+            response_data["stats"] = library_stats(claim_id)
 
         return jsonify(response_data), 200
 
@@ -194,6 +400,7 @@ def get_books():  # Getter method for books
 
 @books_endpoint.route("/v1/books", methods=["POST"])
 @jwt_required()  # Requires valid JWT token for access
+@transactional
 def add_book():  # Function: add_book
     """
         Add book to list
@@ -246,41 +453,18 @@ def add_book():  # Function: add_book
             'message': 'No JSON data provided'
         }), 400
 
-    required_fields = ['title', 'isbn']
-    for field in required_fields:  # Loop iteration
-        if field not in request.json or not request.json[field]:  # Conditional statement
-            return jsonify({
-                'error': 'Bad request',
-                'message': f'Missing required field: {field}'
-            }), 400
-
-  # Validate ISBN format
-    isbn = validate_isbn(request.json["isbn"].strip())
-    if not isbn:  # Conditional statement
-        return jsonify({
-            'error': 'Bad request',
-            'message': ('Invalid ISBN format. Please provide a valid '
-                       'ISBN-10 or ISBN-13.')
-        }), 400
-  # Validate and sanitize title
-    title = sanitize_input(request.json["title"].strip())
-    if not title or len(title) > 500:  # Conditional statement
-        return jsonify({
-            'error': 'Bad request',
-            'message': 'Title must be between 1 and 500 characters'
-        }), 400
-    
-    if check_sql_injection(title):  # Conditional statement
+    values, message = _new_book_values(request.json)
+    if message:  # Conditional statement
         return jsonify({
             'error': 'Bad request',
-            'message': 'Invalid characters in title'
+            'message': message
         }), 400
 
     claim_id = get_jwt()["id"]
 
   # Check if book already exists for this user
     existing_book = Books.query.filter(
-        Books.owner_id == claim_id, Books.isbn == isbn
+        Books.owner_id == claim_id, Books.isbn == values["isbn"]
     ).first()
     if existing_book:  # Conditional statement
         return jsonify({
@@ -288,59 +472,8 @@ def add_book():  # Function: add_book
             'message': 'Book already exists in your library'
         }), 409
 
-    author = sanitize_input(request.json.get("author", "").strip()) or None
-    description = sanitize_input(request.json.get("description", "").strip()) or None
-    
-  # Additional validation for author and description
-    if author and check_sql_injection(author):  # Conditional statement
-        return jsonify({
-            'error': 'Bad request',
-            'message': 'Invalid characters in author field'
-        }), 400
-    
-    if description and check_sql_injection(description):  # Conditional statement
-        return jsonify({
-            'error': 'Bad request',
-            'message': 'Invalid characters in description field'
-        }), 400
-
-    reading_status = request.json.get("reading_status", "To be read")
-    if reading_status not in ["To be read", "Currently reading", "Read"]:  # Conditional statement
-        reading_status = "To be read"
-
-    current_page = request.json.get("current_page", 0)
-    total_pages = request.json.get("total_pages", 0)
-  # Validate page numbers
     try:  # Exception handling block
-        current_page = int(current_page) if current_page is not None else 0
-        total_pages = int(total_pages) if total_pages is not None else 0
-        if current_page < 0 or total_pages < 0:  # Conditional statement
-            return jsonify({
-                'error': 'Bad request',
-                'message': 'Page numbers cannot be negative'
-            }), 400
-        if current_page > total_pages and total_pages > 0:  # Conditional statement
-            return jsonify({
-                'error': 'Bad request',
-                'message': 'Current page cannot exceed total pages'
-            }), 400
-    except (ValueError, TypeError):  # Exception handler
-        return jsonify({
-            'error': 'Bad request',
-            'message': 'Page numbers must be integers'
-        }), 400
-
-    try:  # Exception handling block
-        new_book = Books(  # type: ignore
-            owner_id=claim_id,
-            title=title,
-            isbn=isbn,
-            description=description,
-            reading_status=reading_status,
-            current_page=current_page,
-            total_pages=total_pages,
-            author=author
-        )
+        new_book = Books(owner_id=claim_id, **values)  # type: ignore
         new_book.save_to_db()
         return jsonify({
             'message': 'Book added to library successfully.',
@@ -369,8 +502,73 @@ def add_book():  # Function: add_book
         }), 500
 
 
+def _new_book_values(payload):  # Function: _new_book_values
+    """
+    Validate a new book (POST /v1/books, batch "create") without touching
+    the database.
+
+    Returns (column values, None) or (None, error message).
+    """
+    for field in ('title', 'isbn'):  # Loop iteration
+        if not payload.get(field):  # Conditional statement
+            return None, f'Missing required field: {field}'
+        if not isinstance(payload[field], str):  # Conditional statement
+            return None, f'{field.capitalize()} must be a string'
+
+  # Validate ISBN format
+    isbn = validate_isbn(payload["isbn"].strip())
+    if not isbn:  # Conditional statement
+        return None, ('Invalid ISBN format. Please provide a valid '
+                      'ISBN-10 or ISBN-13.')
+  # Validate and sanitize title
+    title = sanitize_input(payload["title"].strip())
+    if not title or len(title) > 500:  # Conditional statement
+        return None, 'Title must be between 1 and 500 characters'
+    if check_sql_injection(title):  # Conditional statement
+        return None, 'Invalid characters in title'
+
+    author = sanitize_input(str(payload.get("author") or "").strip()) or None
+    description = sanitize_input(str(payload.get("description") or "").strip()) or None
+
+  # Additional validation for author and description
+    if author and check_sql_injection(author):  # Conditional statement
+        return None, 'Invalid characters in author field'
+    if description and check_sql_injection(description):  # Conditional statement
+        return None, 'Invalid characters in description field'
+
+    reading_status = payload.get("reading_status", "To be read")
+    if reading_status not in VALID_STATUSES:  # Conditional statement
+        reading_status = "To be read"
+
+  # Validate page numbers
+    try:  # Exception handling block
+        current_page = payload.get("current_page", 0)
+        total_pages = payload.get("total_pages", 0)
+        current_page = int(current_page) if current_page is not None else 0
+        total_pages = int(total_pages) if total_pages is not None else 0
+    except (ValueError, TypeError, OverflowError):  # Exception handler
+        return None, 'Page numbers must be integers'
+    if current_page < 0 or total_pages < 0:  # Conditional statement
+        return None, 'Page numbers cannot be negative'
+    if current_page > MAX_PAGE_NUMBER or total_pages > MAX_PAGE_NUMBER:  # Conditional statement
+        return None, 'Page numbers are too large'
+    if current_page > total_pages and total_pages > 0:  # Conditional statement
+        return None, 'Current page cannot exceed total pages'
+
+    return {
+        "title": title,
+        "isbn": isbn,
+        "author": author,
+        "description": description,
+        "reading_status": reading_status,
+        "current_page": current_page,
+        "total_pages": total_pages
+    }, None
+
+
 @books_endpoint.route("/v1/books/<id>", methods=["PATCH"])
 @jwt_required()  # Requires valid JWT token for access
+@transactional
 def edit_book(id):  # Function: edit_book
     """
     Edit book details, progress, status, or rating.
@@ -396,6 +594,13 @@ def edit_book(id):  # Function: edit_book
                 "message": "Invalid book ID"
             }), 400
 
+  # Progress, rating and status updates go straight to a single UPDATE
+        payload = request.get_json(silent=True)
+        if payload and isinstance(payload, dict) and set(payload) <= FAST_PATH_FIELDS:  # Conditional statement
+            if progress_buffer.enabled and set(payload) == {"current_page"}:  # Conditional statement
+                return _buffer_book_progress(claim_id, book_id, payload)
+            return _fast_edit_book(claim_id, book_id, payload)
+
   # Find the book
         book = Books.query.filter(
             Books.owner_id == claim_id, Books.id == book_id
@@ -414,6 +619,15 @@ def edit_book(id):  # Function: edit_book
                 "message": "Request must contain JSON data"
             }), 400
 
+  # The save below writes current_page: supersede buffered progress before
+  # this transaction touches the row
+        progress_buffer.discard("books", book.id)
+
+  # Validate against buffered progress that has not been flushed yet
+        buffered_page = progress_buffer.get("books", book.id)
+        if buffered_page is not None:  # Conditional statement
+            book.current_page = buffered_page
+
   # Track if any changes were made
         changes_made = False
 
@@ -426,6 +640,8 @@ def edit_book(id):  # Function: edit_book
                         "error": "Unprocessable entity",
                         "message": "Current page cannot be negative"
                     }), 422
+                if current_page > MAX_PAGE_NUMBER:  # Conditional statement
+                    return _unprocessable("Current page is too large")
                 if book.total_pages > 0 and current_page > book.total_pages:  # Conditional statement
                     return jsonify({
                         "error": "Unprocessable entity",
@@ -433,7 +649,7 @@ def edit_book(id):  # Function: edit_book
                     }), 422
                 book.current_page = current_page
                 changes_made = True
-            except (ValueError, TypeError):  # Exception handler
+            except (ValueError, TypeError, OverflowError):  # Exception handler
                 return jsonify({
                     "error": "Unprocessable entity",
                     "message": "Current page must be a valid integer"
@@ -448,6 +664,8 @@ def edit_book(id):  # Function: edit_book
                         "error": "Unprocessable entity",
                         "message": "Total pages cannot be negative"
                     }), 422
+                if total_pages > MAX_PAGE_NUMBER:  # Conditional statement
+                    return _unprocessable("Total pages is too large")
   # Check if current_page needs adjustment
                 if book.current_page > total_pages and total_pages > 0:  # Conditional statement
                     return jsonify({
@@ -457,7 +675,7 @@ def edit_book(id):  # Function: edit_book
                     }), 422
                 book.total_pages = total_pages
                 changes_made = True
-            except (ValueError, TypeError):  # Exception handler
+            except (ValueError, TypeError, OverflowError):  # Exception handler
                 return jsonify({
                     "error": "Unprocessable entity",
                     "message": "Total pages must be a valid integer"
@@ -515,7 +733,7 @@ def edit_book(id):  # Function: edit_book
                         }), 422
                     book.rating = Decimal(str(rating_value))
                     changes_made = True
-                except (ValueError, TypeError, InvalidOperation):  # Exception handler
+                except (ValueError, TypeError, InvalidOperation, OverflowError):  # Exception handler
                     return jsonify({
                         "error": "Unprocessable entity",
                         "message": "Rating must be a valid number"
@@ -570,8 +788,264 @@ def edit_book(id):  # Function: edit_book
         }), 500
 
 
+def _unprocessable(message):  # Function: _unprocessable
+    return jsonify({
+        "error": "Unprocessable entity",
+        "message": message
+    }), 422
+
+
+def _not_found_response(book_id):  # Function: _not_found_response
+    return jsonify({
+        "error": "Not found",
+        "message": f"No book with ID {book_id} was found"
+    }), 404
+
+
+def _book_not_found(claim_id, book_id):  # Function: _book_not_found
+    """404 response when the user has no book book_id, else None"""
+    exists = db.session.query(Books.id).filter(
+        Books.owner_id == claim_id, Books.id == book_id
+    ).first()
+    return None if exists else _not_found_response(book_id)
+
+
+def _fast_path_values(payload):  # Function: _fast_path_values
+    """
+    Validate a fast-path payload without touching the database.
+
+    Returns (column values, None) or (None, error response).
+    """
+    values, message = _book_update_values(payload)
+    if message:  # Conditional statement
+        return None, _unprocessable(message)
+    return values, None
+
+
+def _book_update_values(payload):  # Function: _book_update_values
+    """
+    Validate the fields of a book update (PATCH fast path, batch "update")
+    that can be checked without the row: everything except the bound
+    between current_page and total_pages.
+
+    Returns (column values, None) or (None, error message).
+    """
+    values = {}
+
+    if "current_page" in payload:  # Conditional statement
+        try:  # Exception handling block
+            current_page = int(payload["current_page"])
+        except (ValueError, TypeError, OverflowError):  # Exception handler
+            return None, "Current page must be a valid integer"
+        if current_page < 0:  # Conditional statement
+            return None, "Current page cannot be negative"
+        if current_page > MAX_PAGE_NUMBER:  # Conditional statement
+            return None, "Current page is too large"
+        values["current_page"] = current_page
+
+    if "total_pages" in payload:  # Conditional statement
+        try:  # Exception handling block
+            total_pages = int(payload["total_pages"])
+        except (ValueError, TypeError, OverflowError):  # Exception handler
+            return None, "Total pages must be a valid integer"
+        if total_pages < 0:  # Conditional statement
+            return None, "Total pages cannot be negative"
+        if total_pages > MAX_PAGE_NUMBER:  # Conditional statement
+            return None, "Total pages is too large"
+        values["total_pages"] = total_pages
+
+    if "status" in payload:  # Conditional statement
+        if payload["status"] not in VALID_STATUSES:  # Conditional statement
+            return None, f"Status must be one of: {', '.join(VALID_STATUSES)}"
+        values["reading_status"] = payload["status"]
+
+    if "rating" in payload:  # Conditional statement
+        rating_value = payload["rating"]
+        if rating_value is None:  # Conditional statement
+            values["rating"] = None
+        else:  # Default case
+            try:  # Exception handling block
+                rating_value = float(rating_value)
+            except (ValueError, TypeError, OverflowError):  # Exception handler
+                return None, "Rating must be a valid number"
+            if not (0 <= rating_value <= 5):  # Conditional statement
+                return None, "Rating must be between 0 and 5"
+            values["rating"] = Decimal(str(rating_value))
+
+    if "title" in payload:  # Conditional statement
+        title = payload["title"]
+        if not isinstance(title, str) or not title.strip():  # Conditional statement
+            return None, "Title cannot be empty"
+        if len(title.strip()) > 500:  # Conditional statement
+            return None, "Title must be less than 500 characters"
+        values["title"] = title.strip()
+
+    for field, limit in (("author", 255), ("description", None)):  # Loop iteration
+        if field in payload:  # Conditional statement
+            value = payload[field]
+            if value is not None and not isinstance(value, str):  # Conditional statement
+                return None, f"{field.capitalize()} must be a string"
+            value = (value or "").strip() or None
+            if value and limit and len(value) > limit:  # Conditional statement
+                return None, f"{field.capitalize()} must be less than {limit} characters"
+            values[field] = value
+
+    return values, None
+
+
+def _buffer_book_progress(claim_id, book_id, payload):  # Function: _buffer_book_progress
+    """
+    Record a current_page-only update in the write-behind buffer.
+
+    Ownership and the total_pages bound are still checked against the row,
+    but the write itself is coalesced and flushed later in a batch.
+    """
+    values, error = _fast_path_values(payload)
+    if error:  # Conditional statement
+        return _book_not_found(claim_id, book_id) or error
+
+    row = db.session.query(
+        Books.id, Books.reading_status, Books.total_pages, Books.rating
+    ).filter(Books.owner_id == claim_id, Books.id == book_id).first()
+    if not row:  # Conditional statement
+        return _not_found_response(book_id)
+
+    current_page = values["current_page"]
+    if row.total_pages and row.total_pages > 0 and current_page > row.total_pages:  # Conditional statement
+        return _unprocessable("Current page cannot exceed total pages")
+
+    progress_buffer.put("books", book_id, claim_id, current_page)
+
+    return jsonify({
+        "message": "Book updated successfully",
+        "book": {
+            "id": row.id,
+            "reading_status": row.reading_status,
+            "current_page": current_page,
+            "total_pages": row.total_pages,
+            "rating": row.rating
+        }
+    }), 200
+
+
+def _fast_edit_book(claim_id, book_id, payload):  # Function: _fast_edit_book
+    """
+    Apply a current_page / rating / status update as one
+    UPDATE ... WHERE id AND owner_id RETURNING statement.
+
+    Everything that can be checked without the row is validated up front;
+    the "current page cannot exceed total pages" rule is folded into the
+    WHERE clause so no preliminary SELECT is needed. When the payload sets
+    a status, the previous value is returned through an UPDATE ... FROM
+    self-join (PostgreSQL) so the share task, and its UserSettings lookup,
+    only run when the book actually moves to "Read".
+    """
+    values, error = _fast_path_values(payload)
+    if error:  # Conditional statement
+  # As on the full path, a missing (or foreign) book is a 404 first
+        return _book_not_found(claim_id, book_id) or error
+
+  # A direct current_page write supersedes anything still buffered
+    if "current_page" in values:  # Conditional statement
+        progress_buffer.discard("books", book_id)
+
+    books = Books.__table__
+    conditions = [books.c.id == book_id, books.c.owner_id == claim_id]
+    if "current_page" in values:  # Conditional statement
+        conditions.append(db.or_(
+            books.c.total_pages.is_(None),
+            books.c.total_pages <= 0,
+            books.c.total_pages >= values["current_page"]
+        ))
+
+    returning = [
+        books.c.id, books.c.title, books.c.author, books.c.reading_status,
+        books.c.current_page, books.c.total_pages, books.c.rating
+    ]
+    tracks_status = "reading_status" in values
+    previous_status = None
+
+    try:  # Exception handling block
+        if tracks_status:  # Conditional statement
+            previous = (
+                db.select(books.c.id, books.c.reading_status)
+                .where(books.c.id == book_id, books.c.owner_id == claim_id)
+                .with_for_update()
+            )
+            if db.session.get_bind().dialect.name == "postgresql":  # Conditional statement
+                previous = previous.subquery("previous")
+                conditions.append(books.c.id == previous.c.id)
+                returning.append(
+                    previous.c.reading_status.label("previous_status")
+                )
+            else:  # Default case
+  # SQLite cannot RETURNING columns of a joined table; read it first
+                prev_row = db.session.execute(previous).first()
+                previous_status = prev_row.reading_status if prev_row else None
+
+        stmt = (
+            db.update(books)
+            .where(*conditions)
+            .values(**values)
+            .returning(*returning)
+        )
+        row = db.session.execute(stmt).first()
+        commit_session()
+    except Exception as e:  # Exception handler
+        db.session.rollback()
+        logger.error("Error updating book: %s", e)
+        return jsonify({
+            "error": "Internal server error",
+            "message": "An unexpected error occurred while updating the book"
+        }), 500
+
+    if row is None:  # Conditional statement
+  # Nothing matched: either the book is missing or the page check failed
+        not_found = _book_not_found(claim_id, book_id)
+        if not_found is None and "current_page" in values:  # Conditional statement
+            return _unprocessable("Current page cannot exceed total pages")
+        return not_found or _not_found_response(book_id)
+
+  # Handle social sharing for books that just became "Read"
+    if tracks_status and "previous_status" in row._fields:  # Conditional statement
+        previous_status = row.previous_status
+    if (tracks_status and row.reading_status == "Read" and  # Conditional statement
+            previous_status != "Read"):
+        try:  # Exception handling block
+            user_settings = UserSettings.query.filter(
+                UserSettings.owner_id == claim_id,
+                UserSettings.send_book_events.is_(True)
+            ).first()
+            if user_settings:  # Conditional statement
+                task_data = {
+                    "title": row.title,
+                    "author": row.author,
+                    "reading_status": row.reading_status
+                }
+                _create_task(
+                    "share_book_event", json.dumps(task_data), claim_id
+                )
+        except Exception as e:  # Exception handler
+            logger.warning("Failed to create social sharing task: %s", e)
+
+    buffered_page = progress_buffer.get("books", row.id)
+
+    return jsonify({
+        "message": "Book updated successfully",
+        "book": {
+            "id": row.id,
+            "reading_status": row.reading_status,
+            "current_page": (buffered_page if buffered_page is not None
+                             else row.current_page),
+            "total_pages": row.total_pages,
+            "rating": row.rating
+        }
+    }), 200
+
+
 @books_endpoint.route("/v1/books/<id>", methods=["DELETE"])
 @jwt_required()  # Requires valid JWT token for access
+@transactional
 def remove_book(id):  # Function: remove_book
     """
     Remove book from user's library.
@@ -605,6 +1079,7 @@ def remove_book(id):  # Function: remove_book
         book_title = book.title
 
   # Delete the book (cascade will handle notes)
+        progress_buffer.discard("books", book.id)
         book.delete()
 
         return jsonify({
@@ -620,6 +1095,249 @@ def remove_book(id):  # Function: remove_book
         }), 500
 
 
+@books_endpoint.route("/v1/books/batch", methods=["POST"])
+@jwt_required()  # Requires valid JWT token for access
+@transactional
+def batch_books():  # Function: batch_books
+    """
+    Create, update and delete many books in one transaction.
+
+    Expected JSON payload:
+    {
+        "operations": [  // at most 500
+            {"op": "create", "title": "...", "isbn": "...", ...},  // as POST /v1/books
+            {"op": "update", "id": 12, "status": "Read", "rating": 4},  // as PATCH /v1/books/<id>
+            {"op": "delete", "id": 13}
+        ]
+    }
+
+    Every operation is validated before anything is written, against one
+    SELECT of the books the batch updates or deletes (and one IN query for
+    the ISBNs it creates). If any operation is invalid nothing is applied
+    and the response is 422; otherwise the whole batch is applied as:
+    - one DELETE of the notes and one of the books for all deletes,
+    - one UPDATE ... WHERE id IN (...) per distinct set of new values, so
+      marking a shelf as read or giving it one rating is a single statement,
+    - one batched INSERT for the creates (multi-row VALUES on PostgreSQL).
+
+    Books that become "Read" are shared in a single share_book_event task
+    (when the user has book events enabled), not one task per book.
+
+    Returns {"results": [...]} with one entry per operation, in order:
+    {"op", "id", "status"} where status is "created", "updated" or
+    "deleted" - or, on 422, "invalid" with a "message", or "valid".
+    """
+    claim_id = get_jwt()["id"]
+    creates = None
+    try:  # Exception handling block
+        payload = request.get_json(silent=True) or {}
+        operations = payload.get("operations") if isinstance(payload, dict) else None
+        if (not isinstance(operations, list) or not operations
+                or not all(isinstance(operation, dict) for operation in operations)):  # Conditional statement
+            return jsonify({
+                "error": "Bad request",
+                "message": "operations must be a non-empty list of objects"
+            }), 400
+        if len(operations) > BATCH_MAX_OPERATIONS:  # Conditional statement
+            return jsonify({
+                "error": "Bad request",
+                "message": f"At most {BATCH_MAX_OPERATIONS} operations per request"
+            }), 400
+
+        results, creates, updates, deletes, finished = _validate_batch(
+            claim_id, operations
+        )
+        if any(result["status"] == "invalid" for result in results):  # Conditional statement
+            invalid = sum(1 for result in results if result["status"] == "invalid")
+            return jsonify({
+                "error": "Unprocessable entity",
+                "message": (f"{invalid} of {len(results)} operations are "
+                            f"invalid; nothing was applied"),
+                "results": results
+            }), 422
+
+        books, notes = Books.__table__, Notes.__table__
+        if deletes:  # Conditional statement
+            deleted_ids = list(deletes)
+            db.session.execute(db.delete(notes).where(
+                notes.c.owner_id == claim_id, notes.c.book_id.in_(deleted_ids)
+            ))
+            db.session.execute(db.delete(books).where(
+                books.c.owner_id == claim_id, books.c.id.in_(deleted_ids)
+            ))
+  # Core deletes skip the mapper events the ISBN cache listens to
+            remember_owner(db.session, claim_id)
+
+  # Updates with the same new values share one statement
+        groups = {}
+        for book_id, values in updates.items():  # Loop iteration
+            groups.setdefault(tuple(sorted(values.items())), []).append(book_id)
+        for key, book_ids in groups.items():  # Loop iteration
+            db.session.execute(db.update(books).where(
+                books.c.owner_id == claim_id, books.c.id.in_(book_ids)
+            ).values(**dict(key)))
+
+        new_books = [Books(owner_id=claim_id, **values) for values in creates.values()]
+        db.session.add_all(new_books)
+        commit_session()
+
+        for index, book in zip(creates, new_books):  # Loop iteration
+            results[index]["id"] = book.id
+        for result in results:  # Loop iteration
+            result["status"] = {"create": "created", "update": "updated",
+                                "delete": "deleted"}[result["op"]]
+
+        if finished:  # Conditional statement
+            _share_finished_books(claim_id, finished)
+
+        return jsonify({"results": results}), 200
+
+    except IntegrityError as e:  # Exception handler
+        db.session.rollback()
+        logger.error("Error applying book batch: %s", e)
+        if (creates and "foreign key constraint" in str(e.orig).lower()
+                and Profile.query.filter_by(owner_id=claim_id).first() is None):  # Conditional statement
+            return jsonify({
+                'error': 'Profile required',
+                'message': ('A profile must be created before adding '
+                           'books. Please create your profile first.')
+            }), 409
+        return jsonify({
+            'error': 'Database error',
+            'message': 'Failed to apply the batch due to a database constraint.'
+        }), 409
+    except Exception as e:  # Exception handler
+        db.session.rollback()
+        logger.error("Error applying book batch: %s", e)
+        return jsonify({
+            "error": "Internal server error",
+            "message": "An unexpected error occurred while applying the batch"
+        }), 500
+
+
+def _validate_batch(claim_id, operations):  # Function: _validate_batch
+    """
+    Validate every operation of a batch, with at most two queries.
+
+    Returns (results, creates, updates, deletes, finished): the per-item
+    results ("valid" or "invalid" with a message), the new books' values by
+    operation index, the new values by book id, the ids to delete, and the
+    share data of the books the batch marks as "Read".
+    """
+    results, creates, updates, deletes, finished = [], {}, {}, set(), []
+    targets = {}  # book id -> index of the operation changing it
+
+    def invalid(index, message):  # Function: invalid
+        results[index]["status"] = "invalid"
+        results[index]["message"] = message
+
+    for index, operation in enumerate(operations):  # Loop iteration
+        op = operation.get("op")
+        results.append({"op": op, "id": None, "status": "valid"})
+        message = None
+        if op == "create":  # Conditional statement
+            values, message = _new_book_values(operation)
+            if values:  # Conditional statement
+                creates[index] = values
+        elif op in ("update", "delete"):  # Alternative condition
+            book_id = operation.get("id")
+            if isinstance(book_id, bool) or not isinstance(book_id, int):  # Conditional statement
+                message = "id must be an integer"
+            elif book_id in targets:  # Alternative condition
+                message = (f"Book {book_id} is already changed by "
+                           f"operation {targets[book_id]}")
+            else:  # Default case
+                targets[book_id] = index
+                results[index]["id"] = book_id
+                if op == "delete":  # Conditional statement
+                    deletes.add(book_id)
+                else:  # Default case
+                    values, message = _book_update_values({
+                        key: value for key, value in operation.items()
+                        if key not in ("op", "id")
+                    })
+                    if values == {}:  # Conditional statement
+                        message = "No fields to update"
+                    elif values:  # Alternative condition
+                        updates[book_id] = values
+        else:  # Default case
+            message = "op must be one of: create, update, delete"
+        if message:  # Conditional statement
+            invalid(index, message)
+
+  # Buffered progress of rows written here is superseded; before the lock below
+    for book_id in deletes.union(
+            book_id for book_id, values in updates.items()
+            if "current_page" in values):  # Loop iteration
+        progress_buffer.discard("books", book_id)
+
+  # One locking SELECT for everything the batch updates or deletes
+    rows = {}
+    if targets:  # Conditional statement
+        rows = {row.id: row for row in db.session.query(
+            Books.id, Books.title, Books.author, Books.reading_status,
+            Books.current_page, Books.total_pages
+        ).filter(
+            Books.owner_id == claim_id, Books.id.in_(list(targets))
+        ).with_for_update()}
+    for book_id, index in targets.items():  # Loop iteration
+        row = rows.get(book_id)
+        if row is None:  # Conditional statement
+            invalid(index, f"No book with ID {book_id} was found")
+            continue
+        values = updates.get(book_id)
+        if values is None:  # Conditional statement
+            continue
+        buffered_page = progress_buffer.get("books", book_id)
+        current_page = values.get("current_page", (
+            buffered_page if buffered_page is not None else row.current_page
+        )) or 0
+        total_pages = values.get("total_pages", row.total_pages)
+        if total_pages and total_pages > 0 and current_page > total_pages:  # Conditional statement
+            invalid(index, "Cannot set total pages less than current page"
+                    if "total_pages" in values
+                    else "Current page cannot exceed total pages")
+        elif (values.get("reading_status") == "Read"
+              and row.reading_status != "Read"):  # Alternative condition
+            finished.append({
+                "title": values.get("title", row.title),
+                "author": values.get("author", row.author),
+                "reading_status": "Read"
+            })
+
+  # One IN query for the ISBNs being created; books deleted here do not count
+    if creates:  # Conditional statement
+        existing = {
+            isbn for book_id, isbn in Books.query.with_entities(
+                Books.id, Books.isbn
+            ).filter(
+                Books.owner_id == claim_id,
+                Books.isbn.in_({values["isbn"] for values in creates.values()})
+            ) if book_id not in deletes
+        }
+        for index, values in creates.items():  # Loop iteration
+            if values["isbn"] in existing:  # Conditional statement
+                invalid(index, "Book already exists in your library")
+            existing.add(values["isbn"])
+
+    return results, creates, updates, deletes, finished
+
+
+def _share_finished_books(claim_id, finished):  # Function: _share_finished_books
+    """Queue one share task for all books a batch marked as "Read" """
+    try:  # Exception handling block
+        user_settings = UserSettings.query.filter(
+            UserSettings.owner_id == claim_id,
+            UserSettings.send_book_events.is_(True)
+        ).first()
+        if user_settings:  # Conditional statement
+            _create_task(
+                "share_book_event", json.dumps({"books": finished}), claim_id
+            )
+    except Exception as e:  # Exception handler
+        logger.warning("Failed to create social sharing task: %s", e)
+
+
 @books_endpoint.route("/v1/books/<id>/notes", methods=["GET"])
 @jwt_required()  # Requires valid JWT token for access
 def get_notes_for_book(id):  # Getter method for notes_for_book
@@ -641,24 +1359,27 @@ def get_notes_for_book(id):  # Getter method for notes_for_book
             }), 400
 
   # Find the book
-        book = Books.query.filter(
+        book_title = Books.query.with_entities(Books.title).filter(
             Books.owner_id == claim_id, Books.id == book_id
-        ).first()
+        ).scalar()
 
-        if not book:  # Conditional statement
+        if book_title is None:  # Conditional statement
             return jsonify({
                 "error": "Not found",
                 "message": f"No book with ID {id} was found"
             }), 404
 
   # Get notes for the book
-        notes_schema = NotesSchema(many=True)
-        notes_data = notes_schema.dump(book.notes)
+        notes_data = notes_rows.dump(
+            Notes.query.with_entities(*notes_rows.columns).filter(
+                Notes.owner_id == claim_id, Notes.book_id == book_id
+            ).order_by(Notes.id).all()
+        )
 
         return jsonify({
             "notes": notes_data,
             "count": len(notes_data),
-            "book_title": book.title
+            "book_title": book_title
         }), 200
 
     except Exception as e:  # Exception handler
@@ -671,6 +1392,7 @@ def get_notes_for_book(id):  # Getter method for notes_for_book
 
 @books_endpoint.route("/v1/books/<id>/notes", methods=["POST"])
 @jwt_required()  # Requires valid JWT token for access
+@transactional
 def add_book_note(id):  # Function: add_book_note
     """
     Add a note or annotation to a book.
@@ -678,6 +1400,7 @@ def add_book_note(id):  # Function: add_book_note
     Expected JSON payload:
     {
         "content": "Note content",
+        "quote": "Highlighted passage",  // Optional
         "quote_page": 123,  // Optional
         "visibility": "private"  // Optional: "private" or "public"
     }
@@ -724,49 +1447,15 @@ def add_book_note(id):  # Function: add_book_note
                 "message": f"No book with ID {id} was found"
             }), 404
 
-  # Handle optional quote_page
-        quote_page = request.json.get("quote_page")
-        if quote_page is not None:  # Conditional statement
-            try:  # Exception handling block
-                quote_page = int(quote_page)
-                if quote_page < 1:  # Conditional statement
-                    return jsonify({
-                        "error": "Bad request",
-                        "message": "Quote page must be a positive integer"
-                    }), 400
-  # Validate against book's total pages
-                if (book.total_pages > 0 and  # Conditional statement
-                        quote_page > book.total_pages):
-                    return jsonify({
-                        "error": "Bad request",
-                        "message": ("Quote page cannot exceed book's "
-                                   "total pages")
-                    }), 400
-            except (ValueError, TypeError):  # Exception handler
-                return jsonify({
-                    "error": "Bad request",
-                    "message": "Quote page must be a valid integer"
-                }), 400
-
-  # Handle optional visibility
-        visibility = request.json.get("visibility", "private")
-        if visibility not in ["private", "public"]:  # Conditional statement
+        values, message = note_values(request.json, book.total_pages)
+        if message:  # Conditional statement
             return jsonify({
                 "error": "Bad request",
-                "message": "Visibility must be either 'private' or 'public'"
+                "message": message
             }), 400
 
-  # Map visibility to match database schema
-        visibility_value = "hidden" if visibility == "private" else "public"
-
   # Create the note
-        new_note = Notes(  # type: ignore
-            owner_id=claim_id,
-            book_id=book_id,
-            note=content,
-            quote_page=quote_page,
-            visibility=visibility_value
-        )
+        new_note = Notes(owner_id=claim_id, book_id=book_id, **values)  # type: ignore
         new_note.save_to_db()
 
         return jsonify({
@@ -784,15 +1473,109 @@ def add_book_note(id):  # Function: add_book_note
         }), 500
 
 
+@books_endpoint.route("/v1/books/<id>/notes/batch", methods=["POST"])
+@jwt_required()  # Requires valid JWT token for access
+@transactional
+def add_book_notes(id):  # Function: add_book_notes
+    """
+    Add many notes to a book at once.
+
+    Expected JSON payload:
+    {
+        "notes": [  // at most 1000, each as for POST /v1/books/<id>/notes
+            {"content": "...", "quote": "...", "quote_page": 12, "visibility": "private"},
+            ...
+        ]
+    }
+
+    All notes are validated first; if any is invalid nothing is added and
+    the 400 response lists them as {"index", "message"}. Otherwise they are
+    inserted with batched INSERT statements in one transaction.
+    """
+    claim_id = get_jwt()["id"]
+    try:  # Exception handling block
+        book_id = int(id)
+    except (ValueError, TypeError):  # Exception handler
+        return jsonify({
+            "error": "Bad request",
+            "message": "Invalid book ID"
+        }), 400
+
+    payload = request.get_json(silent=True) or {}
+    notes = payload.get("notes") if isinstance(payload, dict) else None
+    if (not isinstance(notes, list) or not notes
+            or not all(isinstance(note, dict) for note in notes)):  # Conditional statement
+        return jsonify({
+            "error": "Bad request",
+            "message": "notes must be a non-empty list of objects"
+        }), 400
+    if len(notes) > NOTES_BATCH_MAX:  # Conditional statement
+        return jsonify({
+            "error": "Bad request",
+            "message": f"At most {NOTES_BATCH_MAX} notes per request"
+        }), 400
+
+    try:  # Exception handling block
+        book = Books.query.with_entities(Books.title, Books.total_pages).filter(
+            Books.owner_id == claim_id, Books.id == book_id
+        ).first()
+        if not book:  # Conditional statement
+            return jsonify({
+                "error": "Not found",
+                "message": f"No book with ID {id} was found"
+            }), 404
+
+        rows, errors = [], []
+        for index, note in enumerate(notes):  # Loop iteration
+            values, message = note_values(note, book.total_pages)
+            if message:  # Conditional statement
+                errors.append({"index": index, "message": message})
+            else:  # Default case
+                rows.append(dict(values, book_id=book_id))
+        if errors:  # Conditional statement
+            return jsonify({
+                "error": "Bad request",
+                "message": (f"{len(errors)} of {len(notes)} notes are invalid; "
+                            f"nothing was added"),
+                "errors": errors
+            }), 400
+
+        insert_notes(claim_id, rows)
+        return jsonify({
+            "message": f"{len(rows)} notes created successfully",
+            "count": len(rows),
+            "book_title": book.title
+        }), 201
+
+    except Exception as e:  # Exception handler
+        db.session.rollback()
+        logger.error("Error adding notes to book: %s", e)
+        return jsonify({
+            "error": "Internal server error",
+            "message": "An unexpected error occurred while adding the notes"
+        }), 500
+
+
 @books_endpoint.route("/v1/books/<id>/details", methods=["GET"])
 @jwt_required()  # Requires valid JWT token for access
 def get_book_details(id):  # Getter method for book_details
     """
     Get detailed information about a specific book including notes.
+
+    Query parameters:
+    - fields: Comma-separated fields to return (default: all; id is always
+      included)
+    - include: "notes" to embed the book's notes (as GET /v1/books/<id>/notes)
     """
     try:  # Exception handling block
         claim_id = get_jwt()["id"]
 
+        try:  # Exception handling block
+            rows = requested_book_rows()
+            include = requested_includes(("notes",))
+        except ValueError as e:  # Exception handler
+            return _bad_request(e)
+
   # Validate book ID
         try:  # Exception handling block
             book_id = int(id)
@@ -802,8 +1585,8 @@ def get_book_details(id):  # Getter method for book_details
                 "message": "Invalid book ID"
             }), 400
 
-  # Find the book
-        book = Books.query.filter(
+  # Find the book (only the requested columns)
+        book = Books.query.with_entities(*rows.columns).filter(
             Books.owner_id == claim_id, Books.id == book_id
         ).first()
 
@@ -814,8 +1597,10 @@ def get_book_details(id):  # Getter method for book_details
             }), 404
 
   # Serialize book with notes
-        books_schema = BooksSchema(many=False)
-        book_data = books_schema.dump(book)
+        book_data = rows.dump_one(book)
+        progress_buffer.overlay("books", [book_data])
+        if "notes" in include:  # Conditional statement
+            embed_notes(claim_id, [book_data])
 
         return jsonify(book_data), 200
 
@@ -830,62 +1615,14 @@ def get_book_details(id):  # Getter method for book_details
 
 @books_endpoint.route("/v1/books/stats", methods=["GET"])
 @jwt_required()  # Requires valid JWT token for access
+@replica_reads
 def get_book_stats():  # Getter method for book_stats
     """
     Get reading statistics for the authenticated user.
     """
     try:  # Exception handling block
-        claim_id = get_jwt()["id"]
-        
-  # Get counts for each reading status
-        stats = {}
-        statuses = ["To be read", "Currently reading", "Read"]
-        
-        for status in statuses:  # Loop iteration
-            count = Books.query.filter(
-                Books.owner_id == claim_id,
-                Books.reading_status == status
-            ).count()
-            stats[status.lower().replace(" ", "_")] = count
-        
-  # Get total books
-        total_books = Books.query.filter(Books.owner_id == claim_id).count()
-        
-  # Calculate reading progress
-        progress_books = Books.query.filter(
-            Books.owner_id == claim_id,
-            Books.current_page > 0,
-            Books.total_pages > 0
-        ).all()
-        
-        total_pages_read = sum(book.current_page for book in progress_books)
-        total_pages_all = sum(book.total_pages for book in progress_books)
-        
-  # Get average rating
-        rated_books = Books.query.filter(
-            Books.owner_id == claim_id,
-            Books.rating.isnot(None)
-        ).all()
-        
-        avg_rating = None
-        if rated_books:  # Conditional statement
-            avg_rating = float(
-                sum(float(book.rating) for book in rated_books) / 
-                len(rated_books)
-            )
-        
-        return jsonify({
-            "total_books": total_books,
-            "to_be_read": stats["to_be_read"],
-            "currently_reading": stats["currently_reading"],
-            "read": stats["read"],
-            "total_pages_read": total_pages_read,
-            "total_pages_all": total_pages_all,
-            "average_rating": (round(avg_rating, 2)
-                               if avg_rating else None),  # Conditional statement
-            "rated_books_count": len(rated_books)
-        }), 200
-        
+        return jsonify(library_stats(get_jwt()["id"])), 200
+
     except Exception as e:  # Exception handler
         logger.error("Error getting book stats: %s", e)
         return jsonify({
@@ -897,6 +1634,7 @@ def get_book_stats():  # Getter method for book_stats
 
 @books_endpoint.route("/v1/books/search", methods=["GET"])
 @jwt_required()  # Requires valid JWT token for access
+@replica_reads
 def search_books():  # Function: search_books
     """
     Advanced search endpoint for books with multiple filters.
@@ -908,10 +1646,19 @@ def search_books():  # Function: search_books
     - rating_max: Maximum rating filter
     - limit: Number of results per page (default: 25, max: 100)
     - offset: Page number (default: 1)
+    - fields: Comma-separated fields to return (default: all; id is always
+      included)
+    - include: "notes" and/or "stats", as for GET /v1/books
     """
     try:  # Exception handling block
         claim_id = get_jwt()["id"]
 
+        try:  # Exception handling block
+            rows = requested_book_rows()
+            include = requested_includes(("notes", "stats"))
+        except ValueError as e:  # Exception handler
+            return _bad_request(e)
+
   # Parse search parameters
         search_query = request.args.get('q', '').strip()
         status_filter = request.args.get('status')
@@ -933,8 +1680,10 @@ def search_books():  # Function: search_books
                 "message": "Page offset must be greater than 0"
             }), 400
 
-  # Build base query
-        query = Books.query.filter(Books.owner_id == claim_id)
+  # Build base query (only the columns the response needs, as rows)
+        query = Books.query.with_entities(*rows.columns).filter(
+            Books.owner_id == claim_id
+        )
 
   # Apply search filter
         if search_query:  # Conditional statement
@@ -983,9 +1732,10 @@ def search_books():  # Function: search_books
         )
 
   # Serialize response
-        books_schema = BooksSchema(many=True)
         response_data = {
-            "items": books_schema.dump(books.items),
+            "items": progress_buffer.overlay(
+                "books", rows.dump(books.items)
+            ),
             "meta": {
                 "page": books.page,
                 "per_page": books.per_page,
@@ -1001,6 +1751,10 @@ def search_books():  # Function: search_books
                 }
             }
         }
+        if "notes" in include:  # Conditional statement
+            embed_notes(claim_id, response_data["items"])
+        if "stats" in include:  # Conditional statement
+            response_data["stats"] = library_stats(claim_id)
 
         return jsonify(response_data), 200
 
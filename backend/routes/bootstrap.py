@@ -0,0 +1,106 @@
+"""
+Bootstrap API Route
+
+GET /v1/bootstrap returns the initial state the frontend loads after login
+in one response, instead of five requests that each verify the JWT and
+look it up in the blocklist:
+
+- user: as GET /v1/users/me
+- profile: as GET /v1/profiles (null when the user has none)
+- settings: as GET /v1/settings (null when missing)
+- stats: as GET /v1/books/stats
+- books: the first page of GET /v1/books (accepts limit and fields)
+
+Four queries in one session: user with verification and profile (joined),
+settings, the stats aggregate and the books page, whose total comes from
+the stats.
+
+The response carries an ETag over the whole body; a reload that sends it
+back in If-None-Match gets 304 Not Modified without a body.
+"""
+from math import ceil
+
+from flask import Blueprint, request, jsonify  # Flask web framework components
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity  # Flask web framework components
+from sqlalchemy.orm import joinedload  # Database ORM components
+
+from db import db
+from models import (Books, Profile, ProfileSchema, User, UserSchema,
+                    UserSettings, UserSettingsSchema)
+from replicas import replica_reads
+from routes.books import _bad_request, library_stats, requested_book_rows
+from write_buffer import progress_buffer
+
+bootstrap_endpoint = Blueprint('bootstrap', __name__)
+
+user_schema = UserSchema()
+profile_schema = ProfileSchema()
+settings_schema = UserSettingsSchema()
+
+
+@bootstrap_endpoint.route("/v1/bootstrap", methods=["GET"])
+@jwt_required()  # Requires valid JWT token for access
+@replica_reads
+def get_bootstrap():  # Getter method for bootstrap
+    """
+    User, profile, settings, reading statistics and the first books page.
+
+    Query parameters:
+    - limit: Books on the first page (default: 25, max: 100)
+    - fields: Comma-separated book fields, as for GET /v1/books
+    """
+    claim_id = get_jwt()["id"]
+
+    limit = request.args.get('limit', 25, type=int)
+    if limit < 1 or limit > 100:  # Conditional statement
+        return jsonify({
+            "error": "Bad request",
+            "message": "Limit must be between 1 and 100"
+        }), 400
+    try:  # Exception handling block
+        rows = requested_book_rows()
+    except ValueError as e:  # Exception handler
+        return _bad_request(e)
+
+    found = db.session.query(User, Profile).outerjoin(
+        Profile, Profile.owner_id == User.id
+    ).options(joinedload(User.verification)).filter(
+        User.email == get_jwt_identity()
+    ).first()
+    if not found:  # Conditional statement
+        return jsonify({'message': 'User not found'}), 404
+    user, profile = found
+
+    settings = UserSettings.query.filter_by(owner_id=claim_id).first()
+
+  # Stats first: they write out buffered progress the page should show
+    stats = library_stats(claim_id)
+    total = stats["total_books"]
+    pages = ceil(total / limit)
+    items = rows.dump(
+        Books.query.with_entities(*rows.columns).filter(
+            Books.owner_id == claim_id
+        ).limit(limit).all()
+    )
+
+    response = jsonify({
+        "user": user_schema.dump(user),
+        "profile": profile_schema.dump(profile) if profile else None,
+        "settings": settings_schema.dump(settings) if settings else None,
+        "stats": stats,
+        "books": {
+            "items": progress_buffer.overlay("books", items),
+            "meta": {
+                "page": 1,
+                "per_page": limit,
+                "total_items": total,
+                "total_pages": pages,
+                "has_next": pages > 1,
+                "has_prev": False,
+                "offset": 0
+            }
+        }
+    })
+    response.add_etag()
+    response.vary.add("Authorization")
+    return response.make_conditional(request)
@@ -1,7 +1,12 @@
 from flask import Blueprint, send_from_directory, jsonify, request, current_app  # Flask web framework components
 from flask_jwt_extended import jwt_required, get_jwt  # Flask web framework components
-from models import Files, FilesSchema, Books
-from db import db
+from models import Files, Books
+from db import db, commit_session, transactional
+from replicas import replica_reads
+from serializers import files_rows
+from note_import import (NOTE_IMPORT_FORMATS, import_notes, import_summary_message,
+                         read_note_file, save_import_file)
+from routes.tasks import _create_task
 import os  # Operating system interface
 import csv
 
@@ -43,15 +48,15 @@ def download_file(filename):  # Function: download_file
 
 @files_endpoint.route("/v1/files", methods=["GET"])
 @jwt_required()  # Requires valid JWT token for access
+@replica_reads
 def get_files():  # Getter method for files
     claim_id = get_jwt()["id"]
-    file_schema = FilesSchema(many=True)
-    files = Files.query.filter_by(owner_id=claim_id).order_by(
-        Files.created_at.desc()
-    ).all()
+    files = Files.query.with_entities(*files_rows.columns).filter_by(
+        owner_id=claim_id
+    ).order_by(Files.created_at.desc()).all()
 
     if files:  # Conditional statement
-        return jsonify(file_schema.dump(files)), 200
+        return jsonify(files_rows.dump(files)), 200
     return jsonify({"error": "Not found", "message": "No files found"}), 404
 
 
@@ -62,6 +67,7 @@ def allowed_file(filename):  # Function: allowed_file
 
 @files_endpoint.route("/v1/files", methods=["POST"])
 @jwt_required()  # Requires valid JWT token for access
+@transactional
 def upload_file_for_import():  # Function: upload_file_for_import
     claim_id = get_jwt()["id"]
 
@@ -170,7 +176,7 @@ def upload_file_for_import():  # Function: upload_file_for_import
                     )
                     db.session.add(book)
                     count_imported += 1
-            db.session.commit()
+            commit_session()
             return jsonify({
                 "message": (f"Imported {count_imported}/"
                            f"{reader.line_num - 1} books.")
@@ -189,6 +195,67 @@ def upload_file_for_import():  # Function: upload_file_for_import
     }), 400
 
 
+@files_endpoint.route("/v1/notes/import", methods=["POST"])
+@jwt_required()  # Requires valid JWT token for access
+@transactional
+def import_notes_file():  # Function: import_notes_file
+    """
+    Import notes from a CSV or JSON file (multipart field "file"), keyed
+    by ISBN: rows need isbn and content, and may have quote, quote_page
+    and visibility (see note_import.py).
+
+    Files of up to NOTES_IMPORT_INLINE_MAX rows are imported right away
+    (200 with a summary); larger ones by a background task (202 with its
+    task_id). Rows for books not in the library or with invalid values
+    are skipped and listed in the summary.
+    """
+    claim_id = get_jwt()["id"]
+
+    file = request.files.get("file")
+    if file is None or file.filename == "":  # Conditional statement
+        return jsonify({
+            "error": "Invalid file submission",
+            "message": "The 'file' field is required."
+        }), 400
+    file_format = file.filename.rsplit(".", 1)[-1].lower()
+    if file_format not in NOTE_IMPORT_FORMATS:  # Conditional statement
+        return jsonify({
+            "error": "Invalid file type",
+            "message": f"Allowed file types: {', '.join(NOTE_IMPORT_FORMATS)}"
+        }), 400
+
+    data = file.stream.read()
+    try:  # Exception handling block
+        entries = read_note_file(data, file_format)
+    except ValueError as e:  # Exception handler
+        return jsonify({
+            "error": "File reading error",
+            "message": str(e)
+        }), 400
+
+    try:  # Exception handling block
+        if len(entries) > current_app.config.get("NOTES_IMPORT_INLINE_MAX", 500):  # Conditional statement
+            task = _create_task("note_import", {
+                "file": save_import_file(data, file_format),
+                "format": file_format,
+                "rows": len(entries)
+            }, claim_id)
+            return jsonify({
+                "message": f"Importing {len(entries)} notes in the background.",
+                "task_id": task.id
+            }), 202
+
+        summary = import_notes(claim_id, entries)
+        return jsonify(dict(summary, message=import_summary_message(summary))), 200
+    except Exception as e:  # Exception handler
+        db.session.rollback()
+        current_app.logger.error(f"Note import failed: {e}")
+        return jsonify({
+            "error": "Import failed",
+            "message": "An error occurred during import."
+        }), 500
+
+
 def _safe_float(value):  # Function: _safe_float
     try:  # Exception handling block
         val = float(value)
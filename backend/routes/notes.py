@@ -1,13 +1,14 @@
 from flask import Blueprint, request, jsonify, current_app  # Flask web framework components
 from flask_jwt_extended import jwt_required, get_jwt  # Flask web framework components
 from models import Notes, Books
-from db import db
+from db import db, commit_session, transactional
 
 notes_endpoint = Blueprint('notes', __name__)
 
 
 @notes_endpoint.route("/v1/notes/<id>", methods=["DELETE"])
 @jwt_required()  # Requires valid JWT token for access
+@transactional
 def remove_note(id):  # Function: remove_note
     try:  # Exception handling block
         note_id = int(id)
@@ -25,7 +26,7 @@ def remove_note(id):  # Function: remove_note
     if note:  # Conditional statement
         try:  # Exception handling block
             db.session.delete(note)
-            db.session.commit()
+            commit_session()
             return jsonify({'message': 'Note removed successfully'}), 200
         except Exception as e:  # Exception handler
             current_app.logger.error(f"Error deleting note: {e}")
@@ -43,6 +44,7 @@ def remove_note(id):  # Function: remove_note
 
 @notes_endpoint.route("/v1/notes/<id>", methods=["PATCH"])
 @jwt_required()  # Requires valid JWT token for access
+@transactional
 def edit_note(id):  # Function: edit_note
     try:  # Exception handling block
         note_id = int(id)
@@ -126,7 +128,7 @@ def edit_note(id):  # Function: edit_note
         }), 400
 
     try:  # Exception handling block
-        db.session.commit()
+        commit_session()
         return jsonify({'message': 'Note changed successfully'}), 200
     except Exception as e:  # Exception handler
         current_app.logger.error(f"Error updating note: {e}")
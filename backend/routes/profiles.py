@@ -2,11 +2,14 @@ from flask import Blueprint, request, jsonify  # Flask web framework components
 from flask_jwt_extended import jwt_required, get_jwt  # Flask web framework components
 from models import Profile, ProfileSchema, UserSettings
 from decorators import required_params
+from db import transactional
+from replicas import replica_reads
 
 profiles_endpoint = Blueprint('profiles', __name__)
 
 
 @profiles_endpoint.route("/v1/profiles/<display_name>", methods=["GET"])
+@replica_reads
 def get_profile(display_name):  # Getter method for profile
     profile_schema = ProfileSchema()
     profile = Profile.query.filter(
@@ -41,6 +44,7 @@ def get_profile_by_logged_in_id():  # Getter method for profile_by_logged_in_id
 @profiles_endpoint.route("/v1/profiles", methods=["POST"])
 @jwt_required()  # Requires valid JWT token for access
 @required_params("display_name")  # Decorator: required_params
+@transactional
 def create_profile():  # Function: create_profile
     claim_id = get_jwt()["id"]
     data = request.get_json()
@@ -82,9 +86,12 @@ def create_profile():  # Function: create_profile
     )
     new_user_settings = UserSettings(owner_id=claim_id)
 
+  # Both rows are flushed here and committed together by @transactional.
+  # Settings first: with sharding they may need an id block from the global
+  # database, which SQLite cannot hand out once this transaction writes there
     try:  # Exception handling block
-        new_profile.save_to_db()
         new_user_settings.save_to_db()
+        new_profile.save_to_db()
         return jsonify({"message": "Profile created"}), 200
     except Exception as e:  # Exception handler
         return jsonify({
@@ -95,6 +102,7 @@ def create_profile():  # Function: create_profile
 
 @profiles_endpoint.route("/v1/profiles", methods=["PATCH"])
 @jwt_required()  # Requires valid JWT token for access
+@transactional
 def edit_profile():  # Function: edit_profile
     claim_id = get_jwt()["id"]
     profile = Profile.query.filter(Profile.owner_id == claim_id).first()
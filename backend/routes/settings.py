@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify  # Flask web framework components
 from flask_jwt_extended import jwt_required, get_jwt  # Flask web framework components
 from models import UserSettings, UserSettingsSchema
-from db import db
+from db import db, commit_session, transactional
 from datetime import datetime  # Date and time handling
 
 settings_endpoint = Blueprint('settings', __name__)
@@ -31,6 +31,7 @@ def get_settings():  # Getter method for settings
 
 @settings_endpoint.route("/v1/settings", methods=["PATCH"])
 @jwt_required()
+@transactional
 def edit_settings():
     """Update the settings for the logged-in user."""
     claim_id = get_jwt().get("id")
@@ -85,7 +86,7 @@ def edit_settings():
     user_settings.updated_at = datetime.utcnow()
 
     try:  # Exception handling block
-        db.session.commit()
+        commit_session()
         return jsonify({"message": "User settings updated"}), 200
     except Exception as e:  # Exception handler
         db.session.rollback()
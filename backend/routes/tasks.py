@@ -1,21 +1,32 @@
 from flask import Blueprint, request, jsonify, current_app  # Flask web framework components
 from flask_jwt_extended import jwt_required, get_jwt  # Flask web framework components
 from models import Tasks, TasksSchema, Books, Files, UserSettings
-from db import db
+from db import (db, after_commit, commit_session, transactional, unit_of_work,
+                use_task_pool)
 from decorators import required_params
+from write_buffer import progress_buffer
+from sharding import ShardMovingError, shard_router, use_owner
+from memory_diagnostics import TASK_THREAD_PREFIX
+from note_import import import_note_file
+import metrics
 import threading
+import time
 import string
 import random
 from datetime import datetime  # Date and time handling
 import os  # Operating system interface
 import csv
 import json
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound
-from mastodon import Mastodon
 
 
 tasks_endpoint = Blueprint('tasks', __name__)
 
+  # Characters in a Mastodon status (the server default)
+MASTODON_STATUS_LIMIT = 500
+
+  # Task types POST /v1/tasks accepts; the rest are only created by the server
+CLIENT_TASK_TYPES = ("csv_export", "json_export", "html_export")
+
 
 def _create_task(task_type, task_metadata, owner_id):  # Function: _create_task
     if not isinstance(task_metadata, str):  # Conditional statement
@@ -26,16 +37,31 @@ def _create_task(task_type, task_metadata, owner_id):  # Function: _create_task
         owner_id=owner_id
     )
     db.session.add(new_task)
-    db.session.commit()
-    threading.Thread(
+    commit_session()
+  # The worker thread loads the task by id, so only start it once committed
+    app = current_app._get_current_object()
+    after_commit(lambda: threading.Thread(
         target=_start_background_task,
-        args=(current_app.app_context(), new_task.id, owner_id,)
-    ).start()
+        args=(app, new_task.id, owner_id,),
+        name=f"{TASK_THREAD_PREFIX}{new_task.id}"
+    ).start())
     return new_task
 
 
-def _start_background_task(app_context, task_id, claim):  # Function: _start_background_task
+def _start_background_task(app, task_id, claim):  # Function: _start_background_task
+    started_at = time.perf_counter()
+    running = {"task_type": None}
+
+    def record_outcome(status):  # Function: record_outcome
+        if running["task_type"] is not None:  # Conditional statement
+            metrics.task_finished(
+                running["task_type"], status, time.perf_counter() - started_at
+            )
+            running["task_type"] = None
+
     def start(task):  # Function: start
+        running["task_type"] = task.task_type
+        metrics.task_started(task.task_type)
         task.status = "started"
         task.progress = 10
         task.updated_at = datetime.utcnow()
@@ -45,27 +71,43 @@ def _start_background_task(app_context, task_id, claim):  # Function: _start_bac
         )
 
     def finish(task, result_message=None):  # Function: finish
-        task.status = "success"
-        task.progress = 100
-        task.result = (
-            result_message or f"Task {task.task_type} completed successfully"
-        )
-        task.updated_at = datetime.utcnow()
-        db.session.commit()
+  # One transaction, so buffered progress is only dropped once it commits
+        with unit_of_work():
+            progress_buffer.discard("tasks", task.id)
+            task.status = "success"
+            task.progress = 100
+            task.result = (
+                result_message or f"Task {task.task_type} completed successfully"
+            )
+            task.updated_at = datetime.utcnow()
+        record_outcome("success")
         current_app.logger.info(
             f"Background task {task_id} finished successfully"
         )
 
     def fail(task, error_message):  # Function: fail
-        task.status = "failed"
-        task.error = str(error_message)
-        task.updated_at = datetime.utcnow()
-        db.session.commit()
+        with unit_of_work():
+            progress_buffer.discard("tasks", task.id)
+            task.status = "failed"
+            task.error = str(error_message)
+            task.updated_at = datetime.utcnow()
+        record_outcome("failed")
         current_app.logger.error(
             f"Background task {task_id} failed: {error_message}"
         )
 
-    with app_context:
+  # A context of its own, so the thread gets its own session, bound to the
+  # background task pool rather than the request pool
+    with app.app_context():
+        use_task_pool()
+        use_owner(claim)
+  # ShardRouter.move() lets started tasks finish but copies the rows of
+  # the user without new ones; wait for a running move before starting
+        if shard_router.enabled and not shard_router.wait_while_moving(claim):  # Conditional statement
+            current_app.logger.error(
+                f"Task {task_id} not started: user {claim} is still being moved"
+            )
+            return
         task = Tasks.query.get(task_id)
         if not task:  # Conditional statement
             current_app.logger.error(f"Task {task_id} not found")
@@ -75,8 +117,11 @@ def _start_background_task(app_context, task_id, claim):  # Function: _start_bac
             start(task)
             
   # Update progress
-            task.progress = 30
-            db.session.commit()
+            if progress_buffer.enabled:  # Conditional statement
+                progress_buffer.put("tasks", task.id, task.owner_id, 30)
+            else:  # Default case
+                task.progress = 30
+                db.session.commit()
             
             if task.task_type == "csv_export":  # Conditional statement
                 create_csv(claim)
@@ -90,11 +135,24 @@ def _start_background_task(app_context, task_id, claim):  # Function: _start_bac
             elif task.task_type == "share_book_event":  # Alternative condition
                 share_book(claim, task.task_metadata)
                 finish(task, "Book shared successfully")
+            elif task.task_type == "note_import":  # Alternative condition
+                finish(task, import_note_file(claim, task.task_metadata))
             else:  # Default case
                 fail(task, f"Unknown task type: {task.task_type}")
                 
+        except ShardMovingError as e:  # Exception handler
+  # The task started just as a move began; record the failure once the
+  # rows are on their new shard, where the task can be retried
+            current_app.logger.error(f"Background task {task_id} failed: {e}")
+            db.session.rollback()
+            record_outcome("failed")
+            if shard_router.wait_while_moving(claim):  # Conditional statement
+                fail(task, "Your library was moved while the task ran; retry the task")
         except Exception as e:  # Exception handler
             current_app.logger.error(f"Background task {task_id} failed: {e}")
+  # Drop the task's partial writes (e.g. notes of earlier import chunks) so
+  # fail() commits only the status and a retry starts clean
+            db.session.rollback()
             fail(task, str(e))
 
 
@@ -115,7 +173,9 @@ def get_task(id):  # Getter method for task
         Tasks.id == task_id, Tasks.owner_id == claim
     ).first()
     if task:  # Conditional statement
-        return jsonify(task_schema.dump(task)), 200
+        task_data = task_schema.dump(task)
+        progress_buffer.overlay("tasks", [task_data])
+        return jsonify(task_data), 200
     else:  # Default case
         return jsonify({"error": "Not found", "message": "No task found"}), 404
 
@@ -123,8 +183,14 @@ def get_task(id):  # Getter method for task
 @tasks_endpoint.route("/v1/tasks", methods=["POST"])
 @jwt_required()  # Requires valid JWT token for access
 @required_params("type", "data")  # Decorator: required_params
+@transactional
 def create_task():  # Function: create_task
     claim_id = get_jwt()["id"]
+    if request.json["type"] not in CLIENT_TASK_TYPES:  # Conditional statement
+        return jsonify({
+            "error": "Bad request",
+            "message": f"type must be one of: {', '.join(CLIENT_TASK_TYPES)}"
+        }), 400
     try:  # Exception handling block
         data = request.json["data"]
         new_task = _create_task(
@@ -146,6 +212,7 @@ def create_task():  # Function: create_task
 
 @tasks_endpoint.route("/v1/tasks/<id>/retry", methods=["POST"])
 @jwt_required()  # Requires valid JWT token for access
+@transactional
 def retry_task(id):  # Function: retry_task
     try:  # Exception handling block
         task_id = int(id)
@@ -162,8 +229,11 @@ def retry_task(id):  # Function: retry_task
     if task:  # Conditional statement
         task.status = "fresh"
         task.updated_at = datetime.utcnow()
-        db.session.commit()
-        _start_background_task(current_app.app_context(), task.id, claim_id)
+        commit_session()
+        app = current_app._get_current_object()
+        after_commit(lambda: _start_background_task(
+            app, task.id, claim_id
+        ))
         return jsonify({"message": "Task set to be retried."}), 200
     else:  # Default case
         return jsonify({"error": "Not found", "message": "No task found"}), 404
@@ -179,13 +249,19 @@ def share_book(claim_id, data):  # Function: share_book
         return
 
     try:  # Exception handling block
+        from mastodon import Mastodon  # Heavy import, only needed for sharing
         if isinstance(data, str):  # Conditional statement
             data = json.loads(data)
         mastodon = Mastodon(
             access_token=settings.mastodon_access_token,
             api_base_url=settings.mastodon_url
         )
-        if data.get("reading_status") == "Read":  # Conditional statement
+        if "books" in data:  # Conditional statement
+  # POST /v1/books/batch shares every book it finished in one post
+            message = _finished_books_status(data["books"])
+            if message:  # Conditional statement
+                mastodon.status_post(message)
+        elif data.get("reading_status") == "Read":  # Alternative condition
             title = data.get('title', '')
             author = data.get('author', '')
             mastodon.status_post(
@@ -195,7 +271,28 @@ def share_book(claim_id, data):  # Function: share_book
         current_app.logger.error(f"Failed to share book to Mastodon: {e}")
 
 
+def _finished_books_status(books):  # Function: _finished_books_status
+    """One status for several finished books, within Mastodon's 500 characters"""
+    books = [book for book in books if book.get("reading_status") == "Read"]
+    if len(books) == 1:  # Conditional statement
+        return (f"I just finished reading {books[0].get('title', '')} "
+                f"by {books[0].get('author', '')} 📖")
+    if not books:  # Conditional statement
+        return None
+    lines = [f"I just finished reading {len(books)} books 📖"]
+    for shown, book in enumerate(books):  # Loop iteration
+        line = f"- {book.get('title', '')} by {book.get('author', '')}"
+        rest = len(books) - shown - 1
+        more = f"\n… and {rest} more" if rest else ""
+        if len("\n".join(lines + [line])) + len(more) > MASTODON_STATUS_LIMIT:  # Conditional statement
+            lines.append(f"… and {len(books) - shown} more")
+            break
+        lines.append(line)
+    return "\n".join(lines)
+
+
 def create_html(claim_id):  # Function: create_html
+    from jinja2 import Environment, FileSystemLoader, TemplateNotFound
     template_path = os.path.abspath(
         os.path.join(os.path.dirname(__file__), "../")
     )
@@ -235,6 +332,7 @@ def create_html(claim_id):  # Function: create_html
         )
         db.session.add(new_file)
         db.session.commit()
+        metrics.export_written("html", new_file.file_size)
     except Exception as e:  # Exception handler
         current_app.logger.error(f"Error writing HTML export file: {e}")
 
@@ -275,6 +373,7 @@ def create_json(claim_id):  # Function: create_json
         )
         db.session.add(new_file)
         db.session.commit()
+        metrics.export_written("json", new_file.file_size)
     except Exception as e:  # Exception handler
         current_app.logger.error(f"Error writing JSON export file: {e}")
 
@@ -313,5 +412,6 @@ def create_csv(claim_id):  # Function: create_csv
         )
         db.session.add(new_file)
         db.session.commit()
+        metrics.export_written("csv", new_file.file_size)
     except Exception as e:  # Exception handler
         current_app.logger.error(f"Error writing CSV export file: {e}")
\ No newline at end of file
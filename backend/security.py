@@ -3,7 +3,6 @@ Security utilities for BookVault API
 """
 
 import re
-import bleach
 from typing import Optional, Dict, Any, Callable
 from flask import request, jsonify, g  # Flask web framework components
 from functools import wraps
@@ -17,6 +16,7 @@ def sanitize_input(data: Any) -> Any:  # Function: sanitize_input
     Sanitize input data to prevent XSS attacks
     """
     if isinstance(data, str):  # Conditional statement
+        import bleach  # Imported on first use to keep worker boot fast
   # Remove potentially dangerous HTML tags and attributes
         cleaned = bleach.clean(data, tags=[], attributes={}, strip=True)
         return cleaned.strip()
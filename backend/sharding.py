@@ -0,0 +1,483 @@
+"""
+Tenant sharding of library data by owner_id
+
+With SHARD_DATABASE_URLS set (comma separated), the per-user tables
+(books, notes, tasks, files, user_settings; marked with
+info={"sharded": True} in models.py) live on N shard databases, while
+users, verification, profiles, revoked_tokens and the shard bookkeeping
+stay on the global database (DATABASE_URL). Each shard is an extra
+SQLALCHEMY_BINDS entry ("shard_0", "shard_1", ...) and RoutingSession
+(db.py) sends every statement on a sharded table to the owner's shard.
+
+Placement
+- A user's home shard is jump_hash(owner_id, SHARD_HASH_COUNT), a stable
+  hash that only moves 1/N of the users when a shard is added.
+- shard_assignments (global) overrides the hash for users that were moved
+  or adopted. Lookups are cached per process for SHARD_DIRECTORY_TTL
+  seconds.
+
+Which owner? g._shard_owner when set (background tasks, use_owner()), else
+the id claim of the request's JWT. Code that spans users (CLI, admin) runs
+once per shard with each_shard(). Statements on sharded tables without an
+owner raise ShardRoutingError rather than silently reading one shard.
+
+Ids stay unique across shards: sharded rows get ids from blocks reserved
+in the global id_blocks table, so a moved user keeps the ids clients know.
+Blocks are reserved in their own transaction; on SQLite, which allows one
+writer, insert sharded rows before writing global rows in a transaction.
+
+Moving a user (flask shards move) is online: the user is marked
+"draining" (their HTTP writes get 503 + Retry-After, new background tasks
+wait, reads continue) until their running tasks have finished, then
+"moving" (every write of theirs is refused), rows are copied and verified,
+the directory is switched, and the source rows are deleted once every
+process has seen the switch.
+
+Local testing: DATABASE_URL=sqlite:///global.db and
+SHARD_DATABASE_URLS=sqlite:///shard0.db,sqlite:///shard1.db, then
+`flask shards init`.
+"""
+import logging  # Application logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime  # Date and time handling
+
+from flask import g, has_app_context, jsonify, request  # Flask web framework components
+from sqlalchemy import MetaData, delete, func, insert, select, update  # Database ORM components
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+SHARD_BIND_PREFIX = "shard_"
+
+  # Ids reserved per round trip to id_blocks
+ID_BLOCK_SIZE = 1000
+
+  # Rows copied per INSERT when moving a user
+MOVE_BATCH_SIZE = 1000
+
+  # Seconds a move waits for the user's running tasks (and tasks for a move)
+MOVE_TASK_TIMEOUT = 300
+
+  # Seconds between checks for running tasks during a move
+MOVE_TASK_POLL = 1.0
+
+WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+  # Placement states of a user being moved (see ShardRouter.move)
+MOVE_STATES = ("draining", "moving")
+
+
+class ShardRoutingError(RuntimeError):
+    """A sharded table was queried without a known owner or shard"""
+
+
+class ShardMovingError(RuntimeError):
+    """The owner's rows are being moved; writes are paused"""
+
+
+def shard_binds(urls, engine_options):  # Function: shard_binds
+    """SQLALCHEMY_BINDS entries for the shard URLs (used by Config)"""
+    return {
+        f"{SHARD_BIND_PREFIX}{i}": dict(engine_options, url=url)
+        for i, url in enumerate(urls)
+    }
+
+
+def jump_hash(key, buckets):  # Function: jump_hash
+    """Jump consistent hash (Lamping & Veach) of an integer key"""
+    key &= 0xFFFFFFFFFFFFFFFF
+    b, j = -1, 0
+    while j < buckets:  # Loop iteration
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+def sharded_tables(metadata):  # Function: sharded_tables
+    """Sharded tables in dependency order (parents first)"""
+    return [t for t in metadata.sorted_tables if t.info.get("sharded")]
+
+
+def is_sharded(mapper=None, clause=None):  # Function: is_sharded
+    """True when a statement targets a sharded table"""
+    if mapper is not None:  # Conditional statement
+        from sqlalchemy import inspect
+        return bool(inspect(mapper).local_table.info.get("sharded"))
+    if clause is not None:  # Conditional statement
+        from sqlalchemy.sql.util import find_tables
+        return any(t.info.get("sharded")
+                   for t in find_tables(clause, include_crud=True))
+    return False
+
+
+def create_shard_schema(engine, metadata):  # Function: create_shard_schema
+    """
+    Create the sharded tables on a shard. Foreign keys to global tables
+    (users.id) are left out since those rows live in another database.
+    """
+    shard_metadata = MetaData()
+    tables = sharded_tables(metadata)
+    names = {t.name for t in tables}
+    for table in tables:  # Loop iteration
+        copy = table.to_metadata(shard_metadata)
+        for fk in list(copy.foreign_keys):  # Loop iteration
+            if fk.target_fullname.split(".")[0] not in names:  # Conditional statement
+                copy.constraints.discard(fk.constraint)
+                fk.parent.foreign_keys.discard(fk)
+                copy.foreign_keys.discard(fk)
+    shard_metadata.create_all(bind=engine)
+
+
+class ShardRouter:
+    """Maps owners to shard binds and allocates cross-shard unique ids"""
+
+    def __init__(self, app=None):  # Special method: __init__
+        self.enabled = False
+        self.keys = []
+        self.hash_count = 0
+        self.directory_ttl = 5.0
+        self._directory = {}  # owner id -> (bind key, state, expires)
+        self._id_blocks = {}  # table name -> [next id, end of block]
+        self._lock = threading.Lock()
+        if app is not None:  # Conditional statement
+            self.init_app(app)
+
+    def init_app(self, app):  # Function: init_app
+        from db import db
+
+        self.keys = sorted(
+            (key for key in app.config.get("SQLALCHEMY_BINDS", {})
+             if key.startswith(SHARD_BIND_PREFIX)),
+            key=lambda key: int(key[len(SHARD_BIND_PREFIX):])
+        )
+        self.enabled = bool(self.keys)
+        app.extensions["shard_router"] = self
+        if not self.enabled:  # Conditional statement
+            return
+        self.hash_count = int(app.config.get("SHARD_HASH_COUNT")
+                              or len(self.keys))
+        self.directory_ttl = float(app.config.get("SHARD_DIRECTORY_TTL", 5))
+        if not 0 < self.hash_count <= len(self.keys):  # Conditional statement
+            raise ValueError(
+                f"SHARD_HASH_COUNT={self.hash_count} must be between 1 and "
+                f"the number of shards ({len(self.keys)})"
+            )
+        logger.info("Sharding enabled: %d shard(s), hashing over %d",
+                    len(self.keys), self.hash_count)
+
+        from sqlalchemy import event
+        for mapper in db.Model.registry.mappers:  # Loop iteration
+            if mapper.local_table.info.get("sharded") and not event.contains(
+                    mapper, "before_insert", _assign_id):  # Conditional statement
+                event.listen(mapper, "before_insert", _assign_id)
+
+        @app.before_request
+        def pause_writes_while_moving():  # Function: pause_writes_while_moving
+            if request.method not in WRITE_METHODS:  # Conditional statement
+                return None
+            from flask_jwt_extended import verify_jwt_in_request
+            try:  # Exception handling block
+                claims = (verify_jwt_in_request(optional=True) or (None, {}))[1]
+            except Exception:  # Exception handler
+                return None  # the view reports the token problem
+            owner_id = claims.get("id")
+            if owner_id is not None and self.placement(owner_id)[1] in MOVE_STATES:  # Conditional statement
+                response = jsonify({
+                    "error": "Service unavailable",
+                    "message": "Your library is being moved; try again shortly"
+                })
+                response.headers["Retry-After"] = str(
+                    max(1, int(self.directory_ttl))
+                )
+                return response, 503
+            return None
+
+  # -------------------- PLACEMENT --------------------
+
+    def home_shard(self, owner_id, hash_count=None):  # Function: home_shard
+        return self.keys[jump_hash(int(owner_id), hash_count or self.hash_count)]
+
+    def placement(self, owner_id):  # Function: placement
+        """(bind key, state) for an owner, from the directory or the hash"""
+        now = time.monotonic()
+        cached = self._directory.get(owner_id)
+        if cached is not None and cached[2] > now:  # Conditional statement
+            return cached[0], cached[1]
+
+        from db import db
+        from models import ShardAssignment
+        table = ShardAssignment.__table__
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(table.c.shard, table.c.state)
+                .where(table.c.owner_id == owner_id)
+            ).first()
+        key, state = (row.shard, row.state) if row else (
+            self.home_shard(owner_id), "active"
+        )
+        with self._lock:
+            if len(self._directory) > 10000:  # Conditional statement
+                self._directory.clear()
+            self._directory[owner_id] = (key, state, now + self.directory_ttl)
+        return key, state
+
+    def shard_for_owner(self, owner_id):  # Function: shard_for_owner
+        return self.placement(owner_id)[0]
+
+    def engine_for_owner(self, owner_id):  # Function: engine_for_owner
+        from db import db
+        return db.engines[self.shard_for_owner(owner_id)]
+
+    def forget(self, owner_id=None):  # Function: forget
+        """Drop cached placements (all when owner_id is None)"""
+        with self._lock:
+            if owner_id is None:  # Conditional statement
+                self._directory.clear()
+            else:  # Default case
+                self._directory.pop(owner_id, None)
+
+    def current_key(self, writing=False):  # Function: current_key
+        """Bind key for a sharded statement in the current context"""
+        key = g.get("_shard")
+        if key is not None:  # Conditional statement
+            return key
+        owner_id = g.get("_shard_owner")
+        if owner_id is None:  # Conditional statement
+            from flask_jwt_extended import get_jwt
+            try:  # Exception handling block
+                owner_id = get_jwt().get("id")
+            except RuntimeError:  # Exception handler
+                owner_id = None
+        if owner_id is None:  # Conditional statement
+            raise ShardRoutingError(
+                "Sharded table used without an owner; call use_owner() or "
+                "run the code inside each_shard()"
+            )
+        key, state = self.placement(owner_id)
+        if writing and state == "moving":  # Conditional statement
+            raise ShardMovingError(f"Rows of user {owner_id} are being moved")
+        return key
+
+    def wait_while_moving(self, owner_id, timeout=MOVE_TASK_TIMEOUT):  # Function: wait_while_moving
+        """Block while the owner is being moved; False if still moving after timeout"""
+        deadline = time.monotonic() + timeout
+        while self.placement(owner_id)[1] in MOVE_STATES:  # Loop iteration
+            if time.monotonic() >= deadline:  # Conditional statement
+                return False
+            time.sleep(max(self.directory_ttl, MOVE_TASK_POLL))
+        return True
+
+  # -------------------- CONTEXT HELPERS --------------------
+
+    @contextmanager
+    def using_shard(self, key):  # Function: using_shard
+        """Run sharded statements in the block against one shard"""
+        previous = g.get("_shard")
+        g._shard = key
+        try:  # Exception handling block
+            yield key
+        finally:
+            g._shard = previous
+
+    def each_shard(self):  # Function: each_shard
+        """
+        Yield once per shard with that shard selected (once with None when
+        sharding is off), for code that spans users.
+        """
+        if not self.enabled:  # Conditional statement
+            yield None
+            return
+        for key in self.keys:  # Loop iteration
+            with self.using_shard(key):
+                yield key
+
+  # -------------------- ID ALLOCATION --------------------
+
+    def next_ids(self, table_name, count):  # Function: next_ids
+        """Reserve count ids for a sharded table, unique across shards"""
+        ids = []
+        with self._lock:
+            while len(ids) < count:  # Loop iteration
+                block = self._id_blocks.get(table_name)
+                if block is None or block[0] >= block[1]:  # Conditional statement
+                    blocks = -(-(count - len(ids)) // ID_BLOCK_SIZE)
+                    start = self._reserve_block(table_name, blocks)
+                    block = self._id_blocks[table_name] = [
+                        start, start + blocks * ID_BLOCK_SIZE
+                    ]
+                take = min(count - len(ids), block[1] - block[0])
+                ids.extend(range(block[0], block[0] + take))
+                block[0] += take
+        return ids
+
+    def _reserve_block(self, table_name, blocks):  # Function: _reserve_block
+        """Claim `blocks` consecutive blocks in id_blocks; returns the first id"""
+        from db import db
+        from models import IdBlock
+        table = IdBlock.__table__
+        for _ in range(3):  # Loop iteration
+            with db.engine.begin() as conn:
+                row = conn.execute(
+                    update(table).where(table.c.name == table_name)
+                    .values(next_block=table.c.next_block + blocks)
+                    .returning(table.c.next_block)
+                ).first()
+                if row is not None:  # Conditional statement
+                    return (row.next_block - blocks) * ID_BLOCK_SIZE
+            first = self._max_id(table_name) // ID_BLOCK_SIZE + 1
+            try:  # Exception handling block
+                with db.engine.begin() as conn:
+                    conn.execute(insert(table).values(
+                        name=table_name, next_block=first + blocks
+                    ))
+                return first * ID_BLOCK_SIZE
+            except IntegrityError:  # Exception handler
+                continue  # another process created the row first
+        raise RuntimeError(f"Could not reserve ids for {table_name}")
+
+    def _max_id(self, table_name):  # Function: _max_id
+        """Highest id of a table on the global database and every shard"""
+        from db import db
+        table = db.metadata.tables[table_name]
+        highest = 0
+        for key in [None] + self.keys:  # Loop iteration
+            try:  # Exception handling block
+                with db.engines[key].connect() as conn:
+                    highest = max(highest, conn.execute(
+                        select(func.max(table.c.id))
+                    ).scalar() or 0)
+            except Exception:  # Exception handler
+                pass  # table not created on the global database
+        return highest
+
+  # -------------------- MOVES --------------------
+
+    def set_placement(self, owner_id, key, state="active"):  # Function: set_placement
+        """Write a directory entry (removed when it matches the hash)"""
+        from db import db
+        from models import ShardAssignment
+        table = ShardAssignment.__table__
+        with db.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.owner_id == owner_id))
+            if key != self.home_shard(owner_id) or state != "active":  # Conditional statement
+                conn.execute(insert(table).values(
+                    owner_id=owner_id, shard=key, state=state,
+                    updated_at=datetime.utcnow()
+                ))
+        self.forget(owner_id)
+
+    def move(self, owner_id, target, wait=True, progress=None):  # Function: move
+        """
+        Move every sharded row of an owner to the target shard.
+
+        Returns the number of rows moved per table. With wait, sleeps for
+        the directory TTL after each directory change so that all
+        processes have picked it up before rows are copied or deleted.
+        """
+        from db import db
+
+        if target not in self.keys:  # Conditional statement
+            raise ValueError(f"Unknown shard {target}")
+        self.forget(owner_id)
+        source, state = self.placement(owner_id)
+        if source == target:  # Conditional statement
+            return {}
+        if state in MOVE_STATES:  # Conditional statement
+            raise ShardMovingError(f"User {owner_id} is already being moved")
+
+        pause = self.directory_ttl if wait else 0
+        tables = sharded_tables(db.metadata)
+  # Background tasks write outside HTTP requests: while draining, new ones
+  # wait (wait_while_moving()) and started ones may still write and finish
+        self.set_placement(owner_id, source, "draining")
+        time.sleep(pause)
+
+        moved = {}
+        try:  # Exception handling block
+            self._wait_for_tasks(owner_id, source)
+            self.set_placement(owner_id, source, "moving")
+            time.sleep(pause)
+            with db.engines[source].connect() as src, \
+                    db.engines[target].begin() as dst:
+  # Leftovers of an earlier failed attempt
+                for table in reversed(tables):  # Loop iteration
+                    dst.execute(delete(table).where(table.c.owner_id == owner_id))
+                for table in tables:  # Loop iteration
+                    rows = [dict(row._mapping) for row in src.execute(
+                        select(table).where(table.c.owner_id == owner_id)
+                    )]
+                    for start in range(0, len(rows), MOVE_BATCH_SIZE):  # Loop iteration
+                        dst.execute(insert(table),
+                                    rows[start:start + MOVE_BATCH_SIZE])
+                    copied = dst.execute(
+                        select(func.count()).select_from(table)
+                        .where(table.c.owner_id == owner_id)
+                    ).scalar()
+                    if copied != len(rows):  # Conditional statement
+                        raise RuntimeError(
+                            f"{table.name}: copied {copied} of {len(rows)} rows"
+                        )
+                    moved[table.name] = len(rows)
+                    if progress is not None:  # Conditional statement
+                        progress(table.name, len(rows))
+        except Exception:  # Exception handler
+            self.set_placement(owner_id, source)
+            raise
+
+        self.set_placement(owner_id, target)
+        time.sleep(pause)
+        with db.engines[source].begin() as src:
+            for table in reversed(tables):  # Loop iteration
+                src.execute(delete(table).where(table.c.owner_id == owner_id))
+        return moved
+
+
+    def _wait_for_tasks(self, owner_id, source, timeout=MOVE_TASK_TIMEOUT):  # Function: _wait_for_tasks
+        """Wait until the owner has no started task on the source shard"""
+        from db import db
+        table = db.metadata.tables["tasks"]
+        deadline = time.monotonic() + timeout
+        while True:  # Loop iteration
+            with db.engines[source].connect() as conn:
+                running = conn.execute(
+                    select(func.count()).select_from(table).where(
+                        table.c.owner_id == owner_id,
+                        table.c.status == "started"
+                    )
+                ).scalar()
+            if not running:  # Conditional statement
+                return
+            if time.monotonic() >= deadline:  # Conditional statement
+                raise ShardMovingError(
+                    f"User {owner_id} still has {running} running task(s); "
+                    f"try the move again later"
+                )
+            time.sleep(MOVE_TASK_POLL)
+
+
+def _assign_id(mapper, connection, target):  # Function: _assign_id
+    """before_insert hook: give new sharded rows a cross-shard unique id"""
+    if target.id is None:  # Conditional statement
+        target.id = shard_router.next_ids(mapper.local_table.name, 1)[0]
+
+
+def use_owner(owner_id):  # Function: use_owner
+    """Route sharded statements in this app context to owner_id's shard"""
+    g._shard_owner = owner_id
+
+
+def routed_engine(session_db, mapper=None, clause=None, flushing=False):  # Function: routed_engine
+    """Engine for a sharded statement, or None when not sharded"""
+    if not (shard_router.enabled and has_app_context()):  # Conditional statement
+        return None
+    if not is_sharded(mapper, clause):  # Conditional statement
+        return None
+  # Core INSERT/UPDATE/DELETE (e.g. note_import.insert_notes) write without a flush
+    writing = flushing or getattr(clause, "is_dml", False)
+    return session_db.engines[shard_router.current_key(writing=writing)]
+
+
+shard_router = ShardRouter()
@@ -0,0 +1,202 @@
+"""
+Slow-query log for BookVault API
+
+Hooks on every engine (the primary, the background task pool, read
+replicas and shards) record each SQL statement that takes longer than
+SLOW_QUERY_THRESHOLD_MS together with:
+- its bound parameters, redacted (strings are replaced by their length)
+- the endpoint (or CLI / background task) that issued it
+- the bind it ran on ("primary", "tasks", "replica_0", "shard_1", ...)
+- an EXPLAIN plan, captured by a worker thread on a separate connection
+  of the engine that ran the statement
+
+Entries are kept in an in-memory ring buffer (SLOW_QUERY_BUFFER_SIZE)
+served by GET /v1/admin/slow-queries, and appended as JSON lines to
+SLOW_QUERY_LOG_FILE for the `flask db slow-queries` report.
+
+Setting SLOW_QUERY_THRESHOLD_MS to 0 disables the hook.
+"""
+import json
+import logging  # Application logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime  # Date and time handling
+
+from flask import has_request_context, request  # Flask web framework components
+from sqlalchemy import event  # Database ORM components
+
+logger = logging.getLogger(__name__)
+
+  # Only statements of these kinds are EXPLAINed (EXPLAIN alone never runs them)
+EXPLAINABLE_PREFIXES = ("select", "with", "update", "delete")
+
+  # Do not re-EXPLAIN the same statement more often than this
+EXPLAIN_COOLDOWN_SECONDS = 300
+
+
+def redact_parameters(parameters):  # Function: redact_parameters
+    """Keep numbers, booleans and NULLs; hide the content of everything else"""
+    def redact(value):  # Function: redact
+        if value is None or isinstance(value, (bool, int, float)):  # Conditional statement
+            return value
+        if isinstance(value, (str, bytes)):  # Conditional statement
+            return f"<redacted {type(value).__name__} len={len(value)}>"
+        return f"<redacted {type(value).__name__}>"
+
+    if isinstance(parameters, dict):  # Conditional statement
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):  # Conditional statement
+        return [redact(value) for value in parameters]
+    return redact(parameters)
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements plus the background EXPLAIN worker"""
+
+    def __init__(self):  # Special method: __init__
+        self.threshold_seconds = 0.0
+        self.explain_enabled = True
+        self.log_file = None
+        self.entries = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=1000)
+        self._plans = {}  # (bind, statement) -> (monotonic time, plan text)
+        self._worker = None
+        self._binds = {}  # engine -> bind name
+
+    def init_app(self, app):  # Function: init_app
+        """Attach the timing hooks to every engine of the app"""
+        from db import db
+
+        self.threshold_seconds = (
+            float(app.config.get("SLOW_QUERY_THRESHOLD_MS", 200)) / 1000.0
+        )
+        if self.threshold_seconds <= 0:  # Conditional statement
+            return
+        self.explain_enabled = bool(app.config.get("SLOW_QUERY_EXPLAIN", True))
+        self.log_file = app.config.get("SLOW_QUERY_LOG_FILE")
+        self.entries = deque(
+            maxlen=int(app.config.get("SLOW_QUERY_BUFFER_SIZE", 200))
+        )
+        with app.app_context():
+            self._binds = {
+                engine: key or "primary" for key, engine in db.engines.items()
+            }
+        for engine in self._binds:  # Loop iteration
+            if not event.contains(engine, "after_cursor_execute", self._after_execute):  # Conditional statement
+                event.listen(engine, "before_cursor_execute", self._before_execute)
+                event.listen(engine, "after_cursor_execute", self._after_execute)
+        app.extensions["slow_query_log"] = self
+
+    def snapshot(self):  # Function: snapshot
+        """Newest-first copy of the ring buffer"""
+        with self._lock:
+            return list(reversed(self.entries))
+
+    def clear(self):  # Function: clear
+        with self._lock:
+            self.entries.clear()
+
+    def _before_execute(self, conn, cursor, statement, parameters,  # Function: _before_execute
+                        context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters,  # Function: _after_execute
+                       context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if not starts:  # Conditional statement
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < self.threshold_seconds or conn.info.get("slow_query_explain"):  # Conditional statement
+            return
+
+        if has_request_context():  # Conditional statement
+            source = request.endpoint or request.path
+        else:  # Default case
+            source = threading.current_thread().name
+
+        entry = {
+            "recorded_at": datetime.utcnow().isoformat() + "Z",
+            "duration_ms": round(elapsed * 1000, 2),
+            "statement": statement,
+            "parameters": (None if executemany
+                           else redact_parameters(parameters)),
+            "executemany": executemany,
+            "endpoint": source,
+            "bind": self._binds.get(conn.engine, str(conn.engine.url)),
+            "plan": None,
+        }
+        with self._lock:
+            self.entries.append(entry)
+        logger.warning(
+            "Slow query (%.1fms) from %s: %s",
+            entry["duration_ms"], source, " ".join(statement.split())[:200]
+        )
+
+        try:  # Exception handling block
+  # Real parameters are needed for EXPLAIN but never leave this process
+            self._queue.put_nowait(
+                (entry, conn.engine, statement, parameters, executemany)
+            )
+        except queue.Full:  # Exception handler
+            return
+        self._ensure_worker()
+
+    def _ensure_worker(self):  # Function: _ensure_worker
+        if self._worker is None or not self._worker.is_alive():  # Conditional statement
+            self._worker = threading.Thread(
+                target=self._run, name="slow-query-explain", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self):  # Function: _run
+        while True:  # Loop iteration
+            entry, engine, statement, parameters, executemany = self._queue.get()
+            try:  # Exception handling block
+                if self.explain_enabled and not executemany:  # Conditional statement
+                    entry["plan"] = self._explain(
+                        engine, entry["bind"], statement, parameters
+                    )
+                self._append_to_file(entry)
+            except Exception as e:  # Exception handler
+                logger.debug("Slow query follow-up failed: %s", e)
+
+    def _explain(self, engine, bind, statement, parameters):  # Function: _explain
+        """Plan of the statement on the engine that ran it"""
+        if not statement.lstrip().lower().startswith(EXPLAINABLE_PREFIXES):  # Conditional statement
+            return None
+
+        now = time.monotonic()
+        cached = self._plans.get((bind, statement))
+        if cached is not None and now - cached[0] < EXPLAIN_COOLDOWN_SECONDS:  # Conditional statement
+            return cached[1]
+
+        if engine.dialect.name == "postgresql":  # Conditional statement
+            prefix = "EXPLAIN (ANALYZE off) "
+        else:  # Default case
+            prefix = "EXPLAIN QUERY PLAN "
+
+        with engine.connect() as conn:
+            conn.info["slow_query_explain"] = True
+            try:  # Exception handling block
+                rows = conn.exec_driver_sql(prefix + statement, parameters)
+                lines = [
+                    " ".join(str(col) for col in row) for row in rows
+                ]
+            finally:
+                conn.info.pop("slow_query_explain", None)
+                conn.rollback()
+        plan = "\n".join(lines)
+        self._plans[(bind, statement)] = (now, plan)
+        return plan
+
+    def _append_to_file(self, entry):  # Function: _append_to_file
+        if not self.log_file:  # Conditional statement
+            return
+        with open(self.log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,122 @@
+"""
+Warm-up helpers for pre-forking servers (see gunicorn.conf.py)
+
+- warm_hot_queries(): runs the read endpoints the React client hits first
+  through the test client, for a user id that does not exist. This imports
+  every lazily loaded module, configures the mappers, builds the
+  marshmallow schemas and fills SQLAlchemy's compiled-statement cache
+  without touching real data. Done once in the gunicorn master, the
+  result is shared copy-on-write by all workers.
+- warm_pool(): opens pool_size connections so the first requests of a new
+  worker do not each pay for a TCP/TLS handshake and authentication.
+- process_memory(): RSS/PSS/USS of the current process, used to report
+  per-worker startup memory.
+"""
+import logging  # Application logging
+import time
+
+logger = logging.getLogger("bookvault.warmup")
+
+  # user id that is never assigned (ids start at 1), so warm-up reads nothing
+WARMUP_USER_ID = 0
+
+  # Read-only requests issued by the React client on page load
+HOT_REQUESTS = (
+    "/v1/books?limit=25&offset=1",
+    "/v1/books?limit=25&offset=1&status=Currently+reading",
+    "/v1/books/stats",
+    "/v1/books/search?q=warmup&limit=25",
+    "/v1/books/9780000000002",
+    "/v1/books/0/notes",
+    "/v1/books/0/details",
+    "/v1/profiles",
+    "/v1/settings",
+)
+
+
+def is_bookvault_app(app):  # Function: is_bookvault_app
+    """False for the simple_app fallback, which has no database"""
+    return "sqlalchemy" in getattr(app, "extensions", {})
+
+
+def warm_hot_queries(app):  # Function: warm_hot_queries
+    """Issue HOT_REQUESTS once; returns the time taken in seconds"""
+    from flask_jwt_extended import create_access_token
+
+    start = time.perf_counter()
+    with app.app_context():
+        token = create_access_token(
+            identity="warmup@bookvault.invalid",
+            additional_claims={"id": WARMUP_USER_ID, "role": "user"}
+        )
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    for path in HOT_REQUESTS:  # Loop iteration
+        try:  # Exception handling block
+            client.get(path, headers=headers,
+                       environ_overrides={"bookvault.warmup": True})
+        except Exception as e:  # Exception handler
+            logger.warning("Warm-up request %s failed: %s", path, e)
+    return time.perf_counter() - start
+
+
+def warm_pool(app):  # Function: warm_pool
+    """
+    Open pool_size connections (from SQLALCHEMY_ENGINE_OPTIONS) and return
+    them to the pool. Returns the number of connections opened.
+    """
+    from db import db
+
+    size = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}).get("pool_size", 0)
+    connections = []
+    with app.app_context():
+        engine = db.engine
+        try:  # Exception handling block
+            for _ in range(size):  # Loop iteration
+                connections.append(engine.connect())
+        except Exception as e:  # Exception handler
+            logger.warning("Pool warm-up stopped after %d connection(s): %s",
+                           len(connections), e)
+        finally:
+            for conn in connections:  # Loop iteration
+                conn.close()
+    return len(connections)
+
+
+def dispose_engine(app, close=True):  # Function: dispose_engine
+    """
+    Drop pooled connections of every engine (including the task pool).
+
+    The master calls this with close=True before forking; a freshly forked
+    worker calls it with close=False so it never reuses (or closes) a
+    socket that belongs to its parent.
+    """
+    from db import db
+
+    with app.app_context():
+        for engine in db.engines.values():  # Loop iteration
+            engine.dispose(close=close)
+
+
+def process_memory():  # Function: process_memory
+    """
+    Memory of the current process in KiB: rss, pss (proportional share of
+    pages shared with other workers) and uss (pages only this process
+    holds). Linux only; elsewhere only the peak RSS is available.
+    """
+    try:  # Exception handling block
+        fields = {}
+        with open("/proc/self/smaps_rollup", encoding="ascii") as f:
+            for line in f:  # Loop iteration
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":  # Conditional statement
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+        return {
+            "rss_kb": fields.get("Rss", 0),
+            "pss_kb": fields.get("Pss", 0),
+            "uss_kb": (fields.get("Private_Clean", 0)
+                       + fields.get("Private_Dirty", 0)),
+        }
+    except OSError:  # Exception handler
+        import resource
+        return {"max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
@@ -0,0 +1,276 @@
+"""
+Write-behind buffer for high-frequency progress updates
+
+While a user is reading, the client PATCHes current_page every few seconds
+and background tasks bump their progress several times per run. With the
+buffer enabled those values are kept in memory (latest value per row wins)
+and written back in batches on a short interval or at shutdown, instead of
+one commit per update.
+
+The buffer is opt-in (PROGRESS_BUFFER_ENABLED) and per process: another
+gunicorn worker sees the committed value until the next flush, which is at
+most PROGRESS_BUFFER_FLUSH_SECONDS behind. PROGRESS_BUFFER_MAX_LOSS_SECONDS
+caps how much progress a crashed worker can lose: once the oldest pending
+entry reaches that age, the next write flushes inline.
+
+Views that write a buffered column directly call discard() before their
+first write: it waits for a flush that may already be writing the row,
+keeps later flushes from writing it while the view's transaction is open,
+and drops the buffered value only once that transaction commits (a
+rollback leaves it to be flushed as usual). Without this an older
+buffered value could be flushed over the direct write.
+"""
+import atexit
+import logging  # Application logging
+import threading
+import time
+
+from sqlalchemy import Integer, bindparam, column, update, values
+
+logger = logging.getLogger(__name__)
+
+  # Buffered columns: table name -> column holding the progress value
+BUFFERED_COLUMNS = {
+    "books": "current_page",
+    "tasks": "progress",
+}
+
+  # Rows per UPDATE statement when flushing
+FLUSH_BATCH_SIZE = 500
+
+
+class ProgressWriteBuffer:
+    """
+    Keeps the latest progress value per (table, row id) and flushes them in
+    batched UPDATE statements from a daemon thread.
+    """
+
+    def __init__(self, app=None):  # Special method: __init__
+        self.app = None
+        self.enabled = False
+        self.flush_interval = 2.0
+        self.max_loss_seconds = 5.0
+        self._pending = {}  # (table, row_id) -> (owner_id, value, seq)
+        self._held = {}  # (table, row_id) -> direct writes in flight
+        self._seq = 0  # bumped by every put()
+        self._oldest = None  # monotonic time of the oldest pending write
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        if app is not None:  # Conditional statement
+            self.init_app(app)
+
+    def init_app(self, app):  # Function: init_app
+        """Read settings from the app config and register the shutdown flush"""
+        self.app = app
+        self.enabled = bool(app.config.get("PROGRESS_BUFFER_ENABLED", False))
+        self.max_loss_seconds = float(
+            app.config.get("PROGRESS_BUFFER_MAX_LOSS_SECONDS", 5.0)
+        )
+  # Never wait longer between flushes than we are willing to lose
+        self.flush_interval = min(
+            float(app.config.get("PROGRESS_BUFFER_FLUSH_SECONDS", 2.0)),
+            self.max_loss_seconds
+        )
+        app.extensions["progress_buffer"] = self
+        if self.enabled:  # Conditional statement
+            atexit.register(self.shutdown)
+            logger.info(
+                "Progress write buffer enabled (flush every %.1fs, "
+                "max loss %.1fs)", self.flush_interval, self.max_loss_seconds
+            )
+
+    def put(self, table, row_id, owner_id, value):  # Function: put
+        """Record the latest value for a row; flushes inline if overdue"""
+        with self._lock:
+            if not self._pending:  # Conditional statement
+                self._oldest = time.monotonic()
+            self._seq += 1
+            self._pending[(table, row_id)] = (owner_id, value, self._seq)
+            overdue = (time.monotonic() - self._oldest) >= self.max_loss_seconds
+        self._ensure_thread()
+        if overdue:  # Conditional statement
+            self.flush()
+
+    def get(self, table, row_id):  # Function: get
+        """Return the buffered value for a row, or None"""
+        entry = self._pending.get((table, row_id))
+        return entry[1] if entry else None
+
+    def discard(self, table, row_id):  # Function: discard
+        """
+        Supersede the buffered value of a row the caller is about to write
+        directly, in the current unit of work.
+
+        Call it before the transaction's first write: it waits for a
+        running flush, which may be blocked on that row otherwise.
+        """
+        if not self.enabled:  # Conditional statement
+            return
+        from db import after_commit, after_rollback
+
+        key = (table, row_id)
+  # A flush that already swapped out this row finishes (or re-queues) first
+        with self._flush_lock:
+            with self._lock:
+                self._held[key] = self._held.get(key, 0) + 1
+                seq = self._seq
+        after_rollback(lambda: self._release(key, seq, False))
+        after_commit(lambda: self._release(key, seq, True))
+
+    def _release(self, key, seq, committed):  # Function: _release
+        with self._lock:
+            held = self._held.get(key, 0) - 1
+            if held > 0:  # Conditional statement
+                self._held[key] = held
+            else:  # Default case
+                self._held.pop(key, None)
+  # Values put after discard() are newer than the direct write: keep them
+            entry = self._pending.get(key)
+            if committed and entry and entry[2] <= seq:  # Conditional statement
+                del self._pending[key]
+            if not self._pending:  # Conditional statement
+                self._oldest = None
+
+    def overlay(self, table, items, key="id"):  # Function: overlay
+        """Apply buffered values to serialized rows (dicts) in place"""
+        if not self._pending:  # Conditional statement
+            return items
+        field = BUFFERED_COLUMNS[table]
+        for item in items:  # Loop iteration
+            value = self.get(table, item.get(key))
+  # Items narrowed with ?fields= may not carry the buffered column
+            if value is not None and field in item:  # Conditional statement
+                item[field] = value
+        return items
+
+    def has_pending_for_owner(self, owner_id):  # Function: has_pending_for_owner
+        return any(entry[0] == owner_id for entry in list(self._pending.values()))
+
+    def flush(self):  # Function: flush
+        """Write all pending values to the database"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:  # Conditional statement
+                    return 0
+  # Rows with a direct write in flight stay pending until it ends
+                batch, held = {}, {}
+                for key, entry in self._pending.items():  # Loop iteration
+                    (held if key in self._held else batch)[key] = entry
+                if not batch:  # Conditional statement
+                    return 0
+                self._pending = held
+                oldest = self._oldest
+                if not held:  # Conditional statement
+                    self._oldest = None
+
+            try:  # Exception handling block
+                with self.app.app_context():
+                    deferred = self._write(batch)
+            except Exception as e:  # Exception handler
+                logger.error("Progress buffer flush failed: %s", e)
+                self._requeue(batch, oldest)
+                return 0
+            if deferred:  # Conditional statement
+  # Rows of users being moved; their age does not count toward the
+  # max loss of everyone else's entries
+                self._requeue(deferred, time.monotonic())
+            return len(batch) - len(deferred)
+
+    def _requeue(self, entries, oldest):  # Function: _requeue
+        """Put unwritten entries back unless newer values arrived meanwhile"""
+        with self._lock:
+            for key, entry in entries.items():  # Loop iteration
+                if key not in self._held:  # Conditional statement
+                    self._pending.setdefault(key, entry)
+            if self._pending:  # Conditional statement
+                self._oldest = min(
+                    oldest or time.monotonic(),
+                    self._oldest or time.monotonic()
+                )
+
+    def shutdown(self):  # Function: shutdown
+        """Stop the flusher thread and write out whatever is left"""
+        self._stop.set()
+        self.flush()
+
+    def _ensure_thread(self):  # Function: _ensure_thread
+  # Started lazily so no thread exists before gunicorn forks workers
+        if self._thread is None or not self._thread.is_alive():  # Conditional statement
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="progress-buffer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):  # Function: _run
+        while not self._stop.wait(self.flush_interval):  # Loop iteration
+            self.flush()
+
+    def _write(self, batch):  # Function: _write
+        """Write a batch; returns the entries left for the next flush"""
+        from db import db
+        from sharding import shard_router
+
+  # With sharding, each owner's rows are updated on that owner's shard; the
+  # entries of an owner being moved are kept for a later flush
+        by_engine, deferred = {}, {}
+        for (table, row_id), entry in batch.items():  # Loop iteration
+            owner_id, value, _ = entry
+            if shard_router.enabled:  # Conditional statement
+                key, state = shard_router.placement(owner_id)
+                if state == "moving":  # Conditional statement
+                    deferred[(table, row_id)] = entry
+                    continue
+                engine = db.engines[key]
+            else:  # Default case
+                engine = db.engine
+            by_engine.setdefault(engine, {}).setdefault(table, []).append(
+                {"id": row_id, "owner_id": owner_id, "value": value}
+            )
+
+        for engine, by_table in by_engine.items():  # Loop iteration
+            self._write_engine(engine, db.metadata, by_table)
+        logger.debug("Flushed %d buffered progress update(s)",
+                     len(batch) - len(deferred))
+        if deferred:  # Conditional statement
+            logger.info("Kept %d progress update(s) of users being moved",
+                        len(deferred))
+        return deferred
+
+    def _write_engine(self, engine, metadata, by_table):  # Function: _write_engine
+        with engine.begin() as conn:
+            for table_name, rows in by_table.items():  # Loop iteration
+                table = metadata.tables[table_name]
+                target = table.c[BUFFERED_COLUMNS[table_name]]
+                for start in range(0, len(rows), FLUSH_BATCH_SIZE):  # Loop iteration
+                    chunk = rows[start:start + FLUSH_BATCH_SIZE]
+                    if engine.dialect.name == "postgresql":  # Conditional statement
+  # UPDATE ... FROM (VALUES ...) AS v(id, owner_id, value)
+                        v = values(
+                            column("id", Integer),
+                            column("owner_id", Integer),
+                            column("value", Integer),
+                            name="v"
+                        ).data([
+                            (r["id"], r["owner_id"], r["value"]) for r in chunk
+                        ])
+                        conn.execute(
+                            update(table)
+                            .where(table.c.id == v.c.id,
+                                   table.c.owner_id == v.c.owner_id)
+                            .values({target: v.c.value})
+                        )
+                    else:  # Default case
+                        conn.execute(
+                            update(table)
+                            .where(table.c.id == bindparam("b_id"),
+                                   table.c.owner_id == bindparam("b_owner"))
+                            .values({target: bindparam("b_value")}),
+                            [{"b_id": r["id"], "b_owner": r["owner_id"],
+                              "b_value": r["value"]} for r in chunk]
+                        )
+
+
+progress_buffer = ProgressWriteBuffer()
@@ -30,35 +30,24 @@ def create_application():  # Function: create_application
         logger.info(f"DATABASE_URL configured: {'Yes' if os.getenv('DATABASE_URL') else 'No'}")
         logger.info(f"AUTH_SECRET_KEY configured: {'Yes' if os.getenv('AUTH_SECRET_KEY') else 'No'}")
         
-        # Import the main app
-        from app import app
-        logger.info("Successfully imported main application")
-        
-        # Test basic app functionality
-        with app.app_context():
-            # Test that routes are registered
-            routes = [str(rule) for rule in app.url_map.iter_rules()]
-            logger.info(f"Registered {len(routes)} routes")
-            
-            # Log key routes for debugging
-            key_routes = [r for r in routes if any(endpoint in r for endpoint in ['/', '/health', '/v1/books', '/favicon.ico'])]
-            logger.info(f"Key routes available: {key_routes}")
-            
-            # Verify app configuration
-            logger.info(f"App name: {app.name}")
-            logger.info(f"Debug mode: {app.debug}")
-            logger.info(f"Environment: {os.getenv('FLASK_ENV', 'unknown')}")
-            
-            # Test database connection if configured
-            if os.getenv('DATABASE_URL'):
+        # Build the main app (routes are not enumerated and the database is
+        # not probed here: both slowed down every worker boot)
+        from app import create_app
+        app = create_app()
+        logger.info("Successfully created main application")
+
+        if os.getenv('STARTUP_DB_CHECK', 'false').lower() == 'true':
+            from db import db
+            with app.app_context():
                 try:
-                    from db import db
                     db.session.execute(db.text("SELECT 1"))
                     logger.info("Database connection test successful")
                 except Exception as db_error:
                     logger.warning(f"Database connection test failed: {db_error}")
                     # Don't fail here, let the app handle it
-        
+                finally:
+                    db.session.remove()
+
         return app
         
     except Exception as e:
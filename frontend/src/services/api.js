@@ -50,9 +50,16 @@ const retryRequest = async (config, retryCount = 0) => {
   }
 };
 
+  // Signed read-your-writes pin from the last write, sent back so reads
+  // right after it come from the primary database (see backend/replicas.py)
+let lastWrite = null;
+
   // Request interceptor to add auth token
 api.interceptors.request.use(
   (config) => {
+    if (lastWrite) {
+      config.headers['X-Last-Write'] = lastWrite;
+    }
     try {
       const user = JSON.parse(localStorage.getItem('auth_user') || '{}');
       if (user.access_token) {
@@ -76,7 +83,13 @@ api.interceptors.request.use(
 
   // Response interceptor for error handling
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const pin = response.headers?.['x-last-write'];
+    if (pin) {
+      lastWrite = pin;
+    }
+    return response;
+  },
   async (error) => {
     const originalRequest = error.config;
 